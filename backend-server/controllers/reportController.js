@@ -398,58 +398,76 @@ const getUserReports = async (req, res) => {
   }
 };
 
-// ML Classification Webhook
-const mlWebhook = async (req, res) => {
-  try {
-    const { reportId, classification, updatedReport } = req.body;
-
-    console.log('🤖 ML Classification Complete!');
-    console.log('Report ID:', reportId);
-    console.log('Classification Result:', classification);
-
-    // Update the report in database with ML results
-    const updateData = {
-      mlClassified: true,
-      mlSeverity: classification.severity,
-      mlDepartment: classification.department,
-      mlConfidence: classification.confidence,
-      department: classification.department,
-      severity: classification.severity
-    };
+// Apply one ML classification notification to its report
+const applyMlClassification = async ({ reportId, classification, updatedReport }) => {
+  console.log('🤖 ML Classification Complete!');
+  console.log('Report ID:', reportId);
+  console.log('Classification Result:', classification);
+
+  // Update the report in database with ML results
+  const updateData = {
+    mlClassified: true,
+    mlSeverity: classification.severity,
+    mlDepartment: classification.department,
+    mlConfidence: classification.confidence,
+    department: classification.department,
+    severity: classification.severity
+  };
+
+  // Update title if ML generated one
+  if (classification.title && classification.title !== 'No title') {
+    console.log(`📝 Updating title from '${updatedReport?.title || 'undefined'}' to '${classification.title}'`);
+    updateData.title = classification.title;
+    updateData.mlTitle = classification.title;
+  } else {
+    console.log(`⚠️ No valid title in classification result: '${classification.title}'`);
+  }
 
-    // Update title if ML generated one
-    if (classification.title && classification.title !== 'No title') {
-      console.log(`📝 Updating title from '${updatedReport?.title || 'undefined'}' to '${classification.title}'`);
-      updateData.title = classification.title;
-      updateData.mlTitle = classification.title;
-    } else {
-      console.log(`⚠️ No valid title in classification result: '${classification.title}'`);
-    }
+  // Add conflicts if any
+  if (classification.conflicts) {
+    updateData.mlConflicts = classification.conflicts;
+  }
 
-    // Add conflicts if any
-    if (classification.conflicts) {
-      updateData.mlConflicts = classification.conflicts;
-    }
+  const updatedReportFromDB = await Report.findByIdAndUpdate(
+    reportId,
+    { $set: updateData },
+    { new: true }
+  );
+
+  console.log('Database Updated Successfully!');
+  console.log('Updated Report:', JSON.stringify(updatedReportFromDB, null, 2));
+  console.log('='.repeat(50));
 
-    const updatedReportFromDB = await Report.findByIdAndUpdate(
-      reportId,
-      { $set: updateData },
-      { new: true }
-    );
+  // Emit socket event for ML update
+  if (global.io) {
+    global.io.emit('reportStatusUpdated', updatedReportFromDB);
+    console.log('📡 Emitted reportStatusUpdated (ML) socket event');
+  }
 
-    console.log('Database Updated Successfully!');
-    console.log('Updated Report:', JSON.stringify(updatedReportFromDB, null, 2));
-    console.log('='.repeat(50));
+  return updatedReportFromDB;
+};
 
-    // Emit socket event for ML update
-    if (global.io) {
-      global.io.emit('reportStatusUpdated', updatedReportFromDB);
-      console.log('📡 Emitted reportStatusUpdated (ML) socket event');
+// ML Classification Webhook (one notification, or an array of them from a batching worker)
+const mlWebhook = async (req, res) => {
+  try {
+    if (!Array.isArray(req.body)) {
+      const updatedReportFromDB = await applyMlClassification(req.body);
+      return res.status(200).json({
+        message: 'Webhook received and database updated successfully',
+        updatedReport: updatedReportFromDB
+      });
     }
 
-    res.status(200).json({
-      message: 'Webhook received and database updated successfully',
-      updatedReport: updatedReportFromDB
+    // A bad notification only fails itself; the worker retries the batch if any failed
+    const results = await Promise.allSettled(req.body.map(applyMlClassification));
+    const failed = results.filter((result) => result.status === 'rejected');
+    failed.forEach((result) => console.error('ML Webhook error:', result.reason));
+
+    res.status(failed.length ? 500 : 200).json({
+      message: `Webhook received, ${results.length - failed.length} of ${results.length} reports updated`,
+      failed: results
+        .map((result, index) => (result.status === 'rejected' ? req.body[index]?.reportId : null))
+        .filter(Boolean)
     });
   } catch (error) {
     console.error('ML Webhook error:', error);
@@ -0,0 +1,89 @@
+"""
+AIMD concurrency limit for calls to the ML service.
+
+The worker keeps up to `limit` ML calls in flight. Every call reports its
+latency and whether it failed: a healthy call grows the limit by 1/limit
+(about +1 per round of calls), while an error or a latency above
+`tolerance` x the best recent latency halves it. Only calls started after
+the last decrease can trigger another one, so a burst of slow responses
+caused by the old limit backs off once rather than collapsing to the minimum.
+"""
+import asyncio
+import time
+from collections import deque
+
+
+class AdaptiveLimit:
+    def __init__(self, initial=4, min_limit=1, max_limit=32, backoff=0.5, tolerance=2.0, window=100):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+
+        self._latencies = deque(maxlen=window)
+        self._last_decrease = float("-inf")
+        self._waiters = deque()
+
+        self.completed = 0
+        self.errors = 0
+        self.slow = 0
+        self.decreases = 0
+
+    async def acquire(self):
+        """Wait until fewer than `limit` calls are in flight, then take a slot"""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def observe(self, started, latency, ok):
+        """Adjust the limit from one ML call that started at `started` (monotonic)"""
+        self.completed += 1
+        baseline = min(self._latencies) if self._latencies else None
+        slow = ok and baseline is not None and latency > self.tolerance * baseline
+        if ok:
+            self._latencies.append(latency)
+        else:
+            self.errors += 1
+
+        if not ok or slow:
+            self.slow += slow
+            if started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = time.monotonic()
+                self.decreases += 1
+                print(f"ML service {'error' if not ok else f'slow ({latency:.2f}s)'}, concurrency limit -> {int(self.limit)}")
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def stats(self):
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "errors": self.errors,
+            "slow": self.slow,
+            "decreases": self.decreases,
+            "baseline_latency_s": round(min(self._latencies), 3) if self._latencies else None,
+        }
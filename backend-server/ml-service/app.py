@@ -1,70 +1,45 @@
 import os
-import tempfile
-# Set cache directories to temp folder for fresh downloads
-temp_cache = os.path.join(tempfile.gettempdir(), 'ml_cache_fresh')
-os.makedirs(temp_cache, exist_ok=True)
-os.environ['HF_HOME'] = os.path.join(temp_cache, 'huggingface')
-os.environ['HUGGINGFACE_HUB_CACHE'] = os.path.join(temp_cache, 'huggingface')
-os.environ['TORCH_HOME'] = os.path.join(temp_cache, 'torch')
-os.environ['TRANSFORMERS_CACHE'] = os.path.join(temp_cache, 'transformers')
-print(f"Using cache directory: {temp_cache}")
-print("Models will be downloaded fresh...")
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
+import model_store
+# Point model caches at the persistent store before importing ML libraries
+model_store.configure_environment()
 
 from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import torch
 from PIL import Image
 from transformers import (
+    AutoModelForSequenceClassification, AutoTokenizer,
     CLIPProcessor, CLIPModel,
-    pipeline, BartTokenizer, BartForConditionalGeneration,
     WhisperProcessor, WhisperForConditionalGeneration
 )
-import requests
 from io import BytesIO
-from typing import Optional
+from typing import List, Optional
 import uvicorn
-import librosa
-import numpy as np
-
-app = FastAPI(title="Civic Issue ML Classifier", version="2.0.0")
-
-# Load models on startup with force download
-print("Loading ML models with force download...")
-try:
-    clip_model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32", force_download=True)
-    clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32", force_download=True)
-    print("CLIP models loaded successfully!")
-except Exception as e:
-    print(f"Error loading CLIP models: {e}")
-    clip_model = None
-    clip_processor = None
-
-try:
-    bart_classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli", model_kwargs={"force_download": True})
-    print("BART classifier loaded successfully!")
-except Exception as e:
-    print(f"Error loading BART classifier: {e}")
-    bart_classifier = None
-
-try:
-    bart_tokenizer = BartTokenizer.from_pretrained("facebook/bart-large-cnn", force_download=True)
-    bart_summarizer = BartForConditionalGeneration.from_pretrained("facebook/bart-large-cnn", force_download=True)
-    print("BART summarizer loaded successfully!")
-except Exception as e:
-    print(f"Error loading BART summarizer: {e}")
-    bart_tokenizer = None
-    bart_summarizer = None
-
-try:
-    whisper_processor = WhisperProcessor.from_pretrained("openai/whisper-base", force_download=True)
-    whisper_model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-base", force_download=True)
-    print("Whisper models loaded successfully!")
-except Exception as e:
-    print(f"Error loading Whisper models: {e}")
-    whisper_processor = None
-    whisper_model = None
-
-print("Model loading completed!")
+from text_scorer import FusedZeroShotScorer
+from image_scorer import ClipLabelScorer
+from batcher import MicroBatcher
+from model_registry import ModelRegistry
+from inference_executor import InferenceExecutor, ExecutorOverloaded, parse_limits
+from media_fetcher import MediaFetcher, IMAGE_CONTENT_TYPES, AUDIO_CONTENT_TYPES
+from audio_decoder import decode_audio, TARGET_SAMPLE_RATE
+from result_cache import ResultCache
+from dedup_index import NearDuplicateIndex, combine_embeddings
+from cascade import KeywordCascade
+from keywords import find_keywords, generate_keyword_title, apply_department_corrections
+import metrics
+import quantization
+import inference_backend
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await media_fetcher.aclose()
+
+app = FastAPI(title="Civic Issue ML Classifier", version="2.0.0", lifespan=lifespan)
 
 # Updated Labels
 severity_labels = ["Minor issue", "Moderate issue", "Severe issue"]
@@ -78,6 +53,155 @@ department_labels = [
     "Public Safety"
 ]
 
+# Models whose linear layers run as dynamic int8 on CPU (quantization.py)
+ML_QUANTIZE = quantization.parse_models(os.getenv('ML_QUANTIZE', ''))
+if ML_QUANTIZE and not quantization.supported():
+    raise RuntimeError("ML_QUANTIZE is set but this torch build has no quantized engine")
+
+# Per-model runtime: eager PyTorch, or an ONNX Runtime / TorchScript export (inference_backend.py)
+ML_BACKENDS = inference_backend.parse_backends(os.getenv('ML_BACKENDS', ''))
+for name in ML_QUANTIZE:
+    if ML_BACKENDS[name] != 'eager':
+        raise ValueError(f"ML_QUANTIZE applies to eager models only; {name} uses the {ML_BACKENDS[name]} backend")
+
+def prepare_model(model, quantize=False):
+    """Inference mode, with linear layers converted to int8 if asked"""
+    model = model.eval()
+    if quantize:
+        model = quantization.quantize_linear(model)
+    return model
+
+def load_text_scorer(quantize=False, backend='eager'):
+    """BART-MNLI with severity and department hypotheses scored together in one pass"""
+    path = model_store.resolve(model_store.MODELS['bart_mnli'])
+    tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+    if backend == 'eager':
+        model = prepare_model(AutoModelForSequenceClassification.from_pretrained(path, local_files_only=True), quantize)
+    else:
+        model = inference_backend.load_exported('bart_mnli', backend)
+    return FusedZeroShotScorer(model, tokenizer, [severity_labels, department_labels])
+
+def load_image_scorer(quantize=False, backend='eager'):
+    """CLIP with the label prompt embeddings computed once at load time"""
+    path = model_store.resolve(model_store.MODELS['clip'])
+    processor = CLIPProcessor.from_pretrained(path, local_files_only=True)
+    if backend == 'eager':
+        # Quantize before the label embeddings are computed so both towers match
+        model = prepare_model(CLIPModel.from_pretrained(path, local_files_only=True), quantize)
+    else:
+        model = inference_backend.load_exported('clip', backend)
+    return ClipLabelScorer(model, processor, [severity_labels, department_labels])
+
+def load_whisper(quantize=False):
+    path = model_store.resolve(model_store.MODELS['whisper'])
+    processor = WhisperProcessor.from_pretrained(path, local_files_only=True)
+    model = WhisperForConditionalGeneration.from_pretrained(path, local_files_only=True)
+    return processor, prepare_model(model, quantize)
+
+# Models load on first use; least recently used ones are evicted past the budget
+ML_MEMORY_BUDGET_MB = int(os.getenv('ML_MEMORY_BUDGET_MB', '0'))
+model_registry = ModelRegistry(budget_bytes=ML_MEMORY_BUDGET_MB * 2**20)
+model_registry.register('bart_mnli', lambda: load_text_scorer('bart_mnli' in ML_QUANTIZE, ML_BACKENDS['bart_mnli']))
+model_registry.register('clip', lambda: load_image_scorer('clip' in ML_QUANTIZE, ML_BACKENDS['clip']))
+model_registry.register('whisper', lambda: load_whisper('whisper' in ML_QUANTIZE))
+
+# Micro-batching: concurrent requests are grouped into one forward pass per model
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '8'))
+BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '10'))
+BATCH_BUCKET_TOKENS = int(os.getenv('BATCH_BUCKET_TOKENS', '16'))
+
+text_batcher = MicroBatcher(
+    "text", metrics.timed_batch('bart_mnli', lambda texts: model_registry.get('bart_mnli').score_batch(texts)),
+    BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+    bucket_fn=lambda text: model_registry.get('bart_mnli').count_tokens(text) // BATCH_BUCKET_TOKENS
+)
+image_batcher = MicroBatcher(
+    "image", metrics.timed_batch('clip', lambda images: list(model_registry.get('clip').encode_images(images))),
+    BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+)
+
+# Blocking work runs off the event loop; text/image limits default to the batch
+# size so a full batch can form, Whisper runs one transcription at a time
+executor = InferenceExecutor(
+    model_limits={
+        'bart_mnli': BATCH_MAX_SIZE,
+        'clip': BATCH_MAX_SIZE,
+        'whisper': 1,
+        **parse_limits(os.getenv('ML_MODEL_CONCURRENCY'))
+    },
+    max_queue=int(os.getenv('ML_MAX_QUEUE', '64')),
+    retry_after=int(os.getenv('ML_RETRY_AFTER_S', '1'))
+)
+
+# Shared keep-alive client for report media, with timeouts and a size cap
+media_fetcher = MediaFetcher(
+    connect_timeout=float(os.getenv('MEDIA_CONNECT_TIMEOUT_S', '5')),
+    read_timeout=float(os.getenv('MEDIA_READ_TIMEOUT_S', '15')),
+    max_bytes=int(os.getenv('MEDIA_MAX_BYTES', str(20 * 2**20))),
+    max_connections=int(os.getenv('MEDIA_MAX_CONNECTIONS', '32'))
+)
+
+# Confident keyword matches are answered without BART (cascade.py); opt-in
+CASCADE_ENABLED = os.getenv('CASCADE_ENABLED', '0') == '1'
+cascade = KeywordCascade(
+    threshold=float(os.getenv('CASCADE_THRESHOLD', '0.7'))
+) if CASCADE_ENABLED else None
+
+# Texts whose department the keywords settled only need BART's severity hypotheses
+severity_batcher = MicroBatcher(
+    "text_severity",
+    metrics.timed_batch('bart_mnli_severity', lambda texts: model_registry.get('bart_mnli').score_batch(texts, label_sets=[0])),
+    BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS,
+    bucket_fn=lambda text: model_registry.get('bart_mnli').count_tokens(text) // BATCH_BUCKET_TOKENS
+) if CASCADE_ENABLED else None
+
+# Cached results are only reused while the models that produced them (and their precision and backend) are unchanged
+MODEL_VERSION = "|".join([
+    app.version, *model_store.MODELS.values(),
+    *(f"{name}:int8" for name in sorted(ML_QUANTIZE)),
+    *(f"{name}:{backend}" for name, backend in sorted(ML_BACKENDS.items()) if backend != 'eager'),
+    *([f"cascade:{cascade.threshold}"] if cascade is not None else [])
+])
+
+result_cache = ResultCache(
+    max_entries=int(os.getenv('RESULT_CACHE_ENTRIES', '10000')),
+    max_bytes=int(os.getenv('RESULT_CACHE_MAX_BYTES', str(32 * 2**20))),
+    ttl_seconds=float(os.getenv('RESULT_CACHE_TTL_S', '3600'))
+)
+
+# Near-duplicates of recent reports reuse their classification (needs CLIP, so opt-in)
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', '0') == '1'
+dedup_index = NearDuplicateIndex(
+    capacity=int(os.getenv('DEDUP_CAPACITY', '5000')),
+    window_seconds=float(os.getenv('DEDUP_WINDOW_S', str(6 * 3600))),
+    threshold=float(os.getenv('DEDUP_THRESHOLD', '0.95'))
+) if DEDUP_ENABLED else None
+
+# Component counters are read into /metrics at scrape time
+metrics.REGISTRY.register(metrics.ServiceCollector(
+    executor, [b for b in (text_batcher, image_batcher, severity_batcher) if b is not None],
+    result_cache, model_registry, media_fetcher, dedup_index, cascade
+))
+
+# Whisper only sees the first 30 s, so longer audio is never decoded past that
+AUDIO_MAX_SECONDS = float(os.getenv('AUDIO_MAX_SECONDS', '30'))
+
+# Per-modality deadline; modalities that miss it are reported as partial results
+MODALITY_TIMEOUT_S = float(os.getenv('ML_MODALITY_TIMEOUT_S', '20'))
+
+# /classify/batch: items per request, and how many of them are classified at once
+# (enough to keep the micro-batches full without overflowing the executor queue)
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '1000'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', str(2 * BATCH_MAX_SIZE)))
+
+@app.exception_handler(ExecutorOverloaded)
+async def overloaded_handler(request, exc):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"ML service overloaded: {exc}"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # Mapping for output
 severity_mapping = {
     "Minor issue": "LOW",
@@ -99,6 +223,13 @@ class ClassificationRequest(BaseModel):
     text: Optional[str] = None
     image_url: Optional[str] = None
     audio_url: Optional[str] = None
+    report_id: Optional[str] = None
+
+class BatchItem(ClassificationRequest):
+    id: str
+
+class BatchClassificationRequest(BaseModel):
+    items: List[BatchItem]
 
 class ClassificationResponse(BaseModel):
     severity: str
@@ -107,159 +238,10 @@ class ClassificationResponse(BaseModel):
     confidence: dict
     conflicts: Optional[str] = None
 
-def generate_short_title(text, department=None, max_words=4):
+def generate_short_title(text, department=None, max_words=4, matches=None):
     """Generate short title using keyword extraction and templates"""
     # Skip BART for now as it's returning full text - go directly to keyword extraction
-    return generate_keyword_title(text, department, max_words)
-
-def generate_keyword_title(text, department=None, max_words=4):
-    """Generate title using keyword extraction"""
-    try:
-        text_lower = text.lower()
-        
-        # Enhanced issue keywords with more specific matches
-        issue_keywords = {
-            'pothole': 'Pothole Issue',
-            'garbage': 'Garbage Problem', 
-            'trash': 'Waste Issue',
-            'waste': 'Waste Problem',
-            'streetlight': 'Streetlight Issue',
-            'street light': 'Streetlight Issue',
-            'light': 'Lighting Issue',
-            'water': 'Water Issue',
-            'leak': 'Water Leak',
-            'pipe': 'Pipe Issue',
-            'drain': 'Drainage Issue',
-            'road': 'Road Problem',
-            'broken': 'Broken Item',
-            'damaged': 'Damage Report',
-            'not working': 'Malfunction',
-            'overflow': 'Overflow Issue',
-            'blocked': 'Blockage Issue',
-            'dust': 'Dust Problem',
-            'dirty': 'Cleanliness Issue',
-            'noise': 'Noise Problem',
-            'smell': 'Odor Issue',
-            'crack': 'Crack Issue',
-            'hole': 'Hole Problem',
-            'mosquito': 'Mosquito Problem',
-            'mosquitoes': 'Mosquito Problem',
-            'pest': 'Pest Issue',
-            'insects': 'Insect Problem',
-            'flies': 'Fly Problem',
-            'rats': 'Rodent Problem',
-            'rodents': 'Rodent Problem',
-            'toilet': 'Toilet Issue',
-            'bathroom': 'Bathroom Problem',
-            'sewage': 'Sewage Issue',
-            'sewer': 'Sewer Problem'
-        }
-        
-        # Find matching keywords (prioritize longer matches)
-        sorted_keywords = sorted(issue_keywords.items(), key=lambda x: len(x[0]), reverse=True)
-        for keyword, title in sorted_keywords:
-            if keyword in text_lower:
-                return title
-        
-        # Look for action words + object
-        action_patterns = {
-            'everywhere': 'Widespread Issue',
-            'causing': 'Problem Report',
-            'need': 'Repair Needed',
-            'fix': 'Fix Required',
-            'repair': 'Repair Needed'
-        }
-        
-        for pattern, title in action_patterns.items():
-            if pattern in text_lower:
-                return title
-        
-        # Department-based fallback
-        if department:
-            dept_titles = {
-                'Sanitation and Waste Management': 'Sanitation Issue',
-                'Roads and Transport': 'Road Issue', 
-                'Electricity and Streetlights': 'Electrical Issue',
-                'Water Supply and Drainage': 'Water Issue',
-                'Public Health': 'Health Issue',
-                'Environment': 'Environmental Issue',
-                'Public Safety': 'Safety Issue'
-            }
-            if department in dept_titles:
-                return dept_titles[department]
-        
-        # Extract key nouns and create title
-        words = text.split()
-        if len(words) >= 2:
-            # Take first 2-3 meaningful words and add "Issue"
-            key_words = []
-            for word in words[:4]:
-                if len(word) > 2 and word.lower() not in ['the', 'and', 'are', 'is', 'on', 'in', 'at', 'to', 'of']:
-                    key_words.append(word.title())
-                if len(key_words) >= 2:
-                    break
-            
-            if key_words:
-                return ' '.join(key_words) + ' Issue'
-        
-        # Final fallback: Use first few words but limit length
-        if words:
-            title = ' '.join(words[:max_words]).title()
-            if len(title) > 25:  # Limit title length
-                title = title[:22] + '...'
-            return title
-        
-        return 'Civic Issue Report'
-        
-    except Exception as e:
-        print(f"Keyword title generation error: {e}")
-        return 'Civic Issue Report'
-
-def apply_department_corrections(text: str, department: str):
-    """Apply post-processing rules to correct common misclassifications"""
-    text_lower = text.lower()
-    
-    # Sanitation issues often misclassified as Environment
-    sanitation_keywords = [
-        'mosquito', 'mosquitoes', 'pest', 'insects', 'flies', 'rats', 'rodents',
-        'garbage', 'trash', 'waste', 'dump', 'litter', 'dirty', 'smell', 'odor',
-        'toilet', 'bathroom', 'sewage', 'sewer', 'cleaning', 'hygiene'
-    ]
-    
-    # Water Supply issues
-    water_keywords = [
-        'water supply', 'tap water', 'drinking water', 'water shortage',
-        'no water', 'water pressure', 'water quality', 'contaminated water'
-    ]
-    
-    # Roads issues
-    roads_keywords = [
-        'traffic', 'vehicle', 'parking', 'signal', 'zebra crossing',
-        'footpath', 'sidewalk', 'pavement'
-    ]
-    
-    # Check for sanitation keywords
-    for keyword in sanitation_keywords:
-        if keyword in text_lower:
-            if department in ['Environment', 'Public Health']:
-                print(f"Correcting department: '{keyword}' found -> Sanitation")
-                return 'Sanitation and Waste Management'
-    
-    # Check for water keywords
-    for keyword in water_keywords:
-        if keyword in text_lower:
-            if department != 'Water Supply and Drainage':
-                print(f"Correcting department: '{keyword}' found -> Water")
-                return 'Water Supply and Drainage'
-    
-    # Check for roads keywords
-    for keyword in roads_keywords:
-        if keyword in text_lower:
-            if department != 'Roads and Transport':
-                print(f"Correcting department: '{keyword}' found -> Roads")
-                return 'Roads and Transport'
-    
-    return department
+    return generate_keyword_title(text, department, max_words, matches)
 
 def classify_text(text: str):
     """Classify text for severity and department"""
@@ -269,7 +251,7 @@ def classify_text(text: str):
         if not clean_text:
             return None, None, None, 0.0, 0.0
         
-        if not bart_classifier:
+        if not model_registry.available('bart_mnli'):
             print("BART classifier not available, using fallback classification")
             # Fallback classification based on keywords
             severity = "Moderate issue"
@@ -277,18 +259,20 @@ def classify_text(text: str):
             title = generate_short_title(clean_text, department)
             return severity, department, title, 0.5, 0.5
             
-        severity_result = bart_classifier(clean_text, severity_labels, multi_label=False)
-        department_result = bart_classifier(clean_text, department_labels, multi_label=False)
+        severity_result, department_result = text_batcher.submit(clean_text).result()
         
         severity = severity_result["labels"][0]
         department = department_result["labels"][0]
         
+        # One keyword scan serves both the corrections and the title
+        matches = find_keywords(clean_text)
+        
         # Apply post-processing corrections
-        corrected_department = apply_department_corrections(clean_text, department)
+        corrected_department = apply_department_corrections(clean_text, department, matches)
         if corrected_department != department:
             department = corrected_department
         
-        title = generate_short_title(clean_text, department)
+        title = generate_short_title(clean_text, department, matches=matches)
         
         severity_conf = severity_result["scores"][0]
         dept_conf = department_result["scores"][0]
@@ -298,29 +282,26 @@ def classify_text(text: str):
         print(f"Text classification error: {e}")
         return None, None, None, 0.0, 0.0
 
-def classify_image(image_url: str):
+def embed_image(image_bytes: bytes):
+    """Normalized CLIP embedding of an image, batched with concurrent requests"""
+    image = Image.open(BytesIO(image_bytes)).convert('RGB')
+    return image_batcher.submit(image).result()
+
+def embed_text(text: str):
+    """Normalized CLIP embedding of a description"""
+    return model_registry.get('clip').encode_texts([text])[0]
+
+def classify_image(image_bytes: bytes, embedding=None):
     """Classify image for severity and department"""
     try:
-        if not clip_model or not clip_processor:
+        if not model_registry.available('clip'):
             print("CLIP models not available")
             return None, None, None, 0.0, 0.0
-            
-        response = requests.get(image_url)
-        image = Image.open(BytesIO(response.content)).convert('RGB')
         
-        # Severity
-        inputs = clip_processor(text=severity_labels, images=image, return_tensors="pt", padding=True)
-        outputs = clip_model(**inputs)
-        probs = outputs.logits_per_image.softmax(dim=1)[0]
-        severity = severity_labels[torch.argmax(probs)]
-        severity_conf = float(torch.max(probs))
-        
-        # Department
-        inputs_dept = clip_processor(text=department_labels, images=image, return_tensors="pt", padding=True)
-        outputs_dept = clip_model(**inputs_dept)
-        probs_dept = outputs_dept.logits_per_image.softmax(dim=1)[0]
-        department = department_labels[torch.argmax(probs_dept)]
-        dept_conf = float(torch.max(probs_dept))
+        if embedding is None:
+            embedding = embed_image(image_bytes)
+        scores = model_registry.get('clip').score_embeddings(embedding.unsqueeze(0))[0]
+        (severity, severity_conf), (department, dept_conf) = scores
         
         # Title fallback
         title = f"Issue in {department_mapping.get(department, department)}"
@@ -330,36 +311,136 @@ def classify_image(image_url: str):
         print(f"Image classification error: {e}")
         return None, None, None, 0.0, 0.0
 
-def classify_audio(audio_url: str):
+def transcribe_audio(audio_bytes: bytes):
+    """Transcribe audio with Whisper"""
+    whisper_processor, whisper_model = model_registry.get('whisper')
+    
+    # Decode and resample straight from memory
+    audio = decode_audio(audio_bytes, AUDIO_MAX_SECONDS)
+    
+    # Convert to tensor
+    inputs = whisper_processor(audio, return_tensors="pt", sampling_rate=TARGET_SAMPLE_RATE)
+    with metrics.INFERENCE_SECONDS.labels('whisper').time():
+        predicted_ids = whisper_model.generate(inputs["input_features"])
+    text = whisper_processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
+    
+    return text
+
+async def fetch_media(url: str, allowed_types, kind: str):
+    """Download report media with the shared client, recording time and size"""
+    started = time.perf_counter()
+    try:
+        data = await media_fetcher.fetch(url, allowed_types)
+    except Exception:
+        metrics.MEDIA_DOWNLOAD_SECONDS.labels(kind, 'error').observe(time.perf_counter() - started)
+        raise
+    metrics.MEDIA_DOWNLOAD_SECONDS.labels(kind, 'ok').observe(time.perf_counter() - started)
+    metrics.MEDIA_DOWNLOAD_BYTES.labels(kind).observe(len(data))
+    return data
+
+def classify_text_keywords(text: str):
+    """Keyword-tier answer for the cascade, or None when the text needs BART.
+
+    The severity and its confidence are None when the keywords settled only
+    the department; classify_text_severity fills them in.
+    """
+    clean_text = text.replace('Processing...', '').strip()
+    if not clean_text:
+        return None
+    
+    routed = cascade.route(clean_text)
+    if routed is None:
+        return None
+    
+    severity, department, severity_conf, dept_conf, matches = routed
+    department = apply_department_corrections(clean_text, department, matches)
+    title = generate_short_title(clean_text, department, matches=matches)
+    return severity, department, title, severity_conf, dept_conf
+
+def classify_text_severity(text: str, partial):
+    """Complete a keyword-tier answer with BART's severity, scoring only the severity hypotheses"""
+    _, department, title, _, dept_conf = partial
+    try:
+        if not model_registry.available('bart_mnli'):
+            print("BART classifier not available, using fallback severity")
+            return "Moderate issue", department, title, 0.5, dept_conf
+        
+        clean_text = text.replace('Processing...', '').strip()
+        severity_result, = severity_batcher.submit(clean_text).result()
+        return severity_result["labels"][0], department, title, severity_result["scores"][0], dept_conf
+    except Exception as e:
+        print(f"Severity classification error: {e}")
+        return None, None, None, 0.0, 0.0
+
+async def classify_text_async(text: str):
+    # A confident keyword answer skips the model lane altogether
+    if cascade is not None:
+        result = classify_text_keywords(text)
+        if result is not None:
+            if result[0] is not None:
+                return result
+            return await executor.run_model('bart_mnli', classify_text_severity, text, result)
+    return await executor.run_model('bart_mnli', classify_text, text)
+
+async def classify_image_async(image_url: str, embedding=None):
+    """Download with the shared media client, then classify on the model pool"""
+    if embedding is not None:
+        return await executor.run_model('clip', classify_image, None, embedding)
+    try:
+        image_bytes = await fetch_media(image_url, IMAGE_CONTENT_TYPES, 'image')
+    except Exception as e:
+        print(f"Image download error: {e}")
+        return None, None, None, 0.0, 0.0
+    return await executor.run_model('clip', classify_image, image_bytes)
+
+async def embed_report(request: ClassificationRequest):
+    """CLIP text/image embeddings of a report for near-duplicate search"""
+    async def text_embedding():
+        clean_text = request.text.replace('Processing...', '').strip()
+        if not clean_text:
+            return None
+        return await executor.run_model('clip', embed_text, clean_text)
+    
+    async def image_embedding():
+        image_bytes = await fetch_media(request.image_url, IMAGE_CONTENT_TYPES, 'image')
+        return await executor.run_model('clip', embed_image, image_bytes)
+    
+    try:
+        if not model_registry.available('clip'):
+            return None
+        text_emb, image_emb = await asyncio.gather(
+            text_embedding() if request.text else asyncio.sleep(0),
+            image_embedding() if request.image_url else asyncio.sleep(0)
+        )
+    except ExecutorOverloaded:
+        raise
+    except Exception as e:
+        print(f"Report embedding error, skipping duplicate check: {e}")
+        return None
+    
+    if text_emb is None and image_emb is None:
+        return None
+    vector, kind = combine_embeddings(
+        text_emb.numpy() if text_emb is not None else None,
+        image_emb.numpy() if image_emb is not None else None
+    )
+    return vector, kind, image_emb
+
+async def classify_audio_async(audio_url: str):
     """Classify audio by converting to text first"""
     try:
-        if not whisper_processor or not whisper_model:
+        if not model_registry.available('whisper'):
             print("Whisper models not available")
             return None, None, None, 0.0, 0.0
-            
-        # Download audio file
-        response = requests.get(audio_url)
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            temp_file.write(response.content)
-            temp_path = temp_file.name
-        
-        # Load and process audio
-        audio, sr = librosa.load(temp_path, sr=16000)
         
-        # Convert to tensor
-        inputs = whisper_processor(audio, return_tensors="pt", sampling_rate=16000)
-        predicted_ids = whisper_model.generate(inputs["input_features"])
-        text = whisper_processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
-        
-        # Clean up temp file
-        os.unlink(temp_path)
-        
-        return classify_text(text)
+        audio_bytes = await fetch_media(audio_url, AUDIO_CONTENT_TYPES, 'audio')
+        text = await executor.run_model('whisper', transcribe_audio, audio_bytes)
+    except ExecutorOverloaded:
+        raise
     except Exception as e:
         print(f"Audio classification error: {e}")
         return None, None, None, 0.0, 0.0
+    return await classify_text_async(text)
 
 def combine_predictions(text_pred, image_pred):
     """Combine predictions with conflict awareness"""
@@ -398,28 +479,89 @@ def combine_predictions(text_pred, image_pred):
 
 @app.post("/classify")
 async def classify_issue(request: ClassificationRequest):
+    outcome = "cancelled"
+    try:
+        result = await classify_cached(request)
+        outcome = "partial" if result.get("partial") else "duplicate" if result.get("duplicate_of") else "ok"
+        return result
+    except HTTPException as e:
+        outcome = metrics.STATUS_OUTCOMES.get(e.status_code, "error")
+        raise
+    except ExecutorOverloaded:
+        outcome = "overloaded"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        metrics.CLASSIFY_REQUESTS.labels(outcome).inc()
+
+async def classify_cached(request: ClassificationRequest):
     if not request.text and not request.image_url and not request.audio_url:
         raise HTTPException(status_code=400, detail="At least one of text, image_url, or audio_url must be provided")
     
-    text_pred = None
-    image_pred = None
-    audio_pred = None
+    # Identical (or trivially different) requests share one inference and its cached result
+    cache_key = result_cache.make_key(request.text, request.image_url, request.audio_url, MODEL_VERSION)
+    return await result_cache.get_or_compute(
+        cache_key,
+        lambda: run_classification(request),
+        cacheable=lambda result: not result.get("partial")
+    )
+
+async def run_classification(request: ClassificationRequest):
+    """Classify every provided modality and combine the predictions"""
+    # A close match to a recently classified report reuses its result and skips BART
+    dedup = None
+    image_embedding = None
+    if dedup_index is not None and not request.audio_url:
+        dedup = await embed_report(request)
+        if dedup:
+            vector, kind, image_embedding = dedup
+            match = dedup_index.search(vector, kind)
+            if match:
+                report_id, result, similarity = match
+                print(f"Near-duplicate of report {report_id} (similarity {similarity:.3f})")
+                return {**result, "duplicate_of": report_id, "similarity": round(similarity, 3)}
     
-    # Process each input type
+    # Run every modality concurrently so downloads overlap text inference
+    modalities = {}
     if request.text:
-        text_pred = classify_text(request.text)
-    
+        modalities["text"] = classify_text_async(request.text)
     if request.image_url:
-        image_pred = classify_image(request.image_url)
-    
+        modalities["image"] = classify_image_async(request.image_url, image_embedding)
     if request.audio_url:
-        audio_pred = classify_audio(request.audio_url)
+        modalities["audio"] = classify_audio_async(request.audio_url)
+    
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(coro, MODALITY_TIMEOUT_S) for coro in modalities.values()),
+        return_exceptions=True
+    )
+    
+    predictions = {}
+    timed_out = []
+    for name, outcome in zip(modalities, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            print(f"{name} classification timed out after {MODALITY_TIMEOUT_S}s")
+            metrics.MODALITY_REQUESTS.labels(name, "timeout").inc()
+            timed_out.append(name)
+        elif isinstance(outcome, BaseException):
+            metrics.MODALITY_REQUESTS.labels(name, "overloaded" if isinstance(outcome, ExecutorOverloaded) else "error").inc()
+            raise outcome
+        else:
+            metrics.MODALITY_REQUESTS.labels(name, "ok" if outcome[0] else "failed").inc()
+            predictions[name] = outcome
+    
+    text_pred = predictions.get("text")
+    image_pred = predictions.get("image")
+    audio_pred = predictions.get("audio")
     
     # Combine predictions (prioritize text, then audio, then image)
     primary_pred = text_pred or audio_pred
     result = combine_predictions(primary_pred, image_pred)
     
     if not result or not result[0]:
+        if timed_out:
+            raise HTTPException(status_code=504, detail=f"Classification timed out for: {', '.join(timed_out)}")
         raise HTTPException(status_code=500, detail="Classification failed")
     
     final_severity, final_department, final_title, severity_conf, dept_conf, conflicts = result
@@ -441,31 +583,65 @@ async def classify_issue(request: ClassificationRequest):
     if conflicts:
         response["conflicts"] = conflicts
     
+    if timed_out:
+        response["partial"] = True
+        response["timed_out"] = timed_out
+    elif dedup and request.report_id:
+        dedup_index.add(vector, kind, request.report_id, response)
+    
     return response
 
+@app.post("/classify/batch")
+async def classify_batch(request: BatchClassificationRequest):
+    """Classify many reports, streaming one NDJSON line per item as it finishes"""
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    return StreamingResponse(stream_batch(request.items), media_type="application/x-ndjson")
+
+async def classify_batch_item(item: BatchItem, slots: asyncio.Semaphore):
+    """Result line for one batch item; failures are reported on the item, not the batch"""
+    async with slots:
+        try:
+            result = await classify_issue(item)
+            return {"id": item.id, **result}
+        except HTTPException as e:
+            return {"id": item.id, "error": e.detail, "status": e.status_code}
+        except ExecutorOverloaded as e:
+            return {"id": item.id, "error": f"ML service overloaded: {e}", "status": 503, "retry_after": e.retry_after}
+        except Exception as e:
+            print(f"Batch item {item.id} failed: {e}")
+            return {"id": item.id, "error": str(e), "status": 500}
+
+async def classify_batch_items(items: List[BatchItem]):
+    """Result dicts for items in the order they finish (worker.py's embedded mode iterates this directly)"""
+    # Items run concurrently so their text/image work lands in shared micro-batches
+    slots = asyncio.Semaphore(BATCH_CONCURRENCY)
+    tasks = [asyncio.ensure_future(classify_batch_item(item, slots)) for item in items]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # Consumer went away: stop the items that have not finished
+        for task in tasks:
+            task.cancel()
+
+async def stream_batch(items: List[BatchItem]):
+    results = classify_batch_items(items)
+    try:
+        async for result in results:
+            yield json.dumps(result) + "\n"
+    finally:
+        await results.aclose()
+
 @app.post("/classify-audio")
 async def classify_audio_file(file: UploadFile = File(...)):
     """Classify uploaded audio file"""
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-        
-        # Load and process audio
-        audio, sr = librosa.load(temp_path, sr=16000)
-        
-        # Convert to tensor
-        inputs = whisper_processor(audio, return_tensors="pt", sampling_rate=16000)
-        predicted_ids = whisper_model.generate(inputs["input_features"])
-        text = whisper_processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
-        
-        # Clean up temp file
-        os.unlink(temp_path)
+        content = await file.read()
+        text = await executor.run_model('whisper', transcribe_audio, content)
         
         # Classify the transcribed text
-        result = classify_text(text)
+        result = await classify_text_async(text)
         if not result or not result[0]:
             raise HTTPException(status_code=500, detail="Audio classification failed")
         
@@ -481,12 +657,56 @@ async def classify_audio_file(file: UploadFile = File(...)):
                 "department": round(dept_conf, 3)
             }
         }
+    except (HTTPException, ExecutorOverloaded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Audio processing failed: {str(e)}")
 
+def model_precision(name):
+    """Precision of the resident model; the configured one if it is not loaded or not a torch module"""
+    resident = model_registry.peek(name)
+    # Whisper is registered as (processor, model), the scorers hold theirs in .model
+    module = resident[1] if isinstance(resident, tuple) else getattr(resident, 'model', None)
+    return quantization.precision(module) or ("int8" if name in ML_QUANTIZE else "fp32")
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "message": "ML service is running"}
+    loaded = model_registry.report()['models']
+    return {
+        "status": "healthy",
+        "message": "ML service is running",
+        "models": {
+            name: {
+                "precision": model_precision(name),
+                "backend": ML_BACKENDS.get(name, "eager"),
+                "loaded": info["loaded"]
+            }
+            for name, info in loaded.items()
+        }
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of latency, throughput, queue and cache metrics"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/stats")
+async def service_stats():
+    """Runtime statistics for tuning the service"""
+    return {
+        "models": model_registry.report(),
+        "executor": executor.stats(),
+        "media": media_fetcher.stats(),
+        "cache": result_cache.stats(),
+        "dedup": dedup_index.stats() if dedup_index is not None else None,
+        "cascade": cascade.stats() if cascade is not None else None,
+        "batching": {
+            "text": text_batcher.stats(),
+            "image": image_batcher.stats(),
+            "text_severity": severity_batcher.stats() if severity_batcher is not None else None
+        }
+    }
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
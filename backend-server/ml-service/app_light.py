@@ -1,4 +1,5 @@
 import os
+import json
 import tempfile
 # Set cache directories to temp folder for fresh downloads
 temp_cache = os.path.join(tempfile.gettempdir(), 'ml_cache_light')
@@ -10,10 +11,14 @@ os.environ['TRANSFORMERS_CACHE'] = os.path.join(temp_cache, 'transformers')
 print(f"Using lightweight cache directory: {temp_cache}")
 
 from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import requests
-from typing import Optional
+from typing import List, Optional
 import uvicorn
+import numpy as np
+import keywords
+from keywords import find_keywords, generate_keyword_title, keyword_severity, keyword_department
 
 app = FastAPI(title="Civic Issue ML Classifier (Lightweight)", version="2.0.0")
 
@@ -54,6 +59,16 @@ class ClassificationRequest(BaseModel):
     image_url: Optional[str] = None
     audio_url: Optional[str] = None
 
+class BatchItem(ClassificationRequest):
+    id: str
+
+class BatchClassificationRequest(BaseModel):
+    items: List[BatchItem]
+
+# /classify/batch: items per request, and how many are scored per vectorized call
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '10000'))
+BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', '1000'))
+
 class ClassificationResponse(BaseModel):
     severity: str
     department: str
@@ -61,136 +76,20 @@ class ClassificationResponse(BaseModel):
     confidence: dict
     conflicts: Optional[str] = None
 
-def generate_keyword_title(text, department=None, max_words=4):
-    """Generate title using keyword extraction"""
-    try:
-        text_lower = text.lower()
-        
-        # Enhanced issue keywords
-        issue_keywords = {
-            'pothole': 'Pothole Issue',
-            'garbage': 'Garbage Problem', 
-            'trash': 'Waste Issue',
-            'waste': 'Waste Problem',
-            'streetlight': 'Streetlight Issue',
-            'street light': 'Streetlight Issue',
-            'light': 'Lighting Issue',
-            'water': 'Water Issue',
-            'leak': 'Water Leak',
-            'pipe': 'Pipe Issue',
-            'drain': 'Drainage Issue',
-            'road': 'Road Problem',
-            'broken': 'Broken Item',
-            'damaged': 'Damage Report',
-            'not working': 'Malfunction',
-            'overflow': 'Overflow Issue',
-            'blocked': 'Blockage Issue',
-            'dust': 'Dust Problem',
-            'dirty': 'Cleanliness Issue',
-            'noise': 'Noise Problem',
-            'smell': 'Odor Issue',
-            'crack': 'Crack Issue',
-            'hole': 'Hole Problem',
-            'mosquito': 'Mosquito Problem',
-            'mosquitoes': 'Mosquito Problem',
-            'pest': 'Pest Issue',
-            'insects': 'Insect Problem',
-            'flies': 'Fly Problem',
-            'rats': 'Rodent Problem',
-            'rodents': 'Rodent Problem',
-            'toilet': 'Toilet Issue',
-            'bathroom': 'Bathroom Problem',
-            'sewage': 'Sewage Issue',
-            'sewer': 'Sewer Problem'
-        }
-        
-        # Find matching keywords
-        sorted_keywords = sorted(issue_keywords.items(), key=lambda x: len(x[0]), reverse=True)
-        for keyword, title in sorted_keywords:
-            if keyword in text_lower:
-                return title
-        
-        # Department-based fallback
-        if department:
-            dept_titles = {
-                'Sanitation and Waste Management': 'Sanitation Issue',
-                'Roads and Transport': 'Road Issue', 
-                'Electricity and Streetlights': 'Electrical Issue',
-                'Water Supply and Drainage': 'Water Issue',
-                'Public Health': 'Health Issue',
-                'Environment': 'Environmental Issue',
-                'Public Safety': 'Safety Issue'
-            }
-            if department in dept_titles:
-                return dept_titles[department]
-        
-        # Extract key words
-        words = text.split()
-        if len(words) >= 2:
-            key_words = []
-            for word in words[:4]:
-                if len(word) > 2 and word.lower() not in ['the', 'and', 'are', 'is', 'on', 'in', 'at', 'to', 'of']:
-                    key_words.append(word.title())
-                if len(key_words) >= 2:
-                    break
-            
-            if key_words:
-                return ' '.join(key_words) + ' Issue'
-        
-        return 'Civic Issue Report'
-        
-    except Exception as e:
-        print(f"Title generation error: {e}")
-        return 'Civic Issue Report'
-
 def classify_text_lightweight(text: str):
     """Lightweight text classification using keywords"""
     try:
-        text_lower = text.lower()
+        matches = find_keywords(text)
         
         # Severity classification based on keywords
-        high_severity_keywords = ['emergency', 'urgent', 'dangerous', 'severe', 'critical', 'major', 'serious', 'broken', 'overflow', 'blocked completely']
-        low_severity_keywords = ['minor', 'small', 'little', 'slight', 'cosmetic']
-        
-        severity = "Moderate issue"  # default
-        severity_conf = 0.6
-        
-        for keyword in high_severity_keywords:
-            if keyword in text_lower:
-                severity = "Severe issue"
-                severity_conf = 0.8
-                break
-        
-        if severity == "Moderate issue":
-            for keyword in low_severity_keywords:
-                if keyword in text_lower:
-                    severity = "Minor issue"
-                    severity_conf = 0.7
-                    break
+        severity, severity_conf = keyword_severity(matches)
         
         # Department classification based on keywords
-        department_keywords = {
-            'Sanitation and Waste Management': ['garbage', 'trash', 'waste', 'dump', 'litter', 'dirty', 'smell', 'odor', 'toilet', 'bathroom', 'sewage', 'sewer', 'mosquito', 'mosquitoes', 'pest', 'insects', 'flies', 'rats', 'rodents', 'cleaning', 'hygiene'],
-            'Roads and Transport': ['road', 'street', 'pothole', 'traffic', 'vehicle', 'parking', 'signal', 'zebra crossing', 'footpath', 'sidewalk', 'pavement'],
-            'Electricity and Streetlights': ['electricity', 'power', 'light', 'streetlight', 'street light', 'bulb', 'wire', 'pole', 'transformer'],
-            'Water Supply and Drainage': ['water', 'leak', 'pipe', 'drain', 'drainage', 'tap', 'supply', 'pressure', 'quality', 'contaminated', 'shortage'],
-            'Public Health': ['health', 'medical', 'hospital', 'clinic', 'disease', 'illness', 'contamination'],
-            'Environment': ['environment', 'pollution', 'air', 'noise', 'dust', 'tree', 'park', 'green'],
-            'Public Safety': ['safety', 'security', 'crime', 'theft', 'violence', 'accident', 'emergency']
-        }
-        
-        department = "Public Health"  # default
-        dept_conf = 0.5
-        max_matches = 0
+        department, dept_conf = keyword_department(matches)
         
-        for dept, keywords in department_keywords.items():
-            matches = sum(1 for keyword in keywords if keyword in text_lower)
-            if matches > max_matches:
-                max_matches = matches
-                department = dept
-                dept_conf = min(0.9, 0.5 + (matches * 0.1))
-        
-        title = generate_keyword_title(text, department)
+        # No action-word titles or first-words fallback here, unlike app.py
+        title = generate_keyword_title(text, department, matches=matches,
+                                       action_titles=False, first_words_fallback=False)
         
         return severity, department, title, severity_conf, dept_conf
         
@@ -198,19 +97,55 @@ def classify_text_lightweight(text: str):
         print(f"Lightweight classification error: {e}")
         return "Moderate issue", "Public Health", "Civic Issue", 0.5, 0.5
 
-@app.post("/classify")
-async def classify_issue(request: ClassificationRequest):
-    if not request.text and not request.image_url and not request.audio_url:
-        raise HTTPException(status_code=400, detail="At least one of text, image_url, or audio_url must be provided")
+# Label/title lookup tables for the batch scorer, indexed like the arrays it builds
+BATCH_SEVERITIES = np.array(["Minor issue", "Moderate issue", "Severe issue"], dtype=object)
+BATCH_DEPARTMENTS = np.array(keywords.DEPARTMENT_NAMES, dtype=object)
+BATCH_TITLES = np.array(
+    keywords.ISSUE_TITLES_BY_RANK + [keywords.DEPARTMENT_TITLES[dept] for dept in keywords.DEPARTMENT_NAMES],
+    dtype=object
+)
+DEFAULT_DEPARTMENT = keywords.DEPARTMENT_NAMES.index("Public Health")
+
+def classify_texts_lightweight(texts):
+    """Batch version of classify_text_lightweight, same results computed with NumPy"""
+    # Bulk traffic repeats descriptions; score each distinct text once
+    distinct = {}
+    positions = [distinct.setdefault(text, len(distinct)) for text in texts]
+    count = len(distinct)
+    if not count:
+        return []
     
-    # For lightweight version, only process text
-    if request.text:
-        severity, department, title, severity_conf, dept_conf = classify_text_lightweight(request.text)
-    else:
-        # Fallback for image/audio
-        severity, department, title, severity_conf, dept_conf = "Moderate issue", "Public Health", "Issue Report", 0.5, 0.5
+    rows, cols = keywords.keyword_hit_matrix(list(distinct))
+    
+    # Severity: any high keyword wins, then any low keyword, else moderate
+    high = np.zeros(count, dtype=bool)
+    high[rows[keywords.HIGH_SEVERITY_MASK[cols]]] = True
+    low = np.zeros(count, dtype=bool)
+    low[rows[keywords.LOW_SEVERITY_MASK[cols]]] = True
+    severity = np.where(high, 2, np.where(low, 0, 1))
+    severity_conf = np.where(high, 0.8, np.where(low, 0.7, 0.6))
+    
+    # Department: most keyword hits, first listed department wins ties
+    dept_hits = np.zeros((count, len(keywords.DEPARTMENT_NAMES)), dtype=np.int64)
+    np.add.at(dept_hits, rows, keywords.DEPARTMENT_MATRIX[cols])
+    best = dept_hits.argmax(axis=1)
+    max_matches = dept_hits[np.arange(count), best]
+    department = np.where(max_matches > 0, best, DEFAULT_DEPARTMENT)
+    dept_conf = np.where(max_matches > 0, np.minimum(0.9, 0.5 + (max_matches * 0.1)), 0.5)
     
-    # Map to standard format
+    # Title: best-ranked issue keyword, else the department title
+    issue_rank = np.full(count, keywords.NO_RANK)
+    np.minimum.at(issue_rank, rows, keywords.ISSUE_RANK_VECTOR[cols])
+    title = np.where(issue_rank < keywords.NO_RANK, issue_rank, len(keywords.ISSUE_TITLES_BY_RANK) + department)
+    
+    results = list(zip(
+        BATCH_SEVERITIES[severity].tolist(), BATCH_DEPARTMENTS[department].tolist(),
+        BATCH_TITLES[title].tolist(), severity_conf.tolist(), dept_conf.tolist()
+    ))
+    return [results[position] for position in positions]
+
+def build_response(severity, department, title, severity_conf, dept_conf):
+    """Map a classification to the standard response format"""
     mapped_severity = severity_mapping.get(severity, "MEDIUM")
     mapped_department = department_mapping.get(department, "Other")
     
@@ -226,6 +161,46 @@ async def classify_issue(request: ClassificationRequest):
     
     return response
 
+@app.post("/classify")
+async def classify_issue(request: ClassificationRequest):
+    if not request.text and not request.image_url and not request.audio_url:
+        raise HTTPException(status_code=400, detail="At least one of text, image_url, or audio_url must be provided")
+    
+    # For lightweight version, only process text
+    if request.text:
+        return build_response(*classify_text_lightweight(request.text))
+    # Fallback for image/audio
+    return build_response("Moderate issue", "Public Health", "Issue Report", 0.5, 0.5)
+
+@app.post("/classify/batch")
+async def classify_batch(request: BatchClassificationRequest):
+    """Classify many reports, streaming one NDJSON line per item"""
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    return StreamingResponse(stream_batch(request.items), media_type="application/x-ndjson")
+
+async def stream_batch(items: List[BatchItem]):
+    # Text items of each chunk are scored in one vectorized call; lines go out per chunk
+    for start in range(0, len(items), BATCH_CHUNK_SIZE):
+        chunk = items[start:start + BATCH_CHUNK_SIZE]
+        texts = [item.text for item in chunk if item.text]
+        try:
+            results = iter(classify_texts_lightweight(texts))
+        except Exception as e:
+            print(f"Batch scoring error, scoring chunk one by one: {e}")
+            results = iter([classify_text_lightweight(text) for text in texts])
+        
+        lines = []
+        for item in chunk:
+            if item.text:
+                line = {"id": item.id, **build_response(*next(results))}
+            elif item.image_url or item.audio_url:
+                line = {"id": item.id, **build_response("Moderate issue", "Public Health", "Issue Report", 0.5, 0.5)}
+            else:
+                line = {"id": item.id, "error": "At least one of text, image_url, or audio_url must be provided", "status": 400}
+            lines.append(json.dumps(line) + "\n")
+        yield "".join(lines)
+
 @app.post("/classify-audio")
 async def classify_audio_file(file: UploadFile = File(...)):
     """Lightweight audio classification - returns default values"""
@@ -0,0 +1,68 @@
+"""
+In-memory audio decoding for Whisper.
+
+Audio arrives as bytes (a download or an upload) and used to be written to a
+NamedTemporaryFile only to be read back by librosa, leaking the file whenever
+decoding failed. decode_audio works on the buffer directly: libsndfile reads
+WAV/FLAC/OGG/MP3 from memory, anything else (m4a, webm, ...) is piped through
+ffmpeg's stdin/stdout. Whisper only looks at the first 30 seconds, so the
+duration is capped before decoding and no more frames than that are read.
+The result is a mono float32 array at 16 kHz, ready for WhisperProcessor.
+"""
+import io
+import subprocess
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+TARGET_SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(ValueError):
+    pass
+
+
+def _decode_with_soundfile(data, max_seconds):
+    buffer = io.BytesIO(data)
+    info = sf.info(buffer)
+    buffer.seek(0)
+    max_frames = int(max_seconds * info.samplerate)
+    audio, sample_rate = sf.read(buffer, frames=min(info.frames, max_frames), dtype='float32', always_2d=False)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    return audio, sample_rate
+
+
+def _decode_with_ffmpeg(data, max_seconds):
+    command = [
+        'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+        '-i', 'pipe:0', '-t', str(max_seconds),
+        '-f', 'f32le', '-ac', '1', '-ar', str(TARGET_SAMPLE_RATE), 'pipe:1'
+    ]
+    try:
+        process = subprocess.run(command, input=data, capture_output=True, timeout=60)
+    except FileNotFoundError as e:
+        raise AudioDecodeError("Unsupported audio format and ffmpeg is not installed") from e
+    if process.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg could not decode audio: {process.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(process.stdout, dtype=np.float32), TARGET_SAMPLE_RATE
+
+
+def decode_audio(data: bytes, max_seconds=30.0):
+    """Decode audio bytes to mono float32 at 16 kHz, keeping at most max_seconds"""
+    if not data:
+        raise AudioDecodeError("Empty audio")
+
+    try:
+        audio, sample_rate = _decode_with_soundfile(data, max_seconds)
+    except (sf.LibsndfileError, RuntimeError, TypeError):
+        audio, sample_rate = _decode_with_ffmpeg(data, max_seconds)
+
+    if audio.size == 0:
+        raise AudioDecodeError("Audio contains no samples")
+
+    if sample_rate != TARGET_SAMPLE_RATE:
+        audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=TARGET_SAMPLE_RATE)
+
+    return np.ascontiguousarray(audio, dtype=np.float32)
@@ -0,0 +1,113 @@
+"""
+Dynamic micro-batching for model inference.
+
+A MicroBatcher owns one background thread per model. Callers submit single
+inputs and get a concurrent.futures.Future back; the thread collects pending
+inputs until either max_batch_size is reached or max_wait_ms has passed since
+the first one arrived, groups them into buckets (e.g. by token length so
+short texts are not padded up to long ones), runs one batched call per bucket
+and resolves each caller's future with its own result.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    def __init__(self, name, batch_fn, max_batch_size=8, max_wait_ms=10, bucket_fn=None):
+        """
+        batch_fn takes a list of inputs and returns a list of results in the
+        same order. bucket_fn maps an input to a hashable bucket key; inputs
+        with different keys never share a batch.
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.bucket_fn = bucket_fn
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self._batches = 0
+        self._items = 0
+        self._size_histogram = Counter()
+
+    def submit(self, item):
+        """Queue one input for the next batch and return its Future"""
+        self._ensure_started()
+        future = Future()
+        bucket = self.bucket_fn(item) if self.bucket_fn else None
+        self._queue.put((bucket, item, future))
+        return future
+
+    def stats(self):
+        """Batch sizes actually achieved since startup"""
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._size_histogram.items())),
+                "pending": self._queue.qsize(),
+            }
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        """Block for the first input, then gather more until the window closes"""
+        pending = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+
+            buckets = {}
+            for bucket, item, future in pending:
+                buckets.setdefault(bucket, []).append((item, future))
+
+            for entries in buckets.values():
+                self._run_batch(entries)
+
+    def _run_batch(self, entries):
+        items = [item for item, _ in entries]
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self.name} batch returned {len(results)} results for {len(items)} inputs"
+                )
+        except Exception as e:
+            print(f"Batch inference error ({self.name}): {e}")
+            for _, future in entries:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(entries, results):
+            future.set_result(result)
+
+        with self._lock:
+            self._batches += 1
+            self._items += len(items)
+            self._size_histogram[len(items)] += 1
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled keyword engine vs the per-keyword loops it replaced
+
+Checks that titles, corrections and lightweight classifications are identical
+to what each service produced before (app.py, classifier.py and app_light.py
+each had their own title and correction rules), then times both on a synthetic
+corpus of report descriptions. The batch lightweight scorer in app_light.py is
+compared against its scalar version.
+"""
+import contextlib
+import io
+import random
+import time
+
+import keywords
+
+SAMPLE_TEXTS = [
+    "There is a big pothole on main road causing traffic jam",
+    "Overflowing garbage near park causing bad smell",
+    "Streetlight not working in residential area at night",
+    "Water pipe burst flooding the street",
+    "lots of mosquitoes near garbage dump",
+    "dust is everywhere on the roads",
+    "No water supply since two days, tap water contaminated",
+    "Urgent: broken electric pole with hanging wire near school",
+    "minor crack on the footpath near the bus stop",
+    "rats and flies in the public toilet, needs cleaning",
+    "noise pollution from construction at night",
+    "need someone to fix the drain",
+    "Accident prone zebra crossing without signal",
+    "Hospital waste dumped beside the lake",
+    "tree fell on the road blocking vehicles",
+]
+# Texts where the services' title rules differ (action words, no keywords at all)
+PINNED_TEXTS = ["need help here please", "please fix this soon", "causing trouble everywhere", "help", ""]
+FILLER = "the a near our area since last week please help very bad residents".split()
+
+DEPARTMENTS = list(keywords.DEPARTMENT_TITLES)
+
+
+# --- Legacy implementations (copied from the services before the shared module) ---
+
+def legacy_title(text, department=None, max_words=4, action_titles=True, first_words_fallback=True):
+    text_lower = text.lower()
+    sorted_keywords = sorted(keywords.ISSUE_TITLES.items(), key=lambda x: len(x[0]), reverse=True)
+    for keyword, title in sorted_keywords:
+        if keyword in text_lower:
+            return title
+    # classifier.py and app_light.py had no action-word titles
+    for pattern, title in keywords.ACTION_TITLES.items():
+        if action_titles and pattern in text_lower:
+            return title
+    if department in keywords.DEPARTMENT_TITLES:
+        return keywords.DEPARTMENT_TITLES[department]
+    words = text.split()
+    if len(words) >= 2:
+        key_words = []
+        for word in words[:4]:
+            if len(word) > 2 and word.lower() not in ['the', 'and', 'are', 'is', 'on', 'in', 'at', 'to', 'of']:
+                key_words.append(word.title())
+            if len(key_words) >= 2:
+                break
+        if key_words:
+            return ' '.join(key_words) + ' Issue'
+    # app_light.py had no first-words fallback
+    if words and first_words_fallback:
+        title = ' '.join(words[:max_words]).title()
+        if len(title) > 25:
+            title = title[:22] + '...'
+        return title
+    return 'Civic Issue Report'
+
+
+def legacy_corrections(text, department, sanitation_only=False):
+    text_lower = text.lower()
+    (_, sanitation_keywords, _), (_, water_keywords, _), (_, roads_keywords, _) = keywords.DEPARTMENT_CORRECTIONS
+    for keyword in sanitation_keywords:
+        if keyword in text_lower:
+            if department in ['Environment', 'Public Health']:
+                print(f"Correcting department: '{keyword}' found -> Sanitation")
+                return 'Sanitation and Waste Management'
+    # classifier.py only had the sanitation rule
+    if sanitation_only:
+        return department
+    for keyword in water_keywords:
+        if keyword in text_lower:
+            if department != 'Water Supply and Drainage':
+                print(f"Correcting department: '{keyword}' found -> Water")
+                return 'Water Supply and Drainage'
+    for keyword in roads_keywords:
+        if keyword in text_lower:
+            if department != 'Roads and Transport':
+                print(f"Correcting department: '{keyword}' found -> Roads")
+                return 'Roads and Transport'
+    return department
+
+
+def legacy_lightweight(text):
+    text_lower = text.lower()
+    severity, severity_conf = "Moderate issue", 0.6
+    for keyword in keywords.HIGH_SEVERITY_KEYWORDS:
+        if keyword in text_lower:
+            severity, severity_conf = "Severe issue", 0.8
+            break
+    if severity == "Moderate issue":
+        for keyword in keywords.LOW_SEVERITY_KEYWORDS:
+            if keyword in text_lower:
+                severity, severity_conf = "Minor issue", 0.7
+                break
+    department, dept_conf, max_matches = "Public Health", 0.5, 0
+    for dept, dept_keywords in keywords.DEPARTMENT_KEYWORDS.items():
+        matches = sum(1 for keyword in dept_keywords if keyword in text_lower)
+        if matches > max_matches:
+            max_matches = matches
+            department = dept
+            dept_conf = min(0.9, 0.5 + (matches * 0.1))
+    return (severity, department, legacy_title(text, department, action_titles=False, first_words_fallback=False),
+            severity_conf, dept_conf)
+
+
+# --- Compiled engine, as the services now call it ---
+
+def compiled_full(text, department):
+    matches = keywords.find_keywords(text)
+    corrected = keywords.apply_department_corrections(text, department, matches)
+    title = keywords.generate_keyword_title(text, corrected, matches=matches)
+    return corrected, title
+
+
+def compiled_classifier(text, department):
+    matches = keywords.find_keywords(text)
+    corrected = keywords.apply_department_corrections(text, department, matches, targets=('Sanitation and Waste Management',))
+    return corrected, keywords.generate_keyword_title(text, corrected, matches=matches, action_titles=False)
+
+
+def compiled_lightweight(text):
+    matches = keywords.find_keywords(text)
+    severity, severity_conf = keywords.keyword_severity(matches)
+    department, dept_conf = keywords.keyword_department(matches)
+    title = keywords.generate_keyword_title(text, department, matches=matches,
+                                            action_titles=False, first_words_fallback=False)
+    return severity, department, title, severity_conf, dept_conf
+
+
+def legacy_full(text, department):
+    corrected = legacy_corrections(text, department)
+    return corrected, legacy_title(text, corrected)
+
+
+def legacy_classifier(text, department):
+    corrected = legacy_corrections(text, department, sanitation_only=True)
+    return corrected, legacy_title(text, corrected, action_titles=False)
+
+
+def make_corpus(size, seed=42):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = rng.choice(SAMPLE_TEXTS).split() + rng.sample(FILLER, rng.randint(0, 6))
+        rng.shuffle(words)
+        corpus.append((" ".join(words), rng.choice(DEPARTMENTS)))
+    return corpus
+
+
+def timed(fn, corpus, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in corpus:
+            fn(*item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(size=20000, rounds=3):
+    print(f"Keyword engine benchmark ({size} texts, best of {rounds})\n")
+    corpus = make_corpus(size)
+    texts = [(text,) for text, _ in corpus]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app_light import classify_text_lightweight, classify_texts_lightweight
+
+        mismatches = sum(legacy_full(*item) != compiled_full(*item) for item in corpus)
+        mismatches += sum(legacy_classifier(*item) != compiled_classifier(*item) for item in corpus)
+        mismatches += sum(legacy_lightweight(*item) != compiled_lightweight(*item) for item in texts)
+        # app_light.py itself, including texts whose only title cue is an action word
+        mismatches += sum(legacy_lightweight(*item) != classify_text_lightweight(*item)
+                          for item in texts + [(text,) for text in PINNED_TEXTS])
+        # Unique suffixes so the batch scorer cannot skip repeated descriptions
+        batch = [f"{text} #{i}" for i, (text,) in enumerate(texts)]
+        mismatches += classify_texts_lightweight(batch) != [classify_text_lightweight(text) for text in batch]
+
+        results = [
+            ("corrections + title", timed(legacy_full, corpus, rounds), timed(compiled_full, corpus, rounds)),
+            ("lightweight classify", timed(legacy_lightweight, texts, rounds), timed(compiled_lightweight, texts, rounds)),
+            ("lightweight batch", timed(classify_text_lightweight, [(text,) for text in batch], rounds),
+             timed(classify_texts_lightweight, [(batch,)], rounds)),
+        ]
+
+    print(f"{'path':<22}{'before/s':>12}{'after/s':>12}{'speedup':>10}")
+    for name, legacy, compiled in results:
+        print(f"{name:<22}{size / legacy:>12,.0f}{size / compiled:>12,.0f}{legacy / compiled:>9.1f}x")
+
+    print(f"\n{'✅' if not mismatches else '❌'} {mismatches} mismatches against legacy behaviour")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark the worker's report write path against a local mongod
+
+Compares, at the same job concurrency:
+  legacy   update_one followed by find_one (two round trips per report)
+  single   find_one_and_update with the webhook projection (one round trip)
+  bulk     ReportWriter grouping concurrent updates into unordered bulk_write
+
+Usage: python bench_mongo.py [reports] [concurrency]
+Uses MONGO_BENCH_URI (default mongodb://localhost:27017/ml_worker_bench) and
+drops its collection afterwards.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import pymongo
+from pymongo.write_concern import WriteConcern
+
+from report_writer import ReportWriter, REPORT_PROJECTION
+
+MONGO_BENCH_URI = os.getenv('MONGO_BENCH_URI', 'mongodb://localhost:27017/ml_worker_bench')
+COLLECTION = 'bench_reports'
+
+
+def make_update(i):
+    return {
+        'mlClassified': True,
+        'mlSeverity': 'HIGH',
+        'mlDepartment': 'Roads',
+        'mlConfidence': {'severity': 0.9, 'department': 0.8},
+        'mlTitle': f'Pothole Issue {i}',
+        'mlConflicts': None,
+        'department': 'Roads',
+        'severity': 'HIGH',
+        'title': f'Pothole Issue {i}'
+    }
+
+
+async def legacy_update(collection, report_id, update_data):
+    await asyncio.to_thread(collection.update_one, {'_id': report_id}, {'$set': update_data})
+    return await asyncio.to_thread(collection.find_one, {'_id': report_id})
+
+
+async def single_update(collection, report_id, update_data):
+    return await asyncio.to_thread(
+        collection.find_one_and_update, {'_id': report_id}, {'$set': update_data},
+        projection=REPORT_PROJECTION, return_document=pymongo.ReturnDocument.AFTER
+    )
+
+
+async def run_mode(name, update_fn, ids, concurrency):
+    latencies = []
+    queue = list(enumerate(ids))
+
+    async def job_runner():
+        while queue:
+            i, report_id = queue.pop()
+            started = time.perf_counter()
+            await update_fn(report_id, make_update(i))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(job_runner() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{name:<8}{len(ids) / elapsed:>12,.0f}{statistics.median(latencies) * 1000:>12.2f}"
+          f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:>12.2f}")
+
+
+async def main(reports=5000, concurrency=16):
+    client = pymongo.MongoClient(MONGO_BENCH_URI, maxPoolSize=max(concurrency, 20), serverSelectionTimeoutMS=3000)
+    try:
+        client.admin.command('ping')
+    except pymongo.errors.PyMongoError as e:
+        print(f"❌ No mongod at {MONGO_BENCH_URI}: {e}")
+        return
+
+    collection = client.get_database().get_collection(COLLECTION, write_concern=WriteConcern(w=1))
+    collection.drop()
+    ids = collection.insert_many([
+        {'title': 'Processing...', 'description': f'Big pothole on main road near stop {i}', 'status': 'open'}
+        for i in range(reports)
+    ]).inserted_ids
+
+    print(f"Mongo write path benchmark ({reports} reports, {concurrency} concurrent jobs)\n")
+    print(f"{'mode':<8}{'reports/s':>12}{'p50 ms':>12}{'p99 ms':>12}")
+
+    writer = ReportWriter(collection)
+    await run_mode("legacy", lambda report_id, update: legacy_update(collection, report_id, update), ids, concurrency)
+    await run_mode("single", lambda report_id, update: single_update(collection, report_id, update), ids, concurrency)
+    await run_mode("bulk", lambda report_id, update: writer.update(report_id, update), ids, concurrency)
+    print(f"\nBulk writer stats: {writer.stats()}")
+
+    collection.drop()
+    client.close()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*args))
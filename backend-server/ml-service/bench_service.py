@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the ML service and worker, using tiny stand-in models
+
+Runs app.py, app_light.py and worker.py in-process. The models are replaced by
+the tiny random ones in stub_models.py, and media is served from memory. The
+worker's Redis, MongoDB and webhook are in-memory fakes too, so the run needs
+no network, GPU or model downloads. The numbers measure the service's own hot
+paths (batching, executor, cache, media handling, HTTP and JSON), not model
+accuracy.
+
+Scenarios:
+  classify        POST /classify on app.py with the --mix of text/image/audio reports
+  classify-audio  POST /classify-audio on app.py with WAV uploads
+  light           POST /classify on app_light.py (text only)
+  worker          worker.py in embedded mode draining --requests queued jobs
+
+Each scenario reports throughput, p50/p95/p99 latency, the status codes seen
+and RSS. Peak RSS is for the whole process so far, so run one scenario at a time
+to attribute it. --output saves the results as JSON, and --compare flags
+throughput or p95 regressions against a saved run (exit code 1).
+
+Usage: python bench_service.py [--scenarios classify,worker] [--requests 400]
+       [--concurrency 16] [--mix text=0.7,image=0.2,audio=0.1] [--unique 0.5]
+       [--output results.json] [--compare baseline.json --tolerance 0.2]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import signal
+import sys
+import time
+import types
+
+# Pin the service to the benchmark's configuration before it is imported
+os.environ.setdefault('ML_OFFLINE', '1')
+os.environ['WORKER_MODE'] = 'embedded'
+os.environ['WORKER_METRICS_PORT'] = '0'
+
+import httpx
+import numpy as np
+import soundfile as sf
+import torch
+import transformers
+from PIL import Image
+
+from bench_keywords import SAMPLE_TEXTS, FILLER
+from media_fetcher import MediaFetcher
+from stub_models import register_stub_models
+
+SCENARIOS = ('classify', 'classify-audio', 'light', 'worker')
+MEDIA_HOST = 'http://media.bench'
+
+
+def parse_mix(spec):
+    """'text=0.7,image=0.2,audio=0.1' -> normalised weights"""
+    weights = {}
+    for part in spec.split(','):
+        name, value = part.split('=', 1)
+        if name.strip() not in ('text', 'image', 'audio'):
+            raise ValueError(f"Unknown payload kind '{name}'")
+        weights[name.strip()] = float(value)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def make_texts(count, unique, rng):
+    """Report descriptions of which about `unique` are distinct, the rest repeats"""
+    distinct = max(1, int(count * unique))
+    pool = []
+    for i in range(distinct):
+        words = rng.choice(SAMPLE_TEXTS).split() + rng.sample(FILLER, rng.randint(0, 6))
+        rng.shuffle(words)
+        pool.append(f"{' '.join(words)} {i}")
+    return [pool[i] if i < distinct else rng.choice(pool) for i in range(count)]
+
+
+def make_payloads(count, mix, unique, seed):
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=count)
+    payloads = []
+    for i, (kind, text) in enumerate(zip(kinds, make_texts(count, unique, rng))):
+        payload = {'text': text}
+        if kind == 'image':
+            payload['image_url'] = f"{MEDIA_HOST}/image/{i}.png"
+        elif kind == 'audio':
+            payload['audio_url'] = f"{MEDIA_HOST}/audio/{i}.wav"
+        payloads.append(payload)
+    return payloads
+
+
+def scenario_seed(args, scenario):
+    """Distinct texts per scenario, so one scenario never hits another's cached results"""
+    return args.seed * len(SCENARIOS) + SCENARIOS.index(scenario)
+
+
+def make_png(seed):
+    pixels = (np.random.default_rng(seed).random((64, 64, 3)) * 255).astype('uint8')
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def make_wav(seconds, seed):
+    samples = (np.random.default_rng(seed).standard_normal(int(16000 * seconds)) * 0.1).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, 16000, format='WAV')
+    return buffer.getvalue()
+
+
+def media_transport(png, wav, latency_s):
+    """Serves every image and audio URL from memory after a fixed latency"""
+    async def serve(request):
+        await asyncio.sleep(latency_s)
+        if request.url.path.startswith('/image/'):
+            return httpx.Response(200, content=png, headers={'content-type': 'image/png'})
+        return httpx.Response(200, content=wav, headers={'content-type': 'audio/wav'})
+    return httpx.MockTransport(serve)
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return None
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def summarize(latencies, elapsed, statuses, rss_before):
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'latency_ms': {
+            'p50': round(float(np.percentile(latencies_ms, 50)), 2),
+            'p95': round(float(np.percentile(latencies_ms, 95)), 2),
+            'p99': round(float(np.percentile(latencies_ms, 99)), 2),
+            'mean': round(float(latencies_ms.mean()), 2),
+            'max': round(float(latencies_ms.max()), 2),
+        },
+        'statuses': dict(sorted(statuses.items())),
+        'rss_mb': {
+            'before': round(rss_before, 1) if rss_before else None,
+            'after': round(rss_mb(), 1) if rss_mb() else None,
+            'peak': round(peak_rss_mb(), 1),
+        },
+    }
+
+
+async def drive(app, requests, concurrency):
+    """Closed-loop load: `concurrency` clients send `requests` back to back"""
+    latencies = []
+    statuses = {}
+    pending = list(reversed(requests))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench', timeout=None) as client:
+        async def run_client():
+            while pending:
+                method, path, kwargs = pending.pop()
+                started = time.perf_counter()
+                response = await client.request(method, path, **kwargs)
+                await response.aread()
+                latencies.append(time.perf_counter() - started)
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client() for _ in range(concurrency)))
+        return latencies, time.perf_counter() - started, statuses
+
+
+def load_app(args, png, wav):
+    """app.py with stub models and in-memory media"""
+    import app
+    register_stub_models(app.model_registry, [app.severity_labels, app.department_labels], seed=args.seed,
+                         quantize=app.ML_QUANTIZE)
+    app.media_fetcher = MediaFetcher(transport=media_transport(png, wav, args.media_latency_ms / 1000))
+    return app
+
+
+async def run_classify(args, mix, png, wav):
+    app = load_app(args, png, wav)
+    requests = [('POST', '/classify', {'json': payload})
+                for payload in make_payloads(args.requests, mix, args.unique, scenario_seed(args, 'classify'))]
+    rss_before = rss_mb()
+    latencies, elapsed, statuses = await drive(app.app, requests, args.concurrency)
+    result = summarize(latencies, elapsed, statuses, rss_before)
+    result['service'] = {
+        'batching': {'text': app.text_batcher.stats(), 'image': app.image_batcher.stats()},
+        'cache': app.result_cache.stats(),
+        'executor': app.executor.stats(),
+    }
+    return result
+
+
+async def run_classify_audio(args, mix, png, wav):
+    app = load_app(args, png, wav)
+    requests = [('POST', '/classify-audio', {'files': {'file': ('report.wav', wav, 'audio/wav')}})
+                for _ in range(args.requests)]
+    rss_before = rss_mb()
+    latencies, elapsed, statuses = await drive(app.app, requests, args.concurrency)
+    return summarize(latencies, elapsed, statuses, rss_before)
+
+
+async def run_light(args, mix, png, wav):
+    import app_light
+    requests = [('POST', '/classify', {'json': {'text': payload['text']}})
+                for payload in make_payloads(args.requests, {'text': 1.0}, args.unique, scenario_seed(args, 'light'))]
+    rss_before = rss_mb()
+    latencies, elapsed, statuses = await drive(app_light.app, requests, args.concurrency)
+    return summarize(latencies, elapsed, statuses, rss_before)
+
+
+class FakeRedis:
+    """The list commands worker.py uses, in memory"""
+
+    def __init__(self):
+        self.lists = {}
+
+    def _list(self, name):
+        return self.lists.setdefault(name, [])
+
+    async def blpop(self, name, timeout=0):
+        if self._list(name):
+            return name.encode(), self._list(name).pop(0)
+        await asyncio.sleep(min(timeout, 0.05))
+        return None
+
+    async def lpop(self, name, count=None):
+        items = self._list(name)
+        if count is None:
+            return items.pop(0) if items else None
+        popped = [items.pop(0) for _ in range(min(count, len(items)))]
+        return popped or None
+
+    async def rpush(self, name, *values):
+        self._list(name).extend(v.encode() if isinstance(v, str) else v for v in values)
+
+    async def lpush(self, name, *values):
+        self._list(name)[:0] = [v.encode() if isinstance(v, str) else v for v in values]
+
+    async def llen(self, name):
+        return len(self._list(name))
+
+    async def aclose(self):
+        pass
+
+
+class FakeReports:
+    """Records when each report was written, for end-to-end latency"""
+
+    def __init__(self):
+        self.written = {}
+
+    def _record(self, report_oid, update):
+        self.written.setdefault(str(report_oid), time.perf_counter())
+        return {'_id': report_oid, **update}
+
+    def find_one_and_update(self, query, update, projection=None, return_document=None):
+        return self._record(query['_id'], update['$set'])
+
+    def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            self._record(operation._filter['_id'], operation._doc['$set'])
+        return types.SimpleNamespace(matched_count=len(operations))
+
+
+async def run_worker(args, mix, png, wav):
+    app = load_app(args, png, wav)
+    import worker
+    from bson import ObjectId
+
+    reports = FakeReports()
+    worker.redis_client = FakeRedis()
+    worker.db = types.SimpleNamespace(reports=reports)
+
+    webhook = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+    real_client = worker.httpx.AsyncClient
+    worker.httpx = types.SimpleNamespace(**{
+        **vars(httpx),
+        'AsyncClient': lambda **kwargs: real_client(transport=webhook, **kwargs)
+    })
+
+    # The whole backlog is queued up front; latency is enqueue to report written
+    enqueued = {}
+    for payload in make_payloads(args.requests, mix, args.unique, scenario_seed(args, 'worker')):
+        report_id = str(ObjectId())
+        job = {'reportId': report_id, 'description': payload['text'], 'imageUrl': payload.get('image_url'),
+               'title': 'Processing...', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())}
+        await worker.redis_client.rpush(worker.QUEUE_NAME, json.dumps(job))
+        enqueued[report_id] = time.perf_counter()
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    loop_task = asyncio.create_task(worker.worker_loop())
+    while len(reports.written) < len(enqueued) and not loop_task.done():
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    os.kill(os.getpid(), signal.SIGTERM)
+    await loop_task
+
+    latencies = [reports.written[report_id] - enqueued[report_id] for report_id in reports.written]
+    result = summarize(latencies, elapsed, {'written': len(reports.written)}, rss_before)
+    result['service'] = {'batching': {'text': app.text_batcher.stats(), 'image': app.image_batcher.stats()}}
+    return result
+
+
+RUNNERS = {
+    'classify': run_classify,
+    'classify-audio': run_classify_audio,
+    'light': run_light,
+    'worker': run_worker,
+}
+
+
+async def run_scenarios(scenarios, args, mix, png, wav):
+    """Run scenarios one after another on one event loop, as the service would"""
+    # (app.py's batchers and executor lanes bind to the loop they first run on)
+    results = {}
+    for name in scenarios:
+        # Service logs would swamp the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = await RUNNERS[name](args, mix, png, wav)
+        results[name] = result
+        latency = result['latency_ms']
+        print(f"{name:<16}{result['throughput_rps']:>10,.1f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}"
+              f"{latency['p99']:>10.1f}{result['rss_mb']['peak']:>10.0f}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Scenarios whose throughput fell or p95 rose by more than `tolerance`"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        throughput = result['throughput_rps'] / before['throughput_rps'] - 1
+        p95 = result['latency_ms']['p95'] / before['latency_ms']['p95'] - 1
+        flag = throughput < -tolerance or p95 > tolerance
+        print(f"{name:<16}{throughput:>+11.1%}{p95:>+11.1%}  {'❌ regression' if flag else '✅'}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Offline ML service load test with stub models")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--mix', default='text=0.7,image=0.2,audio=0.1')
+    parser.add_argument('--unique', type=float, default=0.5, help='Fraction of distinct report texts')
+    parser.add_argument('--media-latency-ms', type=float, default=20)
+    parser.add_argument('--audio-seconds', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in RUNNERS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+    mix = parse_mix(args.mix)
+    png = make_png(args.seed)
+    wav = make_wav(args.audio_seconds, args.seed)
+    torch.manual_seed(args.seed)
+
+    print(f"Offline service benchmark ({args.requests} requests, concurrency {args.concurrency}, mix {args.mix})\n")
+    print(f"{'scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    results = asyncio.run(run_scenarios(scenarios, args, mix, png, wav))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'torch': torch.__version__,
+            'transformers': transformers.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'quantize': os.getenv('ML_QUANTIZE', ''),
+            'args': vars(args),
+        },
+        'scenarios': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst {args.compare} (tolerance {args.tolerance:.0%}):")
+        print(f"{'scenario':<16}{'req/s':>11}{'p95':>11}")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,95 @@
+"""
+Confidence-gated cascade from the keyword classifier to BART-MNLI.
+
+The keyword tier (the classifier app_light.py uses: one regex pass over the
+text) costs microseconds, where a BART-MNLI pass costs tens to hundreds of
+milliseconds. With the cascade on, every text is scored by keywords first, and
+department and severity are gated separately:
+
+- department: the keyword department is kept when its confidence reaches the
+  threshold and no other department ties it. Otherwise the text goes to BART
+  for the full answer, as before.
+- severity: the keyword severity is kept when the text names one (no severity
+  word means the "moderate" answer is a fallback, not evidence), the cues do
+  not contradict each other, and its confidence reaches the threshold.
+  Otherwise BART scores only the three severity hypotheses instead of all ten,
+  which gives the same severity as a full pass from three of its ten
+  entailment pairs.
+
+So "pothole on main road" takes its department from keywords and only needs
+the cheap severity pass, while "urgent: broken electric pole with hanging
+wire" never reaches BART at all.
+
+The keyword confidences are fixed steps, so the threshold picks which keyword
+evidence is trusted:
+
+  department  0.5 no keyword, 0.6 one keyword hit, +0.1 per extra hit (max 0.9)
+  severity    0.6 no cue (moderate), 0.7 a low-severity word, 0.8 a high-severity word
+
+At 0.6 one department keyword is enough, at 0.7 (the default) two, at 0.8
+three; severity needs a severity word up to 0.7 and a high-severity word at
+0.8. `python eval_cascade.py` shows the share of texts each threshold keeps
+from BART and its accuracy on labeled samples.
+"""
+from keywords import find_keywords, keyword_severity, keyword_department, keyword_conflicts, has_severity_cue
+
+
+class KeywordCascade:
+    def __init__(self, threshold=0.7):
+        self.threshold = threshold
+        self.resolved = 0
+        self.severity_passes = 0
+        self.escalated = 0
+        # Why a text needed BART: the department ones send it to the full pass,
+        # the severity ones to the severity-only pass
+        self.reasons = {
+            'department_confidence': 0, 'department_conflict': 0,
+            'no_severity_cue': 0, 'severity_confidence': 0, 'severity_conflict': 0,
+        }
+
+    def route(self, text, matches=None):
+        """(severity, department, severity_conf, dept_conf, matches) from keywords, or None to escalate.
+
+        severity and severity_conf are None when only the severity needs BART.
+        """
+        if matches is None:
+            matches = find_keywords(text)
+        department, dept_conf = keyword_department(matches)
+        conflicts = keyword_conflicts(matches)
+
+        if 'department' in conflicts:
+            return self._escalate('department_conflict')
+        if dept_conf < self.threshold:
+            return self._escalate('department_confidence')
+
+        severity, severity_conf = keyword_severity(matches)
+        if 'severity' in conflicts:
+            reason = 'severity_conflict'
+        elif not has_severity_cue(matches):
+            reason = 'no_severity_cue'
+        elif severity_conf < self.threshold:
+            reason = 'severity_confidence'
+        else:
+            self.resolved += 1
+            return severity, department, severity_conf, dept_conf, matches
+
+        self.severity_passes += 1
+        self.reasons[reason] += 1
+        return None, department, None, dept_conf, matches
+
+    def _escalate(self, reason):
+        self.escalated += 1
+        self.reasons[reason] += 1
+        return None
+
+    def stats(self):
+        total = self.resolved + self.severity_passes + self.escalated
+        return {
+            "threshold": self.threshold,
+            "keywords": self.resolved,
+            "bart_severity": self.severity_passes,
+            "bart_mnli": self.escalated,
+            "keyword_fraction": round(self.resolved / total, 3) if total else None,
+            "keyword_department_fraction": round((self.resolved + self.severity_passes) / total, 3) if total else None,
+            "escalations": dict(self.reasons),
+        }
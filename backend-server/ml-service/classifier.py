@@ -1,32 +1,45 @@
 import os
-# Set cache directories to F drive before importing ML libraries
-os.environ['HF_HOME'] = 'F:/ml-cache/huggingface'
-os.environ['HUGGINGFACE_HUB_CACHE'] = 'F:/ml-cache/huggingface'
-os.environ['TORCH_HOME'] = 'F:/ml-cache/torch'
-os.environ['TRANSFORMERS_CACHE'] = 'F:/ml-cache/transformers'
+import model_store
+# Point model caches at the persistent store before importing ML libraries
+model_store.configure_environment()
 
-import torch
 from transformers import (
+    AutoTokenizer,
     CLIPProcessor, CLIPModel,
-    pipeline, BartTokenizer, BartForConditionalGeneration,
+    pipeline,
     WhisperProcessor, WhisperForConditionalGeneration
 )
 from PIL import Image
+from text_scorer import FusedZeroShotScorer
+from image_scorer import ClipLabelScorer
+from keywords import find_keywords, generate_keyword_title, apply_department_corrections
+import inference_backend
+
+# Same per-model backend selection as app.py (eager, onnx or torchscript)
+BACKENDS = inference_backend.parse_backends(os.getenv('ML_BACKENDS', ''))
 
 # ------------------------------
 # Load models
 # ------------------------------
 print("Loading models...")
-clip_model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-
-bart_classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-
-bart_tokenizer = BartTokenizer.from_pretrained("facebook/bart-large-cnn")
-bart_summarizer = BartForConditionalGeneration.from_pretrained("facebook/bart-large-cnn")
-
-whisper_processor = WhisperProcessor.from_pretrained("openai/whisper-base")
-whisper_model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-base")
+clip_path = model_store.resolve(model_store.MODELS['clip'])
+if BACKENDS['clip'] == 'eager':
+    clip_model = CLIPModel.from_pretrained(clip_path, local_files_only=True)
+else:
+    clip_model = inference_backend.load_exported('clip', BACKENDS['clip'])
+clip_processor = CLIPProcessor.from_pretrained(clip_path, local_files_only=True)
+
+bart_path = model_store.resolve(model_store.MODELS['bart_mnli'])
+if BACKENDS['bart_mnli'] == 'eager':
+    bart_classifier = pipeline("zero-shot-classification", model=bart_path)
+    bart_model, bart_tokenizer = bart_classifier.model, bart_classifier.tokenizer
+else:
+    bart_model = inference_backend.load_exported('bart_mnli', BACKENDS['bart_mnli'])
+    bart_tokenizer = AutoTokenizer.from_pretrained(bart_path, local_files_only=True)
+
+whisper_path = model_store.resolve(model_store.MODELS['whisper'])
+whisper_processor = WhisperProcessor.from_pretrained(whisper_path, local_files_only=True)
+whisper_model = WhisperForConditionalGeneration.from_pretrained(whisper_path, local_files_only=True)
 print("Models loaded successfully!")
 
 # ------------------------------
@@ -43,121 +56,15 @@ department_labels = [
     "Public Safety"
 ]
 
-# ------------------------------
-# Summarization for Short Title
-# ------------------------------
-def generate_short_title(text, department=None, max_words=4):
-    """Generate short title using keyword extraction"""
-    try:
-        text_lower = text.lower()
-        
-        # Enhanced issue keywords
-        issue_keywords = {
-            'pothole': 'Pothole Issue',
-            'garbage': 'Garbage Problem', 
-            'trash': 'Waste Issue',
-            'waste': 'Waste Problem',
-            'streetlight': 'Streetlight Issue',
-            'street light': 'Streetlight Issue',
-            'light': 'Lighting Issue',
-            'water': 'Water Issue',
-            'leak': 'Water Leak',
-            'pipe': 'Pipe Issue',
-            'drain': 'Drainage Issue',
-            'road': 'Road Problem',
-            'broken': 'Broken Item',
-            'damaged': 'Damage Report',
-            'not working': 'Malfunction',
-            'overflow': 'Overflow Issue',
-            'blocked': 'Blockage Issue',
-            'dust': 'Dust Problem',
-            'dirty': 'Cleanliness Issue',
-            'noise': 'Noise Problem',
-            'smell': 'Odor Issue',
-            'crack': 'Crack Issue',
-            'hole': 'Hole Problem',
-            'mosquito': 'Mosquito Problem',
-            'mosquitoes': 'Mosquito Problem',
-            'pest': 'Pest Issue',
-            'insects': 'Insect Problem',
-            'flies': 'Fly Problem',
-            'rats': 'Rodent Problem',
-            'rodents': 'Rodent Problem',
-            'toilet': 'Toilet Issue',
-            'bathroom': 'Bathroom Problem',
-            'sewage': 'Sewage Issue',
-            'sewer': 'Sewer Problem'
-        }
-        
-        # Find matching keywords (prioritize longer matches)
-        sorted_keywords = sorted(issue_keywords.items(), key=lambda x: len(x[0]), reverse=True)
-        for keyword, title in sorted_keywords:
-            if keyword in text_lower:
-                return title
-        
-        # Department-based fallback
-        if department:
-            dept_titles = {
-                'Sanitation and Waste Management': 'Sanitation Issue',
-                'Roads and Transport': 'Road Issue', 
-                'Electricity and Streetlights': 'Electrical Issue',
-                'Water Supply and Drainage': 'Water Issue',
-                'Public Health': 'Health Issue',
-                'Environment': 'Environmental Issue',
-                'Public Safety': 'Safety Issue'
-            }
-            if department in dept_titles:
-                return dept_titles[department]
-        
-        # Extract key words and create short title
-        words = text.split()
-        if len(words) >= 2:
-            key_words = []
-            for word in words[:4]:
-                if len(word) > 2 and word.lower() not in ['the', 'and', 'are', 'is', 'on', 'in', 'at', 'to', 'of']:
-                    key_words.append(word.title())
-                if len(key_words) >= 2:
-                    break
-            
-            if key_words:
-                return ' '.join(key_words) + ' Issue'
-        
-        # Final fallback: Use first few words but limit length
-        if words:
-            title = ' '.join(words[:max_words]).title()
-            if len(title) > 25:
-                title = title[:22] + '...'
-            return title
-        
-        return 'Civic Issue Report'
-        
-    except Exception as e:
-        print(f"Title generation error: {e}")
-        return 'Civic Issue Report'
+# Severity and department hypotheses scored together in one BART pass
+text_scorer = FusedZeroShotScorer(bart_model, bart_tokenizer, [severity_labels, department_labels])
+
+# Label prompt embeddings are computed once, images are encoded once per call
+image_scorer = ClipLabelScorer(clip_model, clip_processor, [severity_labels, department_labels])
 
 # ------------------------------
 # Classify Text
 # ------------------------------
-def apply_department_corrections(text: str, department: str):
-    """Apply post-processing rules to correct common misclassifications"""
-    text_lower = text.lower()
-    
-    # Sanitation issues often misclassified as Environment
-    sanitation_keywords = [
-        'mosquito', 'mosquitoes', 'pest', 'insects', 'flies', 'rats', 'rodents',
-        'garbage', 'trash', 'waste', 'dump', 'litter', 'dirty', 'smell', 'odor',
-        'toilet', 'bathroom', 'sewage', 'sewer', 'cleaning', 'hygiene'
-    ]
-    
-    # Check for sanitation keywords
-    for keyword in sanitation_keywords:
-        if keyword in text_lower:
-            if department in ['Environment', 'Public Health']:
-                print(f"Correcting department: '{keyword}' found -> Sanitation")
-                return 'Sanitation and Waste Management'
-    
-    return department
-
 def classify_text(text):
     try:
         # Clean the input text - remove temporary titles
@@ -165,18 +72,21 @@ def classify_text(text):
         if not clean_text:
             return None, None, None
             
-        severity_result = bart_classifier(clean_text, severity_labels, multi_label=False)
-        department_result = bart_classifier(clean_text, department_labels, multi_label=False)
+        severity_result, department_result = text_scorer.score(clean_text)
         
         severity = severity_result["labels"][0]
         department = department_result["labels"][0]
         
-        # Apply post-processing corrections
-        corrected_department = apply_department_corrections(clean_text, department)
+        matches = find_keywords(clean_text)
+        
+        # Apply post-processing corrections (this script only ever had the sanitation rule)
+        corrected_department = apply_department_corrections(
+            clean_text, department, matches, targets=('Sanitation and Waste Management',)
+        )
         if corrected_department != department:
             department = corrected_department
         
-        title = generate_short_title(clean_text, department)
+        title = generate_keyword_title(clean_text, department, matches=matches, action_titles=False)
         
         return severity, department, title
     except Exception as e:
@@ -190,17 +100,7 @@ def classify_image(image_path):
     try:
         image = Image.open(image_path).convert("RGB")
 
-        # Severity
-        inputs = clip_processor(text=severity_labels, images=image, return_tensors="pt", padding=True)
-        outputs = clip_model(**inputs)
-        probs = outputs.logits_per_image.softmax(dim=1)[0]
-        severity = severity_labels[torch.argmax(probs)]
-
-        # Department
-        inputs_dept = clip_processor(text=department_labels, images=image, return_tensors="pt", padding=True)
-        outputs_dept = clip_model(**inputs_dept)
-        probs_dept = outputs_dept.logits_per_image.softmax(dim=1)[0]
-        department = department_labels[torch.argmax(probs_dept)]
+        (severity, _), (department, _) = image_scorer.score_batch([image])[0]
 
         # Title fallback
         title = f"Issue in {department}"
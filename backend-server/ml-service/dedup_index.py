@@ -0,0 +1,106 @@
+"""
+Near-duplicate detection for recently classified reports.
+
+Many reports describe the same pothole or overflowing bin in slightly
+different words or from a different angle. Each classified report is stored
+as a CLIP embedding (text, image or both, concatenated) in a fixed-size numpy
+ring buffer. A new report whose embedding is close enough to a recent one
+reuses that report's classification instead of running BART again.
+
+Search is exact: one matrix-vector product over at most `capacity` rows,
+which stays well under a millisecond for a few thousand 1024-d entries.
+Entries older than `window_seconds` are ignored, and new entries always
+overwrite the oldest slot, so memory is fixed at capacity x dim floats.
+"""
+import time
+
+import numpy as np
+
+TEXT = 1
+IMAGE = 2
+
+
+def combine_embeddings(text_embedding=None, image_embedding=None):
+    """Concatenate the available modality embeddings into one search vector.
+
+    Missing modalities are zero blocks and the vector is scaled so that the
+    dot product of two vectors of the same kind is the mean per-modality
+    cosine similarity. Returns (vector, kind).
+    """
+    parts = [text_embedding, image_embedding]
+    dim = next(len(p) for p in parts if p is not None)
+    kind = (TEXT if text_embedding is not None else 0) | (IMAGE if image_embedding is not None else 0)
+    count = bin(kind).count("1")
+
+    vector = np.zeros(2 * dim, dtype=np.float32)
+    for offset, part in ((0, text_embedding), (dim, image_embedding)):
+        if part is not None:
+            vector[offset:offset + dim] = np.asarray(part, dtype=np.float32)
+    return vector / np.sqrt(count), kind
+
+
+class NearDuplicateIndex:
+    def __init__(self, capacity=5000, window_seconds=6 * 3600, threshold=0.95):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+
+        self._vectors = None  # allocated on first add, once the dimension is known
+        self._timestamps = np.full(capacity, -np.inf)
+        self._kinds = np.zeros(capacity, dtype=np.int8)
+        self._report_ids = [None] * capacity
+        self._results = [None] * capacity
+
+        self.searches = 0
+        self.matches = 0
+        self.added = 0
+
+    def _live_mask(self, kind):
+        cutoff = time.time() - self.window_seconds
+        return (self._timestamps >= cutoff) & (self._kinds == kind)
+
+    def search(self, vector, kind):
+        """Return (report_id, result, similarity) for the closest recent match, or None"""
+        self.searches += 1
+        if self._vectors is None:
+            return None
+
+        candidates = np.flatnonzero(self._live_mask(kind))
+        if candidates.size == 0:
+            return None
+
+        similarities = self._vectors[candidates] @ vector
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < self.threshold:
+            return None
+
+        slot = candidates[best]
+        self.matches += 1
+        return self._report_ids[slot], self._results[slot], similarity
+
+    def add(self, vector, kind, report_id, result):
+        """Store a classified report in an empty or the oldest slot"""
+        if self._vectors is None:
+            self._vectors = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+
+        slot = int(np.argmin(self._timestamps))
+
+        self._vectors[slot] = vector
+        self._timestamps[slot] = time.time()
+        self._kinds[slot] = kind
+        self._report_ids[slot] = report_id
+        self._results[slot] = result
+        self.added += 1
+
+    def stats(self):
+        cutoff = time.time() - self.window_seconds
+        return {
+            "entries": int(np.count_nonzero(self._timestamps >= cutoff)),
+            "capacity": self.capacity,
+            "window_seconds": self.window_seconds,
+            "threshold": self.threshold,
+            "searches": self.searches,
+            "matches": self.matches,
+            "added": self.added,
+        }
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Choose CASCADE_THRESHOLD: keyword/BART cascade coverage, accuracy and latency
+
+Runs every text in labeled_samples.json through app.py's keyword tier at each
+threshold, and through app.py's BART path (the same post-processing the
+service applies). For each threshold it reports:
+
+- the share of texts whose department the keywords settle, and the share
+  they answer entirely (the rest of the first group only needs BART's
+  severity-only pass);
+- the accuracy of the keyword departments and severities, and how often BART
+  agrees with the keyword departments;
+- accuracy of the whole cascade against BART alone;
+- expected mean text latency, from the measured per-text cost of the keyword
+  pass, BART's severity-only pass and the full BART pass.
+
+--stub uses stub_models.py's tiny random BART. That checks the plumbing
+offline, but its BART accuracy is meaningless.
+
+Usage: python eval_cascade.py [--thresholds 0.5,0.6,0.7,0.8] [--samples labeled_samples.json]
+       [--output cascade.json] [--stub]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import app
+from cascade import KeywordCascade
+from eval_common import LABEL_SETS
+
+
+def timed(fn, texts, rounds=3):
+    """Results for each text and the best mean seconds per text over `rounds`"""
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        results = [fn(text) for text in texts]
+        best = min(best, (time.perf_counter() - started) / len(texts))
+    return results, best
+
+
+def correct(result, sample):
+    """(severity right, department right) in the service's LOW/MEDIUM/HIGH and short department names"""
+    severity, department = result[0], result[1]
+    return (app.severity_mapping.get(severity) == sample['severity'],
+            app.department_mapping.get(department) == sample['department'])
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Keyword -> BART cascade coverage and accuracy per threshold")
+    parser.add_argument('--thresholds', default='0.5,0.6,0.7,0.8')
+    parser.add_argument('--samples', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'labeled_samples.json'))
+    parser.add_argument('--output')
+    parser.add_argument('--stub', action='store_true', help='Tiny random BART (offline check)')
+    args = parser.parse_args(argv)
+
+    with open(args.samples) as f:
+        samples = json.load(f)
+    texts = [sample['text'] for sample in samples]
+    if args.stub:
+        from stub_models import register_stub_models
+        register_stub_models(app.model_registry, LABEL_SETS)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        bart_results = [app.classify_text(text) for text in texts]
+        if bart_results[0][0] is None or not app.model_registry.available('bart_mnli'):
+            raise SystemExit("BART is not available; prefetch it or use --stub")
+        # Model cost without the micro-batcher's wait, like a busy server's steady state
+        scorer = app.model_registry.get('bart_mnli')
+        _, bart_seconds = timed(scorer.score, texts)
+        _, severity_seconds = timed(lambda text: scorer.score_batch([text], label_sets=[0]), texts)
+    bart_correct = np.array([correct(result, sample) for result, sample in zip(bart_results, samples)])
+
+    report = {
+        'samples': len(samples),
+        'bart': {
+            'accuracy': {'severity': round(float(bart_correct[:, 0].mean()), 4),
+                         'department': round(float(bart_correct[:, 1].mean()), 4)},
+            'ms_per_text': round(bart_seconds * 1000, 3),
+            'severity_only_ms_per_text': round(severity_seconds * 1000, 3),
+        },
+        'thresholds': {},
+    }
+    print(f"{len(samples)} labeled texts; BART alone: severity {bart_correct[:, 0].mean():.1%}, "
+          f"department {bart_correct[:, 1].mean():.1%}, {bart_seconds * 1000:.2f} ms/text "
+          f"({severity_seconds * 1000:.2f} severity only){' [stub model]' if args.stub else ''}\n")
+    print(f"{'threshold':>9}{'kw dept':>9}{'kw both':>9}{'dept acc':>10}{'sev acc':>9}{'agree':>8}"
+          f"{'cascade sev':>13}{'cascade dept':>14}{'ms/text':>10}{'speedup':>9}")
+
+    def percent(values):
+        return f"{np.mean(values):.1%}" if len(values) else '-'
+
+    for threshold in (float(value) for value in args.thresholds.split(',')):
+        with contextlib.redirect_stdout(io.StringIO()):
+            app.cascade = KeywordCascade(threshold)
+            _, keyword_seconds = timed(app.classify_text_keywords, texts)
+            # A fresh cascade so the escalation counts cover one pass
+            app.cascade = KeywordCascade(threshold)
+            keyword_results = [app.classify_text_keywords(text) for text in texts]
+        department_kept = np.array([result is not None for result in keyword_results])
+        resolved = np.array([result is not None and result[0] is not None for result in keyword_results])
+        # A severity-only pass gives the same severity as the full BART pass
+        cascade_results = [
+            b if k is None else (k if k[0] is not None else (b[0],) + tuple(k[1:]))
+            for k, b in zip(keyword_results, bart_results)
+        ]
+        cascade_correct = np.array([correct(result, sample) for result, sample in zip(cascade_results, samples)])
+        department_accuracy = cascade_correct[department_kept, 1]
+        severity_accuracy = cascade_correct[resolved, 0]
+        agreement = [k[1] == b[1] for k, b in zip(keyword_results, bart_results) if k is not None]
+
+        # Every text pays for the keyword pass, then for one of the two BART passes unless resolved
+        severity_only = department_kept.mean() - resolved.mean()
+        ms_per_text = (keyword_seconds + severity_only * severity_seconds + (1 - department_kept.mean()) * bart_seconds) * 1000
+        result = report['thresholds'][str(threshold)] = {
+            'keyword_department_fraction': round(float(department_kept.mean()), 4),
+            'keyword_fraction': round(float(resolved.mean()), 4),
+            'keyword_accuracy': {
+                'severity': round(float(severity_accuracy.mean()), 4) if len(severity_accuracy) else None,
+                'department': round(float(department_accuracy.mean()), 4) if len(department_accuracy) else None,
+            },
+            'department_agreement_with_bart': round(float(np.mean(agreement)), 4) if agreement else None,
+            'cascade_accuracy': {'severity': round(float(cascade_correct[:, 0].mean()), 4),
+                                 'department': round(float(cascade_correct[:, 1].mean()), 4)},
+            'escalations': app.cascade.stats()['escalations'],
+            'ms_per_text': round(ms_per_text, 3),
+            'speedup': round(bart_seconds * 1000 / ms_per_text, 2),
+        }
+        print(f"{threshold:>9.2f}{department_kept.mean():>9.1%}{resolved.mean():>9.1%}"
+              f"{percent(department_accuracy):>10}{percent(severity_accuracy):>9}{percent(agreement):>8}"
+              f"{cascade_correct[:, 0].mean():>13.1%}{cascade_correct[:, 1].mean():>14.1%}"
+              f"{ms_per_text:>10.2f}{result['speedup']:>8.1f}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
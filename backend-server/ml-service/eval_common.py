@@ -0,0 +1,24 @@
+"""
+Helpers shared by the offline evaluation scripts (eval_quantization.py,
+export_models.py, eval_cascade.py), so their measurements stay comparable.
+"""
+import time
+
+import app
+
+# The label sets every scorer is built with, in app.py's order
+LABEL_SETS = [app.severity_labels, app.department_labels]
+
+
+def timed_batches(fn, inputs, batch_size, rounds=3):
+    """fn's output for each batch of inputs and the best seconds per batch over `rounds`"""
+    batches = [inputs[i:i + batch_size] for i in range(0, len(inputs), batch_size)]
+    fn(batches[0])  # warm-up
+    best = float('inf')
+    for _ in range(rounds):
+        outputs = []
+        started = time.perf_counter()
+        for batch in batches:
+            outputs.append(fn(batch))
+        best = min(best, (time.perf_counter() - started) / len(batches))
+    return outputs, best
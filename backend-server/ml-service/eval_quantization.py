@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Accuracy and speed of int8 dynamic quantization against fp32
+
+Loads each model twice through app.py's loaders, once as-is and once with
+quantize=True (what ML_QUANTIZE does), and runs both on the same inputs:
+
+  bart_mnli  labeled_samples.json: severity/department accuracy of each
+             precision, how often they agree, confidence drift
+  whisper    --audio files: transcript similarity between the two
+  clip       --images files: label agreement and confidence drift
+
+Each model also gets its resident tensor size and per-batch latency at both
+precisions. Accuracy is the zero-shot model's own answer, before app.py's
+keyword corrections. --stub runs the same comparison on stub_models.py's tiny
+random models with synthetic audio and images. That checks the plumbing
+offline, but its accuracy numbers mean nothing.
+
+Usage: python eval_quantization.py [--models bart_mnli,whisper,clip] [--audio a.wav ...]
+       [--images a.jpg ...] [--output quantization.json] [--max-accuracy-drop 0.02] [--stub]
+"""
+import argparse
+import contextlib
+import difflib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+import app
+import quantization
+from audio_decoder import decode_audio, TARGET_SAMPLE_RATE
+from eval_common import LABEL_SETS, timed_batches
+from model_registry import ModelRegistry
+
+
+
+def load_pair(name, stub):
+    """(fp32, int8) copies of a model and their resident MB"""
+    if stub:
+        import stub_models
+        builders = {
+            'bart_mnli': lambda quantize: stub_models.build_text_scorer(LABEL_SETS, quantize=quantize),
+            'clip': lambda quantize: stub_models.build_image_scorer(LABEL_SETS, quantize=quantize),
+            'whisper': lambda quantize: stub_models.build_whisper(quantize=quantize),
+        }
+    else:
+        builders = {'bart_mnli': app.load_text_scorer, 'clip': app.load_image_scorer, 'whisper': app.load_whisper}
+
+    registry = ModelRegistry()
+    registry.register('fp32', lambda: builders[name](False))
+    registry.register('int8', lambda: builders[name](True))
+    with contextlib.redirect_stdout(io.StringIO()):
+        models = registry.get('fp32'), registry.get('int8')
+    sizes = {precision: info['resident_mb'] for precision, info in registry.report()['models'].items()}
+    return models, sizes
+
+
+def timed_outputs(fn, inputs, batch_size, rounds):
+    """Outputs for all inputs, flattened, and the best seconds per batch over `rounds`"""
+    batches, seconds = timed_batches(fn, inputs, batch_size, rounds)
+    return [output for batch in batches for output in batch], seconds
+
+
+def speed(latency, sizes):
+    return {
+        'batch_ms': {'fp32': round(latency['fp32'] * 1000, 2), 'int8': round(latency['int8'] * 1000, 2)},
+        'speedup': round(latency['fp32'] / latency['int8'], 2),
+        'resident_mb': sizes,
+    }
+
+
+def eval_text(scorers, sizes, samples, args):
+    outputs = {}
+    latency = {}
+    for precision, scorer in zip(('fp32', 'int8'), scorers):
+        outputs[precision], latency[precision] = timed_outputs(
+            scorer.score_batch, [s['text'] for s in samples], args.batch_size, args.rounds
+        )
+
+    def top(result):
+        return [(r['labels'][0], r['scores'][0]) for r in result]
+
+    accuracy = {}
+    for precision, results in outputs.items():
+        severity = [app.severity_mapping[top(r)[0][0]] == s['severity'] for r, s in zip(results, samples)]
+        department = [app.department_mapping[top(r)[1][0]] == s['department'] for r, s in zip(results, samples)]
+        accuracy[precision] = {'severity': round(float(np.mean(severity)), 4), 'department': round(float(np.mean(department)), 4)}
+
+    pairs = [(top(a), top(b)) for a, b in zip(outputs['fp32'], outputs['int8'])]
+    drift = [abs(x[1] - y[1]) for a, b in pairs for x, y in zip(a, b)]
+    return {
+        'samples': len(samples),
+        'accuracy': accuracy,
+        'accuracy_delta': {task: round(accuracy['int8'][task] - accuracy['fp32'][task], 4) for task in ('severity', 'department')},
+        'agreement': round(float(np.mean([[x[0] for x in a] == [y[0] for y in b] for a, b in pairs])), 4),
+        'confidence_drift': {'mean': round(float(np.mean(drift)), 4), 'max': round(float(np.max(drift)), 4)},
+        **speed(latency, sizes),
+    }
+
+
+def eval_images(scorers, sizes, images, args):
+    outputs = {}
+    latency = {}
+    for precision, scorer in zip(('fp32', 'int8'), scorers):
+        outputs[precision], latency[precision] = timed_outputs(scorer.score_batch, images, args.batch_size, args.rounds)
+    pairs = list(zip(outputs['fp32'], outputs['int8']))
+    drift = [abs(x[1] - y[1]) for a, b in pairs for x, y in zip(a, b)]
+    return {
+        'samples': len(images),
+        'agreement': round(float(np.mean([[x[0] for x in a] == [y[0] for y in b] for a, b in pairs])), 4),
+        'confidence_drift': {'mean': round(float(np.mean(drift)), 4), 'max': round(float(np.max(drift)), 4)},
+        **speed(latency, sizes),
+    }
+
+
+def eval_audio(models, sizes, clips, args):
+    def transcriber(processor, model):
+        def transcribe(batch):
+            features = processor(batch, return_tensors="pt", sampling_rate=TARGET_SAMPLE_RATE)["input_features"]
+            with torch.inference_mode():
+                return processor.batch_decode(model.generate(features), skip_special_tokens=True)
+        return transcribe
+
+    outputs = {}
+    latency = {}
+    for precision, (processor, model) in zip(('fp32', 'int8'), models):
+        outputs[precision], latency[precision] = timed_outputs(transcriber(processor, model), clips, 1, args.rounds)
+    similarity = [difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(outputs['fp32'], outputs['int8'])]
+    return {
+        'samples': len(clips),
+        'identical': round(float(np.mean([a == b for a, b in zip(outputs['fp32'], outputs['int8'])])), 4),
+        'similarity': {'mean': round(float(np.mean(similarity)), 4), 'min': round(float(np.min(similarity)), 4)},
+        'transcripts': [{'fp32': a, 'int8': b} for a, b in zip(outputs['fp32'], outputs['int8'])],
+        **speed(latency, sizes),
+    }
+
+
+def synthetic_inputs(count, seed=0):
+    """Noise images and clips for --stub runs"""
+    rng = np.random.default_rng(seed)
+    images = [Image.fromarray((rng.random((64, 64, 3)) * 255).astype('uint8')) for _ in range(count)]
+    clips = [(rng.standard_normal(TARGET_SAMPLE_RATE * 3) * 0.1).astype(np.float32) for _ in range(count)]
+    return images, clips
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Compare int8 dynamically quantized models against fp32")
+    parser.add_argument('--models', help='Comma-separated models (default: bart_mnli, plus whisper/clip when given inputs)')
+    parser.add_argument('--samples', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'labeled_samples.json'))
+    parser.add_argument('--audio', nargs='*', default=[])
+    parser.add_argument('--images', nargs='*', default=[])
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--threads', type=int, help='torch intra-op threads (default: torch default)')
+    parser.add_argument('--output')
+    parser.add_argument('--max-accuracy-drop', type=float, help='Exit 1 if int8 loses more accuracy than this')
+    parser.add_argument('--stub', action='store_true', help='Tiny random models and synthetic inputs (offline check)')
+    args = parser.parse_args(argv)
+
+    if not quantization.supported():
+        print("This torch build has no quantized engine")
+        return 1
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    with open(args.samples) as f:
+        samples = json.load(f)
+    if args.stub:
+        images, clips = synthetic_inputs(4)
+    else:
+        images = [Image.open(path).convert('RGB') for path in args.images]
+        clips = []
+        for path in args.audio:
+            with open(path, 'rb') as f:
+                clips.append(decode_audio(f.read(), app.AUDIO_MAX_SECONDS))
+
+    if args.models:
+        models = quantization.parse_models(args.models)
+    else:
+        models = {'bart_mnli'} | ({'whisper'} if clips else set()) | ({'clip'} if images else set())
+    for name, inputs in (('whisper', clips), ('clip', images)):
+        if name in models and not inputs:
+            parser.error(f"{name} needs {'--audio' if name == 'whisper' else '--images'} files (or --stub)")
+
+    results = {}
+    print(f"int8 dynamic quantization vs fp32 ({torch.backends.quantized.engine}, {torch.get_num_threads()} threads)"
+          f"{' [stub models]' if args.stub else ''}\n")
+    if 'bart_mnli' in models:
+        pair, sizes = load_pair('bart_mnli', args.stub)
+        result = results['bart_mnli'] = eval_text(pair, sizes, samples, args)
+        print(f"bart_mnli  {result['samples']} labeled samples")
+        for precision in ('fp32', 'int8'):
+            acc = result['accuracy'][precision]
+            print(f"  {precision}  severity {acc['severity']:.1%}  department {acc['department']:.1%}  "
+                  f"{result['batch_ms'][precision]:.1f} ms/batch  {sizes[precision]:.1f} MB")
+        print(f"  delta severity {result['accuracy_delta']['severity']:+.1%}  department {result['accuracy_delta']['department']:+.1%}  "
+              f"agreement {result['agreement']:.1%}  mean conf drift {result['confidence_drift']['mean']:.3f}  "
+              f"speedup {result['speedup']:.2f}x\n")
+    if 'whisper' in models:
+        pair, sizes = load_pair('whisper', args.stub)
+        result = results['whisper'] = eval_audio(pair, sizes, clips, args)
+        print(f"whisper    {result['samples']} clips: identical {result['identical']:.1%}  "
+              f"similarity {result['similarity']['mean']:.3f}  {result['batch_ms']['fp32']:.0f} -> "
+              f"{result['batch_ms']['int8']:.0f} ms/clip  {sizes['fp32']:.1f} -> {sizes['int8']:.1f} MB  "
+              f"speedup {result['speedup']:.2f}x\n")
+    if 'clip' in models:
+        pair, sizes = load_pair('clip', args.stub)
+        result = results['clip'] = eval_images(pair, sizes, images, args)
+        print(f"clip       {result['samples']} images: agreement {result['agreement']:.1%}  "
+              f"mean conf drift {result['confidence_drift']['mean']:.3f}  {sizes['fp32']:.1f} -> {sizes['int8']:.1f} MB  "
+              f"speedup {result['speedup']:.2f}x\n")
+
+    if args.output:
+        report = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'torch': torch.__version__,
+            'engine': torch.backends.quantized.engine,
+            'threads': torch.get_num_threads(),
+            'stub': args.stub,
+            'models': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    if args.max_accuracy_drop is not None and 'bart_mnli' in results:
+        worst = min(results['bart_mnli']['accuracy_delta'].values())
+        if -worst > args.max_accuracy_drop:
+            print(f"❌ int8 accuracy drop {-worst:.1%} exceeds {args.max_accuracy_drop:.1%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
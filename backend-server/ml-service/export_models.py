@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Export models for the ONNX Runtime and TorchScript backends and check parity
+
+  export  loads each model eagerly through app.py's loaders, writes its ONNX
+          and/or TorchScript graphs to ML_MODEL_STORE/exported/ and then runs
+          the parity check on them
+  check   parity check of existing exports against eager
+
+The parity check scores the same inputs through the service's scorers with
+each backend: labeled_samples.json texts for bart_mnli, and --images (or
+generated ones) plus the label prompts for CLIP. It reports the largest
+difference from eager in label probabilities / normalized embeddings, top-label
+agreement and per-batch latency, so the fastest backend that agrees can be set
+in ML_BACKENDS. It exits 1 when a backend differs by more than --tolerance.
+
+Usage: python export_models.py (export|check) [bart_mnli] [clip] [--backends onnx,torchscript]
+       [--images a.jpg ...] [--tolerance 1e-3] [--output parity.json] [--stub]
+
+--stub exports stub_models.py's tiny random models to a temporary directory,
+which checks the export path offline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+import app
+import inference_backend
+from eval_common import LABEL_SETS, timed_batches
+from image_scorer import ClipLabelScorer
+from text_scorer import FusedZeroShotScorer
+
+EXPORTABLE = [name for name, backends in inference_backend.SUPPORTED.items() if len(backends) > 1]
+
+
+def load_eager(name, stub):
+    if stub:
+        import stub_models
+        return stub_models.build_text_scorer(LABEL_SETS) if name == 'bart_mnli' else stub_models.build_image_scorer(LABEL_SETS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return app.load_text_scorer() if name == 'bart_mnli' else app.load_image_scorer()
+
+
+def load_backend(name, eager, backend, root):
+    """The scorer the service would build for `backend`, sharing eager's tokenizer/processor"""
+    model = inference_backend.load_exported(name, backend, root)
+    if name == 'bart_mnli':
+        return FusedZeroShotScorer(model, eager.tokenizer, LABEL_SETS)
+    return ClipLabelScorer(model, eager.processor, LABEL_SETS)
+
+
+def text_outputs(scorer, texts, batch_size):
+    """Probability of every label and the top labels, per text"""
+    batches, seconds = timed_batches(scorer.score_batch, texts, batch_size)
+    probs, tops = [], []
+    for results in batches:
+        for result in results:
+            probs.append([dict(zip(r['labels'], r['scores']))[label] for r, labels in zip(result, LABEL_SETS) for label in labels])
+            tops.append([r['labels'][0] for r in result])
+    return np.array(probs), tops, seconds
+
+
+def image_outputs(scorer, images, batch_size):
+    """Normalized image embeddings, label prompt embeddings and top labels"""
+    batches, seconds = timed_batches(scorer.encode_images, images, batch_size)
+    embeds = torch.cat(batches)
+    tops = [[label for label, _ in result] for result in scorer.score_embeddings(embeds)]
+    return embeds.numpy(), scorer.label_embeds.numpy(), tops, seconds
+
+
+def check(name, eager, backends, root, args, texts, images):
+    """Parity and latency of each backend against eager"""
+    if name == 'bart_mnli':
+        reference, reference_tops, eager_seconds = text_outputs(eager, texts, args.batch_size)
+    else:
+        reference, reference_labels, reference_tops, eager_seconds = image_outputs(eager, images, args.batch_size)
+
+    results = {'eager': {'batch_ms': round(eager_seconds * 1000, 2)}}
+    for backend in backends:
+        try:
+            scorer = load_backend(name, eager, backend, root)
+        except Exception as e:
+            results[backend] = {'error': str(e)}
+            continue
+        if name == 'bart_mnli':
+            outputs, tops, seconds = text_outputs(scorer, texts, args.batch_size)
+            max_diff = float(np.abs(outputs - reference).max())
+        else:
+            outputs, labels, tops, seconds = image_outputs(scorer, images, args.batch_size)
+            max_diff = float(max(np.abs(outputs - reference).max(), np.abs(labels - reference_labels).max()))
+        results[backend] = {
+            'max_abs_diff': max_diff,
+            'agreement': round(float(np.mean([a == b for a, b in zip(tops, reference_tops)])), 4),
+            'batch_ms': round(seconds * 1000, 2),
+            'speedup': round(eager_seconds / seconds, 2),
+            'ok': max_diff <= args.tolerance,
+        }
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Export models for ONNX Runtime / TorchScript and check parity")
+    parser.add_argument('command', choices=('export', 'check'))
+    parser.add_argument('models', nargs='*', help=f"Default: {' '.join(EXPORTABLE)}")
+    parser.add_argument('--backends', default='onnx,torchscript')
+    parser.add_argument('--samples', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'labeled_samples.json'))
+    parser.add_argument('--images', nargs='*', default=[])
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--tolerance', type=float, default=1e-3, help='Largest allowed difference from eager')
+    parser.add_argument('--output')
+    parser.add_argument('--stub', action='store_true', help='Tiny random models exported to a temporary directory')
+    args = parser.parse_args(argv)
+
+    models = args.models or EXPORTABLE
+    backends = [backend.strip() for backend in args.backends.split(',') if backend.strip()]
+    for name in models:
+        if name not in EXPORTABLE:
+            parser.error(f"{name} cannot be exported (choose from {', '.join(EXPORTABLE)})")
+    for backend in backends:
+        if backend not in inference_backend.BACKENDS or backend == 'eager':
+            parser.error(f"Unknown backend '{backend}' (choose from onnx, torchscript)")
+
+    if args.stub and args.command == 'check':
+        parser.error("--stub exports to a temporary directory, so it only works with export")
+
+    with open(args.samples) as f:
+        texts = [sample['text'] for sample in json.load(f)]
+    if args.images:
+        images = [Image.open(path).convert('RGB') for path in args.images]
+    else:
+        rng = np.random.default_rng(0)
+        images = [Image.fromarray((rng.random((240, 320, 3)) * 255).astype('uint8')) for _ in range(8)]
+
+    with contextlib.ExitStack() as stack:
+        root = stack.enter_context(tempfile.TemporaryDirectory()) if args.stub else None
+        report = {}
+        failed = False
+        for name in models:
+            eager = load_eager(name, args.stub)
+            if args.command == 'export':
+                for backend in backends:
+                    started = time.time()
+                    directory = inference_backend.export(name, eager, backend, root)
+                    print(f"Exported {name} for {backend} in {time.time() - started:.1f}s -> {directory}")
+
+            results = report[name] = check(name, eager, backends, root, args, texts, images)
+            print(f"\n{name} ({len(texts) if name == 'bart_mnli' else len(images)} inputs, batch {args.batch_size}):")
+            print(f"  {'backend':<12}{'max diff':>14}{'agree':>10}{'latency':>11}")
+            print(f"  {'eager':<12}{'':>14}{'':>11}{results['eager']['batch_ms']:>10.1f} ms/batch")
+            for backend in backends:
+                result = results[backend]
+                if 'error' in result:
+                    failed = True
+                    print(f"  {backend:<12}❌ {result['error']}")
+                    continue
+                failed = failed or not result['ok']
+                print(f"  {backend:<12}{result['max_abs_diff']:>14.2e}{result['agreement']:>10.1%} "
+                      f"{result['batch_ms']:>10.1f} ms/batch  {result['speedup']:.2f}x  {'✅' if result['ok'] else '❌ over tolerance'}")
+            fastest = min(results, key=lambda b: results[b].get('batch_ms', float('inf')) if results[b].get('ok', True) else float('inf'))
+            print(f"  fastest within tolerance: {fastest}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'torch': torch.__version__, 'tolerance': args.tolerance, 'stub': args.stub, 'models': report}, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
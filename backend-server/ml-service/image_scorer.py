@@ -0,0 +1,68 @@
+"""
+CLIP image scoring against precomputed label embeddings.
+
+The label prompts never change, so their text embeddings are computed once
+when the scorer is built and kept as a single normalized (labels x dim)
+tensor covering every label set. Scoring a batch of images then needs one
+pass through the vision tower and one matmul; the logits are split back into
+one softmax per label set, matching CLIPModel's logits_per_image.
+"""
+import torch
+
+
+def _as_features(output):
+    """get_*_features returns a tensor in transformers 4.x and a ModelOutput in 5.x"""
+    return output if torch.is_tensor(output) else output.pooler_output
+
+
+class ClipLabelScorer:
+    def __init__(self, model, processor, label_sets):
+        self.model = model
+        self.processor = processor
+        self.label_sets = [list(labels) for labels in label_sets]
+
+        all_labels = [label for labels in self.label_sets for label in labels]
+        with torch.inference_mode():
+            self.label_embeds = self.encode_texts(all_labels)
+            self.logit_scale = model.logit_scale.exp()
+
+    def encode_texts(self, texts):
+        """Normalized CLIP text embeddings, one row per text"""
+        inputs = self.processor(text=texts, return_tensors="pt", padding=True, truncation=True)
+        with torch.inference_mode():
+            embeds = _as_features(self.model.get_text_features(
+                input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]
+            ))
+        return embeds / embeds.norm(p=2, dim=-1, keepdim=True)
+
+    def encode_images(self, images):
+        """Normalized CLIP image embeddings, one row per image"""
+        inputs = self.processor(images=images, return_tensors="pt")
+        with torch.inference_mode():
+            embeds = _as_features(self.model.get_image_features(pixel_values=inputs["pixel_values"]))
+        return embeds / embeds.norm(p=2, dim=-1, keepdim=True)
+
+    def score_embeddings(self, image_embeds):
+        """Score normalized image embeddings against every label set.
+
+        Returns one list per image holding a (label, confidence) pair for
+        each label set, in the order the label sets were given.
+        """
+        with torch.inference_mode():
+            logits = self.logit_scale * image_embeds @ self.label_embeds.t()
+
+        results = [[] for _ in range(logits.shape[0])]
+        offset = 0
+        for labels in self.label_sets:
+            probs = logits[:, offset:offset + len(labels)].softmax(dim=1)
+            offset += len(labels)
+            confs, indices = probs.max(dim=1)
+            for i, (index, conf) in enumerate(zip(indices.tolist(), confs.tolist())):
+                results[i].append((labels[index], conf))
+        return results
+
+    def score_batch(self, images):
+        """Encode each image once and score it against every label set"""
+        if not images:
+            return []
+        return self.score_embeddings(self.encode_images(images))
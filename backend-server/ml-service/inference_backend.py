@@ -0,0 +1,248 @@
+"""
+Pluggable inference backends: PyTorch eager, ONNX Runtime or TorchScript.
+
+ML_BACKENDS picks a backend per model ('bart_mnli=onnx,clip=torchscript';
+anything not listed runs eager). Non-eager backends run graphs exported ahead
+of time by `python export_models.py export`, stored under
+ML_MODEL_STORE/exported/<model>/<backend>/:
+
+  bart_mnli  logits(input_ids, attention_mask)
+  clip       image_features(pixel_values), text_features(input_ids, attention_mask)
+
+The exported graphs are wrapped in small adapters with the few attributes
+FusedZeroShotScorer and ClipLabelScorer use from the transformers models
+(`model(...).logits`, `config.label2id`, `get_image_features`,
+`get_text_features`, `logit_scale`). Tokenizers, processors, batching and
+request code are the same for every backend. Whisper stays eager: its
+autoregressive generate() loop with a KV cache does not reduce to one
+exported graph.
+
+onnxruntime is only imported when a model uses the onnx backend; exporting
+to ONNX also needs the onnx package.
+"""
+import json
+import os
+import time
+import types
+import warnings
+
+import torch
+
+import model_store
+from image_scorer import _as_features
+
+BACKENDS = ('eager', 'onnx', 'torchscript')
+SUPPORTED = {'bart_mnli': BACKENDS, 'clip': BACKENDS, 'whisper': ('eager',)}
+
+# Exported graphs per model and their inputs, in call order
+GRAPHS = {
+    'bart_mnli': {'logits': ('input_ids', 'attention_mask')},
+    'clip': {'image_features': ('pixel_values',), 'text_features': ('input_ids', 'attention_mask')},
+}
+EXTENSIONS = {'onnx': '.onnx', 'torchscript': '.pt'}
+META_NAME = 'export.json'
+ONNX_OPSET = 17
+
+ONNX_THREADS = int(os.getenv('ML_ONNX_THREADS', '0'))
+
+
+def parse_backends(spec):
+    """'bart_mnli=onnx,clip=torchscript' -> backend for every model (default eager)"""
+    backends = {name: 'eager' for name in SUPPORTED}
+    for part in (spec or '').split(','):
+        if '=' not in part:
+            continue
+        name, backend = (value.strip() for value in part.split('=', 1))
+        if name not in SUPPORTED:
+            raise ValueError(f"ML_BACKENDS: unknown model '{name}' (choose from {', '.join(SUPPORTED)})")
+        if backend not in SUPPORTED[name]:
+            raise ValueError(f"ML_BACKENDS: {name} supports {', '.join(SUPPORTED[name])}, not '{backend}'")
+        backends[name] = backend
+    return backends
+
+
+def export_dir(name, backend, root=None):
+    root = root or os.path.join(model_store.MODEL_STORE, 'exported')
+    return os.path.join(root, model_store.MODELS[name].replace('/', '--'), backend)
+
+
+# --- Graph modules: the part of each model that gets exported ---
+
+class _BartLogits(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask, use_cache=False).logits
+
+
+class _ClipImageFeatures(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        return _as_features(self.model.get_image_features(pixel_values=pixel_values))
+
+
+class _ClipTextFeatures(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return _as_features(self.model.get_text_features(input_ids=input_ids, attention_mask=attention_mask))
+
+
+def _example_inputs(name, scorer):
+    """Small padded batches to trace with; lengths differ so padding is exercised"""
+    texts = ["pothole", "garbage has not been collected near the park entrance for a week"]
+    if name == 'bart_mnli':
+        encoded = scorer.tokenizer([[text, scorer.hypotheses[0]] for text in texts],
+                                   return_tensors="pt", padding=True, truncation="only_first")
+        return {'logits': (_BartLogits(scorer.model), encoded)}
+
+    from PIL import Image
+    images = [Image.new('RGB', (64, 48), color) for color in ('gray', 'white')]
+    pixels = scorer.processor(images=images, return_tensors="pt")
+    encoded = scorer.processor(text=texts, return_tensors="pt", padding=True, truncation=True)
+    return {
+        'image_features': (_ClipImageFeatures(scorer.model), pixels),
+        'text_features': (_ClipTextFeatures(scorer.model), encoded),
+    }
+
+
+def export(name, scorer, backend, root=None):
+    """Export an eager scorer's model for `backend`; returns the export directory"""
+    if backend not in SUPPORTED.get(name, ()) or backend == 'eager':
+        raise ValueError(f"{name} cannot be exported for {backend}")
+    directory = export_dir(name, backend, root)
+    os.makedirs(directory, exist_ok=True)
+
+    # Tracing warns about every shape-dependent Python branch in the transformers code;
+    # the parity check (export_models.py) is what tells whether the graph generalizes
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', torch.jit.TracerWarning)
+        for graph, (module, encoded) in _example_inputs(name, scorer).items():
+            input_names = GRAPHS[name][graph]
+            args = tuple(encoded[input_name] for input_name in input_names)
+            path = os.path.join(directory, graph + EXTENSIONS[backend])
+            module.eval()
+            if backend == 'onnx':
+                dynamic_axes = {
+                    input_name: {0: 'batch'} if input_name == 'pixel_values' else {0: 'batch', 1: 'sequence'}
+                    for input_name in input_names
+                }
+                dynamic_axes['output'] = {0: 'batch'}
+                # The TorchScript-based exporter handles the transformers models without onnxscript
+                torch.onnx.export(module, args, path, input_names=list(input_names), output_names=['output'],
+                                  dynamic_axes=dynamic_axes, opset_version=ONNX_OPSET, dynamo=False)
+            else:
+                with torch.inference_mode():
+                    traced = torch.jit.trace(module, args, check_trace=False)
+                torch.jit.save(traced, path)
+
+    meta = {
+        'model': name,
+        'repo_id': model_store.MODELS[name],
+        'backend': backend,
+        'graphs': {graph: list(inputs) for graph, inputs in GRAPHS[name].items()},
+        'torch': torch.__version__,
+        'exported_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    if name == 'bart_mnli':
+        meta['label2id'] = dict(scorer.model.config.label2id)
+    else:
+        meta['logit_scale'] = scorer.model.logit_scale.item()
+    if backend == 'onnx':
+        meta['opset'] = ONNX_OPSET
+    with open(os.path.join(directory, META_NAME), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return directory
+
+
+# --- Runtime ---
+
+class OnnxGraph:
+    def __init__(self, path, threads=0):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.path = path
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    def __call__(self, **inputs):
+        feeds = {name: tensor.numpy() for name, tensor in inputs.items()}
+        return torch.from_numpy(self.session.run(None, feeds)[0])
+
+    def tensor_bytes(self):
+        return os.path.getsize(self.path)
+
+
+class TorchScriptGraph:
+    def __init__(self, path, input_names):
+        self.module = torch.jit.load(path, map_location='cpu').eval()
+        self.input_names = input_names
+
+    def __call__(self, **inputs):
+        with torch.inference_mode():
+            return self.module(*(inputs[name] for name in self.input_names))
+
+    def tensor_bytes(self):
+        return sum(t.numel() * t.element_size() for t in list(self.module.parameters()) + list(self.module.buffers()))
+
+
+class ExportedSequenceClassifier:
+    """Stands in for the transformers BART classifier inside FusedZeroShotScorer"""
+
+    def __init__(self, logits, label2id):
+        self.logits = logits
+        self.config = types.SimpleNamespace(label2id=label2id)
+
+    def __call__(self, input_ids, attention_mask, **_):
+        return types.SimpleNamespace(logits=self.logits(input_ids=input_ids, attention_mask=attention_mask))
+
+    def tensor_bytes(self):
+        return self.logits.tensor_bytes()
+
+
+class ExportedClip:
+    """Stands in for the transformers CLIPModel inside ClipLabelScorer"""
+
+    def __init__(self, image_features, text_features, logit_scale):
+        self.image_features = image_features
+        self.text_features = text_features
+        self.logit_scale = torch.tensor(logit_scale)
+
+    def get_image_features(self, pixel_values):
+        return self.image_features(pixel_values=pixel_values)
+
+    def get_text_features(self, input_ids, attention_mask):
+        return self.text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+    def tensor_bytes(self):
+        return self.image_features.tensor_bytes() + self.text_features.tensor_bytes()
+
+
+def load_exported(name, backend, root=None):
+    """Adapter over an exported model, usable wherever the scorers take the transformers model"""
+    directory = export_dir(name, backend, root)
+    meta_path = os.path.join(directory, META_NAME)
+    if not os.path.exists(meta_path):
+        raise RuntimeError(f"No {backend} export of {name} in {directory}; "
+                           f"run 'python export_models.py export --backends {backend} {name}'")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta['repo_id'] != model_store.MODELS[name]:
+        raise RuntimeError(f"{directory} was exported from {meta['repo_id']}, not {model_store.MODELS[name]}; export it again")
+
+    graphs = {}
+    for graph, input_names in meta['graphs'].items():
+        path = os.path.join(directory, graph + EXTENSIONS[backend])
+        graphs[graph] = OnnxGraph(path, ONNX_THREADS) if backend == 'onnx' else TorchScriptGraph(path, input_names)
+
+    if name == 'bart_mnli':
+        return ExportedSequenceClassifier(graphs['logits'], meta['label2id'])
+    return ExportedClip(graphs['image_features'], graphs['text_features'], meta['logit_scale'])
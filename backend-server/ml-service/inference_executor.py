@@ -0,0 +1,113 @@
+"""
+Dedicated executors for blocking work in the ML service.
+
+Request handlers are async, but model inference and audio decoding are
+blocking calls. Running them on the event loop stalls every other request
+(including /health) behind the slowest one. InferenceExecutor moves them onto
+a model thread pool, with a concurrency limit per model. Media downloads do
+not need it: MediaFetcher streams them on the event loop.
+
+Calls beyond a model's limit wait in a bounded queue; once that queue is
+full, ExecutorOverloaded is raised straight away so the service can answer
+503 with Retry-After instead of letting latency grow without bound.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorOverloaded(Exception):
+    def __init__(self, pool, retry_after):
+        super().__init__(f"{pool} queue is full, retry later")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+def parse_limits(spec):
+    """Parse 'bart_mnli=8,clip=4' into a dict"""
+    limits = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            name, value = part.split('=', 1)
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+class _Lane:
+    """Admission control for one model"""
+
+    def __init__(self, limit, max_queue):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+        self._semaphore = None
+
+    def semaphore(self):
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def stats(self):
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_queue': self.max_queue,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
+
+
+class InferenceExecutor:
+    def __init__(self, model_limits=None, default_model_limit=1, max_queue=64, retry_after=1):
+        self.model_limits = dict(model_limits or {})
+        self.default_model_limit = default_model_limit
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+
+        model_workers = max(1, sum(self.model_limits.values()) or default_model_limit)
+        self.model_pool = ThreadPoolExecutor(max_workers=model_workers, thread_name_prefix='model')
+        self._model_lanes = {}
+
+    def _model_lane(self, name):
+        if name not in self._model_lanes:
+            limit = self.model_limits.get(name, self.default_model_limit)
+            self._model_lanes[name] = _Lane(limit, self.max_queue)
+        return self._model_lanes[name]
+
+    async def _run(self, lane, lane_name, pool, fn, *args):
+        if lane.waiting >= lane.max_queue:
+            lane.rejected += 1
+            raise ExecutorOverloaded(lane_name, self.retry_after)
+
+        lane.waiting += 1
+        try:
+            await lane.semaphore().acquire()
+        finally:
+            lane.waiting -= 1
+
+        lane.active += 1
+        loop = asyncio.get_running_loop()
+
+        def release(_):
+            lane.active -= 1
+            lane.completed += 1
+            lane.semaphore().release()
+
+        # The slot is released when the thread finishes, not when the caller
+        # stops waiting, so a caller-side timeout cannot oversubscribe a model
+        future = pool.submit(fn, *args)
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(release, f))
+        return await asyncio.wrap_future(future)
+
+    async def run_model(self, name, fn, *args):
+        """Run a blocking inference call under the named model's concurrency limit"""
+        return await self._run(self._model_lane(name), name, self.model_pool, fn, *args)
+
+    def stats(self):
+        return {
+            'models': {name: lane.stats() for name, lane in self._model_lanes.items()},
+        }
@@ -0,0 +1,373 @@
+"""
+Keyword tables and matching shared by app.py, app_light.py and classifier.py.
+
+Titles, department corrections and the lightweight classifier all ask the same
+question of a description: which of these keywords does it contain? Every
+keyword from every table is compiled at import into one trie-shaped regex
+wrapped in a lookahead, so a single findall over the lowercased text reports
+the longest keyword starting at each position. Keywords that are prefixes of
+a matched one ("mosquito" in "mosquitoes") are added from a precomputed
+closure, which makes the result exactly the set of keywords for which the old
+`keyword in text_lower` check was true, without looping over the tables.
+
+Each table keeps its original order as a rank, so "first keyword in the list
+that matches" is a min() over the (few) matched keywords.
+
+For batches the same tables are also laid out as arrays indexed by keyword
+(a keyword -> department count matrix, severity masks, title ranks), and
+keyword_hit_matrix finds the hits of a whole batch with NumPy instead of the
+regex: every byte position of the joined batch is looked up by its first
+bytes among the keyword prefixes, and the few candidates are verified against
+the full keywords, giving sparse (row, keyword) pairs.
+"""
+import re
+
+import numpy as np
+
+ISSUE_TITLES = {
+    'pothole': 'Pothole Issue',
+    'garbage': 'Garbage Problem',
+    'trash': 'Waste Issue',
+    'waste': 'Waste Problem',
+    'streetlight': 'Streetlight Issue',
+    'street light': 'Streetlight Issue',
+    'light': 'Lighting Issue',
+    'water': 'Water Issue',
+    'leak': 'Water Leak',
+    'pipe': 'Pipe Issue',
+    'drain': 'Drainage Issue',
+    'road': 'Road Problem',
+    'broken': 'Broken Item',
+    'damaged': 'Damage Report',
+    'not working': 'Malfunction',
+    'overflow': 'Overflow Issue',
+    'blocked': 'Blockage Issue',
+    'dust': 'Dust Problem',
+    'dirty': 'Cleanliness Issue',
+    'noise': 'Noise Problem',
+    'smell': 'Odor Issue',
+    'crack': 'Crack Issue',
+    'hole': 'Hole Problem',
+    'mosquito': 'Mosquito Problem',
+    'mosquitoes': 'Mosquito Problem',
+    'pest': 'Pest Issue',
+    'insects': 'Insect Problem',
+    'flies': 'Fly Problem',
+    'rats': 'Rodent Problem',
+    'rodents': 'Rodent Problem',
+    'toilet': 'Toilet Issue',
+    'bathroom': 'Bathroom Problem',
+    'sewage': 'Sewage Issue',
+    'sewer': 'Sewer Problem'
+}
+
+# Action words + object, used when no issue keyword matches
+ACTION_TITLES = {
+    'everywhere': 'Widespread Issue',
+    'causing': 'Problem Report',
+    'need': 'Repair Needed',
+    'fix': 'Fix Required',
+    'repair': 'Repair Needed'
+}
+
+DEPARTMENT_TITLES = {
+    'Sanitation and Waste Management': 'Sanitation Issue',
+    'Roads and Transport': 'Road Issue',
+    'Electricity and Streetlights': 'Electrical Issue',
+    'Water Supply and Drainage': 'Water Issue',
+    'Public Health': 'Health Issue',
+    'Environment': 'Environmental Issue',
+    'Public Safety': 'Safety Issue'
+}
+
+TITLE_STOP_WORDS = {'the', 'and', 'are', 'is', 'on', 'in', 'at', 'to', 'of'}
+
+# Post-processing rules for common misclassifications, applied in order:
+# (target department, keywords, departments it corrects or None for any other)
+DEPARTMENT_CORRECTIONS = [
+    # Sanitation issues often misclassified as Environment
+    ('Sanitation and Waste Management', [
+        'mosquito', 'mosquitoes', 'pest', 'insects', 'flies', 'rats', 'rodents',
+        'garbage', 'trash', 'waste', 'dump', 'litter', 'dirty', 'smell', 'odor',
+        'toilet', 'bathroom', 'sewage', 'sewer', 'cleaning', 'hygiene'
+    ], ['Environment', 'Public Health']),
+    ('Water Supply and Drainage', [
+        'water supply', 'tap water', 'drinking water', 'water shortage',
+        'no water', 'water pressure', 'water quality', 'contaminated water'
+    ], None),
+    ('Roads and Transport', [
+        'traffic', 'vehicle', 'parking', 'signal', 'zebra crossing',
+        'footpath', 'sidewalk', 'pavement'
+    ], None),
+]
+
+HIGH_SEVERITY_KEYWORDS = ['emergency', 'urgent', 'dangerous', 'severe', 'critical', 'major', 'serious', 'broken', 'overflow', 'blocked completely']
+LOW_SEVERITY_KEYWORDS = ['minor', 'small', 'little', 'slight', 'cosmetic']
+
+DEPARTMENT_KEYWORDS = {
+    'Sanitation and Waste Management': ['garbage', 'trash', 'waste', 'dump', 'litter', 'dirty', 'smell', 'odor', 'toilet', 'bathroom', 'sewage', 'sewer', 'mosquito', 'mosquitoes', 'pest', 'insects', 'flies', 'rats', 'rodents', 'cleaning', 'hygiene'],
+    'Roads and Transport': ['road', 'street', 'pothole', 'traffic', 'vehicle', 'parking', 'signal', 'zebra crossing', 'footpath', 'sidewalk', 'pavement'],
+    'Electricity and Streetlights': ['electricity', 'power', 'light', 'streetlight', 'street light', 'bulb', 'wire', 'pole', 'transformer'],
+    'Water Supply and Drainage': ['water', 'leak', 'pipe', 'drain', 'drainage', 'tap', 'supply', 'pressure', 'quality', 'contaminated', 'shortage'],
+    'Public Health': ['health', 'medical', 'hospital', 'clinic', 'disease', 'illness', 'contamination'],
+    'Environment': ['environment', 'pollution', 'air', 'noise', 'dust', 'tree', 'park', 'green'],
+    'Public Safety': ['safety', 'security', 'crime', 'theft', 'violence', 'accident', 'emergency']
+}
+
+
+def _trie_pattern(keywords):
+    """Regex alternation shaped like a trie, so each position is rejected after one character"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional tail: the longest keyword at a position wins
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+def _ranks(keywords):
+    ranks = {}
+    for keyword in keywords:
+        ranks.setdefault(keyword, len(ranks))
+    return ranks
+
+
+ALL_KEYWORDS = sorted(set().union(
+    ISSUE_TITLES, ACTION_TITLES, HIGH_SEVERITY_KEYWORDS, LOW_SEVERITY_KEYWORDS,
+    *(keywords for _, keywords, _ in DEPARTMENT_CORRECTIONS),
+    *DEPARTMENT_KEYWORDS.values()
+))
+
+_PATTERN = re.compile('(?=(' + _trie_pattern(ALL_KEYWORDS) + '))')
+_PREFIX_CLOSURE = {
+    keyword: frozenset(other for other in ALL_KEYWORDS if keyword.startswith(other))
+    for keyword in ALL_KEYWORDS
+}
+
+# Longer issue keywords take priority, ties keep table order
+_ISSUE_RANKS = _ranks(sorted(ISSUE_TITLES, key=len, reverse=True))
+_ACTION_RANKS = _ranks(ACTION_TITLES)
+_CORRECTION_RANKS = [(target, _ranks(keywords), sources) for target, keywords, sources in DEPARTMENT_CORRECTIONS]
+_HIGH_SEVERITY_RANKS = _ranks(HIGH_SEVERITY_KEYWORDS)
+_LOW_SEVERITY_RANKS = _ranks(LOW_SEVERITY_KEYWORDS)
+_DEPARTMENT_SETS = {dept: frozenset(keywords) for dept, keywords in DEPARTMENT_KEYWORDS.items()}
+
+KEYWORD_INDEX = {keyword: i for i, keyword in enumerate(ALL_KEYWORDS)}
+NO_RANK = len(ALL_KEYWORDS)
+
+DEPARTMENT_NAMES = list(DEPARTMENT_KEYWORDS)
+DEPARTMENT_MATRIX = np.array(
+    [[keyword in _DEPARTMENT_SETS[dept] for dept in DEPARTMENT_NAMES] for keyword in ALL_KEYWORDS],
+    dtype=np.int64
+)
+
+HIGH_SEVERITY_MASK = np.isin(np.arange(len(ALL_KEYWORDS)), [KEYWORD_INDEX[k] for k in HIGH_SEVERITY_KEYWORDS])
+LOW_SEVERITY_MASK = np.isin(np.arange(len(ALL_KEYWORDS)), [KEYWORD_INDEX[k] for k in LOW_SEVERITY_KEYWORDS])
+
+
+def rank_vector(ranks):
+    """Per-keyword table rank, NO_RANK for keywords outside the table"""
+    vector = np.full(len(ALL_KEYWORDS), NO_RANK, dtype=np.int64)
+    for keyword, rank in ranks.items():
+        vector[KEYWORD_INDEX[keyword]] = rank
+    return vector
+
+
+ISSUE_RANK_VECTOR = rank_vector(_ISSUE_RANKS)
+ISSUE_TITLES_BY_RANK = [ISSUE_TITLES[keyword] for keyword in _ISSUE_RANKS]
+
+
+# Batch scan tables: keywords as bytes, the byte pairs that can start one and
+# the codes of their first PREFIX_BYTES bytes (every keyword is at least that long)
+PREFIX_BYTES = 3
+MAX_KEYWORD_BYTES = max(len(keyword) for keyword in ALL_KEYWORDS)
+if min(len(keyword) for keyword in ALL_KEYWORDS) < PREFIX_BYTES:
+    raise ValueError(f"Keywords must be at least {PREFIX_BYTES} characters long")
+
+_KEYWORD_BYTES = [np.frombuffer(keyword.encode('ascii'), dtype=np.uint8) for keyword in ALL_KEYWORDS]
+_STARTS = np.zeros(1 << 16, dtype=bool)
+_STARTS[[(int(keyword[0]) << 8) | int(keyword[1]) for keyword in _KEYWORD_BYTES]] = True
+_KEYWORD_CODES = np.array([int.from_bytes(keyword[:PREFIX_BYTES].tobytes(), 'big') for keyword in _KEYWORD_BYTES], dtype=np.uint32)
+_PREFIXES = np.unique(_KEYWORD_CODES)
+_KEYWORD_PREFIX = np.searchsorted(_PREFIXES, _KEYWORD_CODES)
+
+
+def keyword_hit_matrix(texts):
+    """Sparse text x keyword hits for a batch as unique (rows, cols) index arrays"""
+    encoded = [text.lower().encode('utf-8') for text in texts]
+    # Keywords are ASCII without newlines, so byte matches never cross texts or characters
+    offsets = np.cumsum([0] + [len(text) + 1 for text in encoded])
+    size = int(offsets[-1]) - 1 if encoded else 0
+    data = np.zeros(size + MAX_KEYWORD_BYTES, dtype=np.uint8)
+    data[:size] = np.frombuffer(b"\n".join(encoded), dtype=np.uint8)
+
+    # Candidate positions: a table lookup on the first two bytes, then the prefix code
+    candidates = np.flatnonzero(_STARTS[(data[:size].astype(np.uint16) << 8) | data[1:size + 1]])
+    codes = np.zeros(len(candidates), dtype=np.uint32)
+    for i in range(PREFIX_BYTES):
+        codes = (codes << 8) | data[candidates + i]
+    slots = np.minimum(np.searchsorted(_PREFIXES, codes), len(_PREFIXES) - 1)
+    matched = _PREFIXES[slots] == codes
+    candidates = candidates[matched]
+    candidate_prefix = slots[matched]
+
+    # Verify the remaining bytes, keyword by keyword, over its candidates only
+    order = np.argsort(candidate_prefix, kind='stable')
+    candidates = candidates[order]
+    bounds = np.searchsorted(candidate_prefix[order], np.arange(len(_PREFIXES) + 1))
+    positions, cols = [], []
+    for col, keyword in enumerate(_KEYWORD_BYTES):
+        prefix = _KEYWORD_PREFIX[col]
+        found = candidates[bounds[prefix]:bounds[prefix + 1]]
+        for i in range(PREFIX_BYTES, len(keyword)):
+            found = found[data[found + i] == keyword[i]]
+        positions.append(found)
+        cols.append(np.full(len(found), col, dtype=np.int64))
+
+    positions = np.concatenate(positions)
+    rows = np.searchsorted(offsets, positions, side='right') - 1
+    pairs = np.unique(rows * len(ALL_KEYWORDS) + np.concatenate(cols))
+    return pairs // len(ALL_KEYWORDS), pairs % len(ALL_KEYWORDS)
+
+
+def find_keywords(text):
+    """Return the set of known keywords occurring anywhere in text (case-insensitive)"""
+    found = set()
+    for keyword in set(_PATTERN.findall(text.lower())):
+        found |= _PREFIX_CLOSURE[keyword]
+    return found
+
+
+def first_match(matches, ranks):
+    """The matched keyword that comes first in a table, or None"""
+    best = None
+    for keyword in matches:
+        rank = ranks.get(keyword)
+        if rank is not None and (best is None or rank < ranks[best]):
+            best = keyword
+    return best
+
+
+def generate_keyword_title(text, department=None, max_words=4, matches=None,
+                           action_titles=True, first_words_fallback=True):
+    """Generate title using keyword extraction.
+
+    app.py uses every step. classifier.py never had the action-word titles and
+    app_light.py had neither those nor the first-words fallback, so they turn
+    them off to keep their titles unchanged.
+    """
+    try:
+        if matches is None:
+            matches = find_keywords(text)
+
+        keyword = first_match(matches, _ISSUE_RANKS)
+        if keyword:
+            return ISSUE_TITLES[keyword]
+
+        pattern = first_match(matches, _ACTION_RANKS) if action_titles else None
+        if pattern:
+            return ACTION_TITLES[pattern]
+
+        # Department-based fallback
+        if department in DEPARTMENT_TITLES:
+            return DEPARTMENT_TITLES[department]
+
+        # Extract key nouns and create title
+        words = text.split()
+        if len(words) >= 2:
+            # Take first 2-3 meaningful words and add "Issue"
+            key_words = []
+            for word in words[:4]:
+                if len(word) > 2 and word.lower() not in TITLE_STOP_WORDS:
+                    key_words.append(word.title())
+                if len(key_words) >= 2:
+                    break
+
+            if key_words:
+                return ' '.join(key_words) + ' Issue'
+
+        # Final fallback: Use first few words but limit length
+        if words and first_words_fallback:
+            title = ' '.join(words[:max_words]).title()
+            if len(title) > 25:  # Limit title length
+                title = title[:22] + '...'
+            return title
+
+        return 'Civic Issue Report'
+
+    except Exception as e:
+        print(f"Keyword title generation error: {e}")
+        return 'Civic Issue Report'
+
+
+def apply_department_corrections(text, department, matches=None, targets=None):
+    """Apply post-processing rules to correct common misclassifications
+    (only the rules for `targets` departments when given)"""
+    if matches is None:
+        matches = find_keywords(text)
+
+    for target, ranks, sources in _CORRECTION_RANKS:
+        if targets is not None and target not in targets:
+            continue
+        keyword = first_match(matches, ranks)
+        if keyword is None:
+            continue
+        if (department in sources) if sources is not None else (department != target):
+            print(f"Correcting department: '{keyword}' found -> {target.split()[0]}")
+            return target
+
+    return department
+
+
+def keyword_severity(matches):
+    """Severity label and confidence from severity keywords"""
+    if first_match(matches, _HIGH_SEVERITY_RANKS):
+        return "Severe issue", 0.8
+    if first_match(matches, _LOW_SEVERITY_RANKS):
+        return "Minor issue", 0.7
+    return "Moderate issue", 0.6
+
+
+def keyword_department(matches):
+    """Department with the most keyword hits (first listed wins ties) and its confidence"""
+    department = "Public Health"  # default
+    dept_conf = 0.5
+    max_matches = 0
+
+    for dept, keywords in _DEPARTMENT_SETS.items():
+        hits = len(keywords & matches)
+        if hits > max_matches:
+            max_matches = hits
+            department = dept
+            dept_conf = min(0.9, 0.5 + (hits * 0.1))
+
+    return department, dept_conf
+
+
+def has_severity_cue(matches):
+    """Whether any high or low severity keyword is present (keyword_severity
+    falls back to a moderate guess otherwise)"""
+    return bool(first_match(matches, _HIGH_SEVERITY_RANKS) or first_match(matches, _LOW_SEVERITY_RANKS))
+
+
+def keyword_conflicts(matches):
+    """Where the keywords contradict each other: 'department' when several
+    departments tie for the most hits, 'severity' when there are both high
+    and low severity cues"""
+    conflicts = []
+    hits = [len(keywords & matches) for keywords in _DEPARTMENT_SETS.values()]
+    if max(hits) and hits.count(max(hits)) > 1:
+        conflicts.append('department')
+    if first_match(matches, _HIGH_SEVERITY_RANKS) and first_match(matches, _LOW_SEVERITY_RANKS):
+        conflicts.append('severity')
+    return conflicts
@@ -0,0 +1,138 @@
+"""
+Prometheus metrics for the ML service, served by app.py at /metrics.
+
+The hot path only touches a few histograms and counters: one observation per
+batched forward pass, media download and classification request, each a
+lock and a bucket lookup. Everything the components already count (executor
+lanes, batcher queues, result cache, near-duplicate index, keyword cascade,
+loaded models) is read from their stats() by ServiceCollector when Prometheus
+scrapes, so it costs nothing in between. Process RSS, CPU time and open file
+descriptors come from prometheus_client's default process collector
+(process_resident_memory_bytes etc., Linux only).
+"""
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+INFERENCE_SECONDS = Histogram(
+    'ml_inference_seconds', 'Time spent in one batched forward pass or transcription', ['model'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+BATCH_SIZE = Histogram(
+    'ml_batch_size', 'Inputs per batched forward pass', ['model'],
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+MEDIA_DOWNLOAD_SECONDS = Histogram(
+    'ml_media_download_seconds', 'Report media download time', ['kind', 'outcome'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+MEDIA_DOWNLOAD_BYTES = Histogram(
+    'ml_media_download_bytes', 'Size of downloaded report media', ['kind'],
+    buckets=(16 * 2**10, 64 * 2**10, 256 * 2**10, 2**20, 4 * 2**20, 16 * 2**20)
+)
+MODALITY_REQUESTS = Counter(
+    'ml_modality_requests_total', 'Modality classifications by outcome (ok, failed, timeout, overloaded, error)',
+    ['modality', 'outcome']
+)
+CLASSIFY_REQUESTS = Counter(
+    'ml_classify_requests_total',
+    'Classification requests, including batch items, by outcome '
+    '(ok, partial, duplicate, bad_request, failed, timeout, overloaded, error, cancelled)',
+    ['outcome']
+)
+
+# HTTP errors raised by the classification path, as request outcomes
+STATUS_OUTCOMES = {400: 'bad_request', 500: 'failed', 503: 'overloaded', 504: 'timeout'}
+
+
+def timed_batch(model, batch_fn):
+    """Wrap a MicroBatcher batch_fn to record its latency and batch size"""
+    seconds = INFERENCE_SECONDS.labels(model)
+    sizes = BATCH_SIZE.labels(model)
+
+    def run(inputs):
+        started = time.perf_counter()
+        results = batch_fn(inputs)
+        seconds.observe(time.perf_counter() - started)
+        sizes.observe(len(inputs))
+        return results
+    return run
+
+
+def render():
+    """Body and content type for a /metrics response"""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class ServiceCollector:
+    """Exposes the components' own counters, read at scrape time"""
+
+    def __init__(self, executor, batchers, result_cache, model_registry, media_fetcher, dedup_index=None, cascade=None):
+        self.executor = executor
+        self.batchers = batchers
+        self.result_cache = result_cache
+        self.model_registry = model_registry
+        self.media_fetcher = media_fetcher
+        self.dedup_index = dedup_index
+        self.cascade = cascade
+
+    def collect(self):
+        lanes = self.executor.stats()['models']
+        active = GaugeMetricFamily('ml_executor_active', 'Calls running per executor lane', labels=['lane'])
+        waiting = GaugeMetricFamily('ml_executor_waiting', 'Calls queued per executor lane', labels=['lane'])
+        limit = GaugeMetricFamily('ml_executor_limit', 'Concurrency limit per executor lane', labels=['lane'])
+        completed = CounterMetricFamily('ml_executor_completed', 'Calls finished per executor lane', labels=['lane'])
+        rejected = CounterMetricFamily('ml_executor_rejected', 'Calls refused with 503 per executor lane', labels=['lane'])
+        for lane, stats in lanes.items():
+            active.add_metric([lane], stats['active'])
+            waiting.add_metric([lane], stats['waiting'])
+            limit.add_metric([lane], stats['limit'])
+            completed.add_metric([lane], stats['completed'])
+            rejected.add_metric([lane], stats['rejected'])
+        yield from (active, waiting, limit, completed, rejected)
+
+        pending = GaugeMetricFamily('ml_batcher_pending', 'Inputs waiting for the next micro-batch', labels=['batcher'])
+        for batcher in self.batchers:
+            pending.add_metric([batcher.name], batcher.stats()['pending'])
+        yield pending
+
+        cache = self.result_cache.stats()
+        yield CounterMetricFamily('ml_cache_hits', 'Result cache hits', value=cache['hits'])
+        yield CounterMetricFamily('ml_cache_misses', 'Result cache misses', value=cache['misses'])
+        yield CounterMetricFamily('ml_cache_coalesced', 'Requests that waited on an identical in-flight request', value=cache['coalesced'])
+        yield CounterMetricFamily('ml_cache_evictions', 'Result cache evictions', value=cache['evictions'])
+        yield GaugeMetricFamily('ml_cache_entries', 'Results held in the cache', value=cache['entries'])
+        yield GaugeMetricFamily('ml_cache_bytes', 'Bytes held in the result cache', value=cache['bytes'])
+
+        media = self.media_fetcher.stats()
+        yield CounterMetricFamily('ml_media_failures', 'Media downloads that failed', value=media['failures'])
+
+        if self.dedup_index is not None:
+            dedup = self.dedup_index.stats()
+            yield GaugeMetricFamily('ml_dedup_entries', 'Reports in the near-duplicate window', value=dedup['entries'])
+            yield CounterMetricFamily('ml_dedup_searches', 'Near-duplicate searches', value=dedup['searches'])
+            yield CounterMetricFamily('ml_dedup_matches', 'Requests answered from a near-duplicate', value=dedup['matches'])
+
+        if self.cascade is not None:
+            cascade = self.cascade.stats()
+            tiers = CounterMetricFamily('ml_cascade_texts', 'Texts resolved per cascade tier', labels=['tier'])
+            tiers.add_metric(['keywords'], cascade['keywords'])
+            tiers.add_metric(['bart_severity'], cascade['bart_severity'])
+            tiers.add_metric(['bart_mnli'], cascade['bart_mnli'])
+            escalations = CounterMetricFamily('ml_cascade_escalations', 'Texts sent on to BART, by reason', labels=['reason'])
+            for reason, count in cascade['escalations'].items():
+                escalations.add_metric([reason], count)
+            yield from (tiers, escalations)
+
+        models = self.model_registry.report()['models']
+        loaded = GaugeMetricFamily('ml_model_loaded', 'Whether the model is resident', labels=['model'])
+        resident = GaugeMetricFamily('ml_model_resident_bytes', 'Tensor memory held by the model', labels=['model'])
+        loads = CounterMetricFamily('ml_model_loads', 'Times the model was loaded', labels=['model'])
+        evictions = CounterMetricFamily('ml_model_evictions', 'Times the model was evicted', labels=['model'])
+        for name, info in models.items():
+            loaded.add_metric([name], 1 if info['loaded'] else 0)
+            resident.add_metric([name], info['resident_mb'] * 2**20)
+            loads.add_metric([name], info['loads'])
+            evictions.add_metric([name], info['evictions'])
+        yield from (loaded, resident, loads, evictions)
@@ -0,0 +1,164 @@
+"""
+Lazy model registry with a resident-memory budget.
+
+Models are registered with a loader function and only loaded the first time
+they are requested. The registry records how much tensor memory each loaded
+model holds and, when the total exceeds the configured budget, evicts the
+least recently used models until it fits again. A model that failed to load
+is remembered as failed so every request does not retry the load.
+"""
+import gc
+import threading
+import time
+from collections import OrderedDict
+
+import torch
+
+
+class ModelLoadError(RuntimeError):
+    pass
+
+
+def _tensor_bytes(obj):
+    """Bytes held by parameters and buffers of torch modules reachable from obj.
+
+    Objects that are not torch modules but hold weights elsewhere (exported
+    ONNX/TorchScript models) report their own size through tensor_bytes().
+    """
+    modules = []
+    total = 0
+    candidates = [obj]
+    if isinstance(obj, (tuple, list)):
+        candidates = list(obj)
+    for candidate in candidates:
+        if isinstance(candidate, torch.nn.Module):
+            modules.append(candidate)
+        elif hasattr(candidate, '__dict__'):
+            for value in vars(candidate).values():
+                if isinstance(value, torch.nn.Module):
+                    modules.append(value)
+                elif hasattr(value, 'tensor_bytes'):
+                    total += value.tensor_bytes()
+
+    seen = set()
+    for module in modules:
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            if id(tensor) in seen:
+                continue
+            seen.add(id(tensor))
+            total += tensor.numel() * tensor.element_size()
+        # Dynamically quantized Linear layers keep their int8 weights in packed params
+        for submodule in module.modules():
+            if hasattr(submodule, '_weight_bias'):
+                total += sum(t.numel() * t.element_size() for t in submodule._weight_bias() if t is not None)
+    return total
+
+
+class ModelRegistry:
+    def __init__(self, budget_bytes=0):
+        """budget_bytes=0 disables eviction"""
+        self.budget_bytes = budget_bytes
+        self._loaders = {}
+        self._loaded = OrderedDict()  # name -> model, least recently used first
+        self._info = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def register(self, name, loader):
+        self._loaders[name] = loader
+        self._load_locks[name] = threading.Lock()
+        self._info[name] = {'resident_bytes': 0, 'load_seconds': None, 'loads': 0, 'evictions': 0, 'last_used': None}
+
+    def get(self, name):
+        """Return a loaded model, loading it (and evicting others) if needed"""
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                self._info[name]['last_used'] = time.time()
+                return self._loaded[name]
+            if name in self._failed:
+                raise ModelLoadError(f"{name} failed to load: {self._failed[name]}")
+            if name not in self._loaders:
+                raise ModelLoadError(f"{name} is not a registered model")
+
+        # Load outside the registry lock so other models stay usable meanwhile
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._loaded:
+                    self._loaded.move_to_end(name)
+                    return self._loaded[name]
+
+            print(f"Loading model '{name}'...")
+            started = time.time()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                print(f"Error loading model '{name}': {e}")
+                with self._lock:
+                    self._failed[name] = str(e)
+                raise ModelLoadError(f"{name} failed to load: {e}") from e
+
+            with self._lock:
+                info = self._info[name]
+                info['resident_bytes'] = _tensor_bytes(model)
+                info['load_seconds'] = round(time.time() - started, 3)
+                info['loads'] += 1
+                info['last_used'] = time.time()
+                self._loaded[name] = model
+                self._evict_over_budget(keep=name)
+            print(f"Model '{name}' loaded in {info['load_seconds']}s "
+                  f"({info['resident_bytes'] / 2**20:.1f} MB)")
+            return model
+
+    def peek(self, name):
+        """The model if it is resident, else None; never loads it or changes the LRU order"""
+        with self._lock:
+            return self._loaded.get(name)
+
+    def available(self, name):
+        """Whether the model can be used, loading it on first call"""
+        try:
+            self.get(name)
+            return True
+        except ModelLoadError:
+            return False
+
+    def resident_bytes(self):
+        return sum(self._info[name]['resident_bytes'] for name in self._loaded)
+
+    def _evict_over_budget(self, keep):
+        if not self.budget_bytes:
+            return
+        evicted = False
+        while self.resident_bytes() > self.budget_bytes:
+            victim = next((name for name in self._loaded if name != keep), None)
+            if victim is None:
+                break
+            del self._loaded[victim]
+            self._info[victim]['evictions'] += 1
+            evicted = True
+            print(f"Evicted model '{victim}' to stay within memory budget")
+        if evicted:
+            gc.collect()
+
+    def report(self):
+        """What is loaded, how big it is and how it has been used"""
+        with self._lock:
+            models = {}
+            for name, info in self._info.items():
+                models[name] = {
+                    'loaded': name in self._loaded,
+                    'failed': self._failed.get(name),
+                    'resident_mb': round(info['resident_bytes'] / 2**20, 1) if name in self._loaded else 0.0,
+                    'load_seconds': info['load_seconds'],
+                    'loads': info['loads'],
+                    'evictions': info['evictions'],
+                    'last_used': info['last_used'],
+                }
+            return {
+                'budget_mb': round(self.budget_bytes / 2**20, 1) if self.budget_bytes else None,
+                'resident_mb': round(self.resident_bytes() / 2**20, 1),
+                'lru_order': list(self._loaded),
+                'models': models,
+            }
@@ -0,0 +1,170 @@
+"""
+Persistent local model store for the ML service.
+
+Every model lives in its own directory under ML_MODEL_STORE together with a
+manifest.json recording the size and sha256 of each file. At boot the service
+loads weights straight from these directories (safetensors are memory-mapped),
+so restarts never touch the network. In offline mode (ML_OFFLINE=1) a missing
+model is an error instead of a download.
+
+Fill the store ahead of time, e.g. while building an image:
+
+    python model_store.py prefetch            # all models
+    python model_store.py prefetch clip       # just one
+    python model_store.py verify              # full checksum check
+"""
+import hashlib
+import json
+import os
+import sys
+
+MODEL_STORE = os.getenv(
+    'ML_MODEL_STORE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'civic-ml', 'models')
+)
+OFFLINE = os.getenv('ML_OFFLINE', '0') == '1'
+VERIFY_ON_BOOT = os.getenv('ML_VERIFY_CHECKSUMS', '0') == '1'
+
+MODELS = {
+    'clip': 'openai/clip-vit-base-patch32',
+    'bart_mnli': 'facebook/bart-large-mnli',
+    'whisper': 'openai/whisper-base',
+}
+
+MANIFEST_NAME = 'manifest.json'
+
+# Weights for other frameworks are never loaded by the service
+IGNORE_PATTERNS = ['*.h5', '*.msgpack', '*.ot', '*.onnx', 'onnx/*', '*.tflite', 'coreml/*']
+
+
+def configure_environment():
+    """Point the Hugging Face and torch caches at the store (call before importing transformers)"""
+    cache_root = os.path.join(MODEL_STORE, '.cache')
+    os.makedirs(cache_root, exist_ok=True)
+    os.environ.setdefault('HF_HOME', os.path.join(cache_root, 'huggingface'))
+    os.environ.setdefault('TORCH_HOME', os.path.join(cache_root, 'torch'))
+    if OFFLINE:
+        os.environ['HF_HUB_OFFLINE'] = '1'
+        os.environ['TRANSFORMERS_OFFLINE'] = '1'
+    print(f"Model store: {MODEL_STORE} (offline={OFFLINE})")
+
+
+def model_dir(repo_id):
+    return os.path.join(MODEL_STORE, repo_id.replace('/', '--'))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(repo_id):
+    path = os.path.join(model_dir(repo_id), MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(repo_id):
+    """Record size and sha256 of every file in a model directory"""
+    root = model_dir(repo_id)
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for name in filenames:
+            if name == MANIFEST_NAME:
+                continue
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, root).replace(os.sep, '/')
+            files[rel] = {'size': os.path.getsize(path), 'sha256': _sha256(path)}
+
+    manifest = {'repo_id': repo_id, 'files': files}
+    with open(os.path.join(root, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def verify(repo_id, full=True):
+    """Check a stored model against its manifest; returns a list of problems"""
+    manifest = _load_manifest(repo_id)
+    if manifest is None:
+        return [f"{repo_id}: not in store"]
+
+    problems = []
+    root = model_dir(repo_id)
+    for rel, meta in manifest['files'].items():
+        path = os.path.join(root, rel)
+        if not os.path.exists(path):
+            problems.append(f"{repo_id}: missing {rel}")
+        elif os.path.getsize(path) != meta['size']:
+            problems.append(f"{repo_id}: size mismatch for {rel}")
+        elif full and _sha256(path) != meta['sha256']:
+            problems.append(f"{repo_id}: checksum mismatch for {rel}")
+    return problems
+
+
+def prefetch(repo_id):
+    """Download a model into the store and write its manifest"""
+    from huggingface_hub import HfApi, snapshot_download
+
+    ignore = list(IGNORE_PATTERNS)
+    repo_files = HfApi().list_repo_files(repo_id)
+    if any(name.endswith('.safetensors') for name in repo_files):
+        # safetensors can be memory-mapped, skip the duplicate pickle weights
+        ignore.append('*.bin')
+
+    print(f"Prefetching {repo_id} -> {model_dir(repo_id)}")
+    snapshot_download(repo_id, local_dir=model_dir(repo_id), ignore_patterns=ignore)
+    return write_manifest(repo_id)
+
+
+def resolve(repo_id):
+    """Return the local directory to load a model from, fetching it first if allowed"""
+    problems = verify(repo_id, full=VERIFY_ON_BOOT)
+    if not problems:
+        return model_dir(repo_id)
+
+    if OFFLINE:
+        raise RuntimeError(
+            f"Model {repo_id} unavailable in offline mode ({'; '.join(problems)}). "
+            f"Run 'python model_store.py prefetch' first."
+        )
+
+    print(f"Model store miss: {'; '.join(problems)}")
+    prefetch(repo_id)
+    return model_dir(repo_id)
+
+
+def main(argv):
+    if not argv or argv[0] not in ('prefetch', 'verify'):
+        print("Usage: python model_store.py (prefetch|verify) [model ...]")
+        print(f"Models: {', '.join(MODELS)}")
+        return 2
+
+    command, names = argv[0], argv[1:] or list(MODELS)
+    unknown = [name for name in names if name not in MODELS]
+    if unknown:
+        print(f"Unknown models: {', '.join(unknown)}")
+        return 2
+
+    failed = False
+    for name in names:
+        repo_id = MODELS[name]
+        if command == 'prefetch':
+            prefetch(repo_id)
+        problems = verify(repo_id, full=True)
+        for problem in problems:
+            print(f"  ❌ {problem}")
+        if problems:
+            failed = True
+        else:
+            print(f"  ✅ {repo_id} verified")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
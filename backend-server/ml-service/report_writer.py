@@ -0,0 +1,126 @@
+"""
+Report updates for the worker with one round trip per report, or per batch.
+
+The worker used to update_one a classified report and then find_one the whole
+document back to log it and forward it to the backend. ReportWriter collects
+updates from concurrent jobs and flushes them when `max_ops` are queued or
+`max_delay_ms` after the first one:
+
+- a flush holding a single update runs find_one_and_update, returning only
+  the fields in REPORT_PROJECTION as they are after the update;
+- a larger flush runs one unordered bulk_write. Bulk writes return no
+  documents, so each caller gets back the fields it set plus the _id, and a
+  write error on one report only fails that caller. When fewer reports match
+  than were updated, one $in lookup finds the missing ones, and their callers
+  get None.
+
+pymongo is synchronous, so the writes run on threads via asyncio.to_thread.
+"""
+import asyncio
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Fields the worker logs and forwards to the backend webhook
+REPORT_PROJECTION = {
+    'title': 1, 'description': 1, 'department': 1, 'severity': 1,
+    'mlClassified': 1, 'mlSeverity': 1, 'mlDepartment': 1,
+    'mlConfidence': 1, 'mlTitle': 1, 'mlConflicts': 1
+}
+
+
+class ReportWriter:
+    def __init__(self, collection, max_ops=50, max_delay_ms=10):
+        self.collection = collection
+        self.max_ops = max_ops
+        self.max_delay = max_delay_ms / 1000.0
+
+        self._pending = []  # (ObjectId, update, future)
+        self._timer = None
+
+        self.single_writes = 0
+        self.bulk_writes = 0
+        self.bulk_ops = 0
+        self.errors = 0
+
+    async def update(self, report_id, update_data):
+        """$set update_data on a report; returns its projected fields after the update, None if missing"""
+        report_oid = ObjectId(report_id)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((report_oid, update_data, future))
+        if len(self._pending) >= self.max_ops:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._write(batch))
+
+    async def _write(self, batch):
+        try:
+            if len(batch) == 1:
+                report_oid, update_data, future = batch[0]
+                self.single_writes += 1
+                document = await asyncio.to_thread(
+                    self.collection.find_one_and_update,
+                    {'_id': report_oid},
+                    {'$set': update_data},
+                    projection=REPORT_PROJECTION,
+                    return_document=ReturnDocument.AFTER
+                )
+                if not future.done():
+                    future.set_result(document)
+                return
+
+            self.bulk_writes += 1
+            self.bulk_ops += len(batch)
+            operations = [UpdateOne({'_id': report_oid}, {'$set': update_data}) for report_oid, update_data, _ in batch]
+            failed = {}
+            try:
+                result = await asyncio.to_thread(self.collection.bulk_write, operations, ordered=False)
+                matched = result.matched_count
+            except BulkWriteError as e:
+                failed = {error['index']: error.get('errmsg', 'write error') for error in e.details.get('writeErrors', [])}
+                matched = e.details.get('nMatched', 0)
+                self.errors += len(failed)
+
+            # Reports deleted before their update match nothing; look up which
+            # ones exist so their callers get None, as from find_one_and_update
+            missing = set()
+            if matched < len(batch) - len(failed):
+                report_oids = [report_oid for report_oid, _, _ in batch]
+                found = await asyncio.to_thread(
+                    lambda: {doc['_id'] for doc in self.collection.find({'_id': {'$in': report_oids}}, {'_id': 1})}
+                )
+                missing = set(report_oids) - found
+                print(f"Bulk update matched {matched} of {len(batch)} reports; {len(missing)} not found")
+
+            for index, (report_oid, update_data, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if index in failed:
+                    future.set_exception(RuntimeError(f"Update of report {report_oid} failed: {failed[index]}"))
+                elif report_oid in missing:
+                    future.set_result(None)
+                else:
+                    future.set_result({'_id': report_oid, **update_data})
+        except Exception as e:
+            self.errors += len(batch)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self):
+        return {
+            "single_writes": self.single_writes,
+            "bulk_writes": self.bulk_writes,
+            "mean_bulk_size": round(self.bulk_ops / self.bulk_writes, 2) if self.bulk_writes else 0.0,
+            "errors": self.errors,
+        }
@@ -0,0 +1,150 @@
+"""
+In-process cache for classification results with request coalescing.
+
+Citizens often submit the same description ("garbage not collected") and the
+worker sometimes re-sends a report, so results are cached under a key built
+from the normalized text, the media URLs and the model version. Entries
+expire after a TTL and the least recently used ones are evicted once either
+the entry count or the total serialized size exceeds its bound.
+
+Concurrent requests for a key that is still being computed do not start a
+second inference: they await the first request's result instead.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(text):
+    """Casefold and drop punctuation/extra whitespace so trivial variants share a key.
+
+    Letters, digits and combining marks of any script count as word characters
+    (Devanagari vowel signs are marks, so dropping them would merge different
+    words). Text with no word characters at all (emoji, punctuation) keys on
+    itself rather than collapsing to the same empty key.
+    """
+    text = (text or "").strip()
+    if text.isascii():
+        words = _WORD.findall(text.lower())
+    else:
+        words = "".join(ch if unicodedata.category(ch)[0] in "LNM" else " " for ch in text.casefold()).split()
+    return " ".join(words) if words else text
+
+
+class ResultCache:
+    def __init__(self, max_entries=10000, max_bytes=32 * 2**20, ttl_seconds=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()  # key -> (expires_at, serialized result)
+        self._bytes = 0
+        self._inflight = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def make_key(text, image_url, audio_url, model_version):
+        raw = "\x1f".join([normalize_text(text), image_url or "", audio_url or "", model_version])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, serialized = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return json.loads(serialized)
+
+    def _remove(self, key):
+        _, serialized = self._entries.pop(key)
+        self._bytes -= len(key) + len(serialized)
+
+    def _store(self, key, result):
+        serialized = json.dumps(result)
+        size = len(key) + len(serialized)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, serialized)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def get_or_compute(self, key, compute, cacheable=None):
+        """Return the cached result for key, or run compute() once for all concurrent callers"""
+        if not self.enabled:
+            return await compute()
+
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return json.loads(await asyncio.shield(pending))
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request computing it went away; compute it ourselves
+                return await self.get_or_compute(key, compute, cacheable)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if cacheable is None or cacheable(result):
+            self._store(key, result)
+        future.set_result(json.dumps(result))
+        return result
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
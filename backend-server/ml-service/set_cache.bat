@@ -1,19 +1,15 @@
 @echo off
-echo Setting ML cache to F drive...
+echo Setting ML model store to F drive...
 
-mkdir F:\ml-cache\huggingface
-mkdir F:\ml-cache\torch  
-mkdir F:\ml-cache\transformers
+mkdir F:\ml-cache\models 2>nul
 
-set HF_HOME=F:\ml-cache\huggingface
-set HUGGINGFACE_HUB_CACHE=F:\ml-cache\huggingface
-set TORCH_HOME=F:\ml-cache\torch
-set TRANSFORMERS_CACHE=F:\ml-cache\transformers
+set ML_MODEL_STORE=F:\ml-cache\models
 
-echo Cache directories set to F drive
-echo HF_HOME=%HF_HOME%
-echo TORCH_HOME=%TORCH_HOME%
-echo TRANSFORMERS_CACHE=%TRANSFORMERS_CACHE%
+echo ML_MODEL_STORE=%ML_MODEL_STORE%
 
-echo Starting ML service with F drive cache...
-python app.py
\ No newline at end of file
+echo Prefetching models into the store...
+python model_store.py prefetch
+
+echo Starting ML service from the local store...
+set ML_OFFLINE=1
+python app.py
@@ -1,21 +1,19 @@
 @echo off
 echo Starting ML Classification Microservice...
 
-echo Setting cache directories to F drive...
-mkdir F:\ml-cache\huggingface 2>nul
-mkdir F:\ml-cache\torch 2>nul
-mkdir F:\ml-cache\transformers 2>nul
+echo Setting model store to F drive...
+mkdir F:\ml-cache\models 2>nul
 
-set HF_HOME=F:\ml-cache\huggingface
-set HUGGINGFACE_HUB_CACHE=F:\ml-cache\huggingface
-set TORCH_HOME=F:\ml-cache\torch
-set TRANSFORMERS_CACHE=F:\ml-cache\transformers
+set ML_MODEL_STORE=F:\ml-cache\models
 
-echo Cache directories set to F drive
+echo Model store set to F drive
 
 echo Installing Python dependencies...
 pip install -r requirements.txt
 
+echo Prefetching models into the store...
+python model_store.py prefetch
+
 echo Starting FastAPI ML Service...
 start "ML Service" python app.py
 
@@ -25,5 +23,5 @@ start "ML Worker" python worker.py
 echo ML Microservice started!
 echo ML Service: http://localhost:8000
 echo Worker: Processing jobs from Redis queue
-echo Cache location: F:\ml-cache
+echo Model store: F:\ml-cache\models
 pause
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Tiny randomly initialised stand-ins for the service's models.
+
+They have the same architectures, tokenizers and processors as BART-MNLI, CLIP
+and Whisper, but only a few hundred thousand parameters and a byte-level
+vocabulary built on the fly. Benchmarks and checks therefore run the real
+scoring code (tokenization, padding, micro-batching, generation) without
+downloads, network access or a GPU. Predictions are meaningless, but they are
+deterministic for a given seed.
+
+    register_stub_models(app.model_registry, [severity_labels, department_labels])
+"""
+import json
+import os
+import tempfile
+
+import torch
+from transformers import (
+    BartConfig, BartForSequenceClassification, BartTokenizer,
+    CLIPConfig, CLIPModel, CLIPTokenizer, CLIPImageProcessor, CLIPProcessor,
+    WhisperConfig, WhisperForConditionalGeneration, WhisperFeatureExtractor,
+    WhisperProcessor, WhisperTokenizer
+)
+
+import quantization
+from image_scorer import ClipLabelScorer
+from text_scorer import FusedZeroShotScorer
+
+
+def _byte_symbols():
+    """The 256 printable symbols GPT-2 style byte-level BPE maps bytes to"""
+    printable = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    symbols = printable[:]
+    extra = 0
+    for byte in range(256):
+        if byte not in printable:
+            symbols.append(256 + extra)
+            extra += 1
+    return sorted(chr(symbol) for symbol in symbols)
+
+
+def _load_tokenizer(tokenizer_class, vocab, **kwargs):
+    """Tokenizer over a merge-free byte vocabulary (one token per byte)"""
+    with tempfile.TemporaryDirectory() as directory:
+        vocab_file = os.path.join(directory, "vocab.json")
+        merges_file = os.path.join(directory, "merges.txt")
+        with open(vocab_file, "w") as f:
+            json.dump(vocab, f)
+        with open(merges_file, "w") as f:
+            f.write("#version: 0.2\n")
+        return tokenizer_class(vocab_file, merges_file, **kwargs)
+
+
+def _prepare(model, quantize):
+    """Same preparation as app.py's loaders"""
+    model = model.eval()
+    return quantization.quantize_linear(model) if quantize else model
+
+
+def build_text_scorer(label_sets, seed=0, quantize=False):
+    """Tiny BART-MNLI behind the service's fused zero-shot scorer"""
+    torch.manual_seed(seed)
+    vocab = {"<s>": 0, "<pad>": 1, "</s>": 2, "<unk>": 3}
+    for symbol in _byte_symbols():
+        vocab.setdefault(symbol, len(vocab))
+    vocab["<mask>"] = len(vocab)
+    tokenizer = _load_tokenizer(BartTokenizer, vocab)
+
+    config = BartConfig(
+        vocab_size=len(vocab), d_model=32, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64,
+        max_position_embeddings=1024, num_labels=3,
+        id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+        label2id={"contradiction": 0, "neutral": 1, "entailment": 2}
+    )
+    model = _prepare(BartForSequenceClassification(config), quantize)
+    return FusedZeroShotScorer(model, tokenizer, label_sets)
+
+
+def build_image_scorer(label_sets, seed=0, quantize=False):
+    """Tiny CLIP with 32x32 inputs behind the service's label scorer"""
+    torch.manual_seed(seed)
+    vocab = {}
+    for symbol in _byte_symbols():
+        vocab[symbol] = len(vocab)
+    for symbol in _byte_symbols():
+        vocab[symbol + "</w>"] = len(vocab)
+    vocab["<|startoftext|>"] = len(vocab)
+    vocab["<|endoftext|>"] = len(vocab)
+    tokenizer = _load_tokenizer(CLIPTokenizer, vocab)
+    image_processor = CLIPImageProcessor(size={"shortest_edge": 32}, crop_size={"height": 32, "width": 32})
+
+    config = CLIPConfig(
+        text_config=dict(
+            vocab_size=len(vocab), hidden_size=32, intermediate_size=37, num_hidden_layers=2,
+            num_attention_heads=4, max_position_embeddings=77,
+            bos_token_id=vocab["<|startoftext|>"], eos_token_id=vocab["<|endoftext|>"], pad_token_id=vocab["<|endoftext|>"]
+        ),
+        vision_config=dict(
+            hidden_size=32, intermediate_size=37, num_hidden_layers=2, num_attention_heads=4,
+            image_size=32, patch_size=8
+        ),
+        projection_dim=16
+    )
+    model = _prepare(CLIPModel(config), quantize)
+    return ClipLabelScorer(model, CLIPProcessor(image_processor=image_processor, tokenizer=tokenizer), label_sets)
+
+
+def build_whisper(seed=0, quantize=False):
+    """Tiny Whisper with the real log-mel feature extractor; returns (processor, model)"""
+    torch.manual_seed(seed)
+    vocab = {}
+    for symbol in _byte_symbols():
+        vocab[symbol] = len(vocab)
+    vocab["<|endoftext|>"] = len(vocab)
+    vocab["<|startoftranscript|>"] = len(vocab)
+    tokenizer = _load_tokenizer(WhisperTokenizer, vocab)
+
+    config = WhisperConfig(
+        vocab_size=len(vocab), d_model=32, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64,
+        num_mel_bins=80, max_source_positions=1500, max_target_positions=64,
+        decoder_start_token_id=vocab["<|startoftranscript|>"], bos_token_id=vocab["<|endoftext|>"],
+        eos_token_id=vocab["<|endoftext|>"], pad_token_id=vocab["<|endoftext|>"],
+        suppress_tokens=[], begin_suppress_tokens=[]
+    )
+    model = _prepare(WhisperForConditionalGeneration(config), quantize)
+    model.generation_config.max_length = 24
+    return WhisperProcessor(feature_extractor=WhisperFeatureExtractor(), tokenizer=tokenizer), model
+
+
+def register_stub_models(registry, label_sets, seed=0, quantize=()):
+    """Point a ModelRegistry's bart_mnli, clip and whisper entries at the stand-ins"""
+    registry.register('bart_mnli', lambda: build_text_scorer(label_sets, seed, 'bart_mnli' in quantize))
+    registry.register('clip', lambda: build_image_scorer(label_sets, seed, 'clip' in quantize))
+    registry.register('whisper', lambda: build_whisper(seed, 'whisper' in quantize))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the media fetcher against a local stub HTTP server
+"""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from media_fetcher import MediaFetcher, MediaFetchError, IMAGE_CONTENT_TYPES, AUDIO_CONTENT_TYPES
+
+MAX_BYTES = 1024
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, content_type, body, content_length=True):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if content_length:
+            self.send_header("Content-Length", str(len(body)))
+        else:
+            self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if content_length:
+            self.wfile.write(body)
+        else:
+            for i in range(0, len(body), 256):
+                chunk = body[i:i + 256]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path == "/image.png":
+            self._send(200, "image/png", b"\x89PNG" + b"0" * 100)
+        elif self.path == "/audio.wav":
+            self._send(200, "audio/wav; charset=binary", b"RIFF" + b"0" * 100)
+        elif self.path == "/page.html":
+            self._send(200, "text/html", b"<html></html>")
+        elif self.path == "/big.png":
+            self._send(200, "image/png", b"0" * (MAX_BYTES * 4))
+        elif self.path == "/big-chunked.png":
+            self._send(200, "image/png", b"0" * (MAX_BYTES * 4), content_length=False)
+        elif self.path == "/slow.png":
+            time.sleep(2)
+            self._send(200, "image/png", b"0" * 10)
+        else:
+            self._send(404, "text/plain", b"not found")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+async def run_checks(base_url):
+    fetcher = MediaFetcher(connect_timeout=1, read_timeout=0.5, max_bytes=MAX_BYTES)
+    cases = [
+        ("image with matching type", "/image.png", IMAGE_CONTENT_TYPES, True),
+        ("audio with charset parameter", "/audio.wav", AUDIO_CONTENT_TYPES, True),
+        ("html rejected as image", "/page.html", IMAGE_CONTENT_TYPES, False),
+        ("declared length over limit", "/big.png", IMAGE_CONTENT_TYPES, False),
+        ("chunked body over limit", "/big-chunked.png", IMAGE_CONTENT_TYPES, False),
+        ("read timeout", "/slow.png", IMAGE_CONTENT_TYPES, False),
+        ("missing file", "/missing.png", IMAGE_CONTENT_TYPES, False),
+    ]
+
+    passed = 0
+    for name, path, allowed_types, should_succeed in cases:
+        try:
+            body = await fetcher.fetch(base_url + path, allowed_types)
+            ok = should_succeed and len(body) <= MAX_BYTES
+            detail = f"{len(body)} bytes"
+        except MediaFetchError as e:
+            ok = not should_succeed
+            detail = str(e)
+        print(f"  {'✅' if ok else '❌'} {name}: {detail}")
+        passed += ok
+
+    print(f"\nFetcher stats: {fetcher.stats()}")
+    await fetcher.aclose()
+    return passed, len(cases)
+
+
+def main():
+    print("Testing Media Fetcher...\n")
+    server, base_url = start_stub_server()
+    try:
+        passed, total = asyncio.run(run_checks(base_url))
+    finally:
+        server.shutdown()
+
+    print("\n" + "=" * 50)
+    print(f"{passed}/{total} checks passed")
+
+
+if __name__ == "__main__":
+    main()
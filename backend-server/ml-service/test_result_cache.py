@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Test result cache keys: trivial variants share a key, different reports never do
+"""
+from result_cache import ResultCache
+
+MODEL_VERSION = "test"
+
+
+def key(text):
+    return ResultCache.make_key(text, None, None, MODEL_VERSION)
+
+
+def main():
+    print("Testing Result Cache Keys...\n")
+    cases = [
+        ("case and punctuation variants", "Garbage not collected!", "garbage  NOT collected", True),
+        ("casefolded non-ASCII variants", "STRASSE kaputt", "Straße kaputt.", True),
+        ("different Hindi reports", "सड़क पर गड्ढा", "कचरा नहीं उठाया गया", False),
+        ("Hindi words differing in a vowel sign", "पानी की समस्या", "पानी का समस्या", False),
+        ("different Tamil reports", "சாலையில் குழி", "குப்பை அகற்றப்படவில்லை", False),
+        ("different punctuation-only texts", "!!!", "???", False),
+        ("different emoji-only texts", "🔥🔥", "💧", False),
+    ]
+
+    passed = 0
+    for name, a, b, same in cases:
+        ok = (key(a) == key(b)) == same
+        print(f"  {'✅' if ok else '❌'} {name}: {'same' if same else 'different'} key expected")
+        passed += ok
+
+    print("\n" + "=" * 50)
+    print(f"{passed}/{len(cases)} checks passed")
+    return 0 if passed == len(cases) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
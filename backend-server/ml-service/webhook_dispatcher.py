@@ -0,0 +1,188 @@
+"""
+Background delivery of classification webhooks to the Node.js server.
+
+Jobs used to post their webhook inline, so every job waited on the Node
+server before its slot was free. WebhookDispatcher takes notifications into a
+bounded buffer and returns immediately; `senders` background tasks post them
+over the worker's pooled httpx client:
+
+- with batch_size > 1, notifications already buffered are coalesced into one
+  JSON array (the Node webhook accepts a single object or an array);
+- a failed post is retried with exponential backoff inside the sender, so a
+  slow or restarting Node server only holds up webhook delivery. If the Node
+  side reports which reports failed, only those are retried;
+- when the buffer is full, notifications spill to a Redis list (or are dropped
+  without one) and are fed back in once there is room again. Whatever is still
+  buffered or being retried at shutdown is spilled too.
+
+`on_delivered`, if given, is called with the seconds each delivered
+notification spent between submit() and a successful post.
+"""
+import asyncio
+import json
+import random
+import time
+
+
+class WebhookDispatcher:
+    def __init__(self, http, url, batch_size=1, max_buffer=1000, senders=4,
+                 max_retries=5, backoff_s=0.5, timeout_s=5.0, redis=None, spill_key=None, on_delivered=None):
+        self.http = http
+        self.url = url
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.timeout_s = timeout_s
+        self.redis = redis
+        self.spill_key = spill_key if redis is not None else None
+        self.on_delivered = on_delivered
+
+        self._buffer = asyncio.Queue(maxsize=max_buffer)
+        self._senders = [asyncio.ensure_future(self._send_loop()) for _ in range(senders)]
+        self._refill = asyncio.ensure_future(self._refill_loop()) if self.spill_key else None
+
+        self.sent = 0
+        self.posts = 0
+        self.retries = 0
+        self.failed = 0
+        self.spilled = 0
+        self.dropped = 0
+
+    async def submit(self, notification):
+        """Queue one webhook payload; never waits on the Node server"""
+        entry = (time.time(), notification)
+        try:
+            self._buffer.put_nowait(entry)
+        except asyncio.QueueFull:
+            await self._spill([entry])
+
+    async def _spill(self, notifications):
+        """Push (submitted_at, notification) entries to Redis, or drop them"""
+        if self.spill_key:
+            try:
+                await self.redis.rpush(self.spill_key, *(
+                    json.dumps({'submittedAt': submitted_at, 'notification': n}) for submitted_at, n in notifications
+                ))
+                self.spilled += len(notifications)
+                return
+            except Exception as e:
+                print(f"Failed to spill {len(notifications)} webhook(s): {e}")
+        self.dropped += len(notifications)
+        print(f"Dropped {len(notifications)} webhook notification(s)")
+
+    async def _refill_loop(self):
+        """Move spilled notifications back into the buffer as senders make room"""
+        while True:
+            try:
+                raw = await self.redis.lpop(self.spill_key)
+            except Exception as e:
+                print(f"Failed to read spilled webhooks: {e}")
+                raw = None
+            if raw is None:
+                await asyncio.sleep(1)
+                continue
+            try:
+                spilled = json.loads(raw)
+                await self._buffer.put((spilled['submittedAt'], spilled['notification']))
+            except asyncio.CancelledError:
+                # Shutting down: leave it for the next worker
+                await self.redis.lpush(self.spill_key, raw)
+                raise
+
+    async def _send_loop(self):
+        while True:
+            batch = [await self._buffer.get()]
+            while len(batch) < self.batch_size and not self._buffer.empty():
+                batch.append(self._buffer.get_nowait())
+            try:
+                await self._deliver(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Failed to send webhook: {e}")
+            finally:
+                for _ in batch:
+                    self._buffer.task_done()
+
+    async def _deliver(self, entries):
+        submitted = {id(n): submitted_at for submitted_at, n in entries}
+        batch = [n for _, n in entries]
+        for attempt in range(self.max_retries + 1):
+            try:
+                if attempt:
+                    self.retries += 1
+                    await asyncio.sleep(self.backoff_s * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                payload = batch if self.batch_size > 1 else batch[0]
+                self.posts += 1
+                response = await self.http.post(self.url, json=payload, timeout=self.timeout_s)
+            except asyncio.CancelledError:
+                # Shutting down mid-retry: spill what is not delivered yet for the next worker
+                await self._spill([(submitted[id(n)], n) for n in batch])
+                raise
+            except Exception as e:
+                print(f"Webhook to Node.js server failed ({len(batch)} report(s), attempt {attempt + 1}): {e!r}")
+                continue
+
+            if response.status_code < 400:
+                self._delivered(batch, submitted)
+                print(f"Webhook sent to Node.js server: {response.status_code} ({len(batch)} report(s))")
+                return
+            print(f"Webhook to Node.js server failed ({len(batch)} report(s), attempt {attempt + 1}): {response.status_code}")
+            if 400 <= response.status_code < 500 and response.status_code != 429:
+                break
+            batch = self._still_failed(batch, response, submitted)
+
+        self.failed += len(batch)
+        print(f"Giving up on webhook for {len(batch)} report(s)")
+
+    def _delivered(self, batch, submitted):
+        self.sent += len(batch)
+        if self.on_delivered is not None:
+            now = time.time()
+            for notification in batch:
+                self.on_delivered(now - submitted[id(notification)])
+
+    def _still_failed(self, batch, response, submitted):
+        """Notifications to retry after a batched post reported partial failures"""
+        if len(batch) == 1:
+            return batch
+        try:
+            failed_ids = set(response.json().get('failed') or [])
+        except (ValueError, AttributeError):
+            return batch
+        if not failed_ids:
+            return batch
+        retry = [n for n in batch if n.get('reportId') in failed_ids]
+        if not retry:
+            return batch
+        self._delivered([n for n in batch if n.get('reportId') not in failed_ids], submitted)
+        return retry
+
+    async def close(self, timeout):
+        """Wait up to `timeout` for the buffer to empty, then spill what is left"""
+        if self._refill is not None:
+            self._refill.cancel()
+            await asyncio.gather(self._refill, return_exceptions=True)
+        try:
+            await asyncio.wait_for(self._buffer.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for task in self._senders:
+            task.cancel()
+        await asyncio.gather(*self._senders, return_exceptions=True)
+
+        leftover = []
+        while not self._buffer.empty():
+            leftover.append(self._buffer.get_nowait())
+        if leftover:
+            await self._spill(leftover)
+
+    def stats(self):
+        return {
+            "buffered": self._buffer.qsize(),
+            "sent": self.sent,
+            "posts": self.posts,
+            "retries": self.retries,
+            "failed": self.failed,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+        }
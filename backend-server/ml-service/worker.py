@@ -1,12 +1,18 @@
 import os
 import sys
-import requests
+import asyncio
+import signal
+import httpx
 import pymongo
-from bson import ObjectId
-import redis
+import redis.asyncio as aioredis
 import json
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+from pymongo.write_concern import WriteConcern
+from prometheus_client import Gauge, Histogram, start_http_server
+from adaptive_limit import AdaptiveLimit
+from report_writer import ReportWriter
+from webhook_dispatcher import WebhookDispatcher
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,173 +21,457 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
 MONGO_URI = os.getenv('DB_URI', 'mongodb://localhost:27017/CivicResponses')
 ML_SERVICE_URL = os.getenv('ML_SERVICE_URL', 'http://localhost:8000')
+WEBHOOK_URL = os.getenv('NODEJS_WEBHOOK_URL', 'http://localhost:3000/api/v1/reports/ml-webhook')
+QUEUE_NAME = 'ml_classification_queue'
 
-# Initialize connections
-redis_client = redis.from_url(REDIS_URL)
-mongo_client = pymongo.MongoClient(MONGO_URI)
-db = mongo_client.get_database()
+# Concurrent ML calls adapt between these bounds from ML-service latency and errors
+WORKER_MIN_CONCURRENCY = int(os.getenv('WORKER_MIN_CONCURRENCY', '1'))
+WORKER_MAX_CONCURRENCY = int(os.getenv('WORKER_MAX_CONCURRENCY', '32'))
+WORKER_INITIAL_CONCURRENCY = int(os.getenv('WORKER_INITIAL_CONCURRENCY', '4'))
+WORKER_LATENCY_TOLERANCE = float(os.getenv('WORKER_LATENCY_TOLERANCE', '2.0'))
+# How long BLPOP blocks, and how long shutdown waits for in-flight jobs
+WORKER_POLL_TIMEOUT_S = int(os.getenv('WORKER_POLL_TIMEOUT_S', '5'))
+WORKER_DRAIN_TIMEOUT_S = float(os.getenv('WORKER_DRAIN_TIMEOUT_S', '60'))
+ML_TIMEOUT_S = float(os.getenv('ML_TIMEOUT_S', '30'))
+# Each ML call takes up to WORKER_BATCH_SIZE queued jobs to /classify/batch; jobs the
+# ML service turns away as overloaded go back on the queue up to WORKER_MAX_REQUEUES times
+WORKER_BATCH_SIZE = int(os.getenv('WORKER_BATCH_SIZE', '16'))
+WORKER_MAX_REQUEUES = int(os.getenv('WORKER_MAX_REQUEUES', '3'))
 
-def process_classification_job(job_data):
-    """Process ML classification job"""
+# http: call the ML service at ML_SERVICE_URL; embedded: import app.py and run the
+# models in this process (single-box deployments, no HTTP hop or JSON round trip)
+WORKER_MODE = os.getenv('WORKER_MODE', 'http')
+if WORKER_MODE not in ('http', 'embedded'):
+    raise ValueError(f"WORKER_MODE must be 'http' or 'embedded', got {WORKER_MODE!r}")
+
+# Webhooks are posted by background senders; with WEBHOOK_BATCH_SIZE > 1 buffered
+# notifications are coalesced into one JSON array. When WEBHOOK_BUFFER_SIZE are
+# waiting, new ones spill to the WEBHOOK_SPILL_QUEUE Redis list (empty: drop them)
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', '1'))
+WEBHOOK_BUFFER_SIZE = int(os.getenv('WEBHOOK_BUFFER_SIZE', '1000'))
+WEBHOOK_SENDERS = int(os.getenv('WEBHOOK_SENDERS', '4'))
+WEBHOOK_MAX_RETRIES = int(os.getenv('WEBHOOK_MAX_RETRIES', '5'))
+WEBHOOK_BACKOFF_S = float(os.getenv('WEBHOOK_BACKOFF_S', '0.5'))
+WEBHOOK_TIMEOUT_S = float(os.getenv('WEBHOOK_TIMEOUT_S', '5'))
+WEBHOOK_SPILL_QUEUE = os.getenv('WEBHOOK_SPILL_QUEUE', 'ml_webhook_spill')
+
+# Per-job stage timings and the sampled queue depth are served for Prometheus on
+# WORKER_METRICS_PORT (0 disables); in embedded mode this includes app.py's metrics
+WORKER_METRICS_PORT = int(os.getenv('WORKER_METRICS_PORT', '8001'))
+WORKER_QUEUE_DEPTH_INTERVAL_S = float(os.getenv('WORKER_QUEUE_DEPTH_INTERVAL_S', '5'))
+
+STAGE_SECONDS = Histogram(
+    'ml_worker_stage_seconds',
+    'Per-job time in each stage: queue_wait (Node enqueue to pop), ml, mongo, '
+    'webhook (handed off to delivered) and total (enqueue to report written)',
+    ['stage'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+)
+QUEUE_DEPTH = Gauge('ml_worker_queue_depth', 'Jobs waiting in the classification queue when last sampled')
+
+# MongoDB pool and write concern; updates from concurrent jobs are grouped into
+# unordered bulk writes of up to MONGO_BULK_MAX_OPS, flushed after MONGO_BULK_MAX_DELAY_MS
+MONGO_POOL_SIZE = int(os.getenv('MONGO_POOL_SIZE', '20'))
+MONGO_WRITE_CONCERN = os.getenv('MONGO_WRITE_CONCERN', '1')
+MONGO_WTIMEOUT_MS = int(os.getenv('MONGO_WTIMEOUT_MS', '5000'))
+MONGO_BULK_MAX_OPS = int(os.getenv('MONGO_BULK_MAX_OPS', '50'))
+MONGO_BULK_MAX_DELAY_MS = float(os.getenv('MONGO_BULK_MAX_DELAY_MS', '10'))
+
+# Initialize connections (pymongo is synchronous and runs on worker threads)
+redis_client = aioredis.from_url(REDIS_URL)
+mongo_client = pymongo.MongoClient(MONGO_URI, maxPoolSize=MONGO_POOL_SIZE)
+db = mongo_client.get_database(write_concern=WriteConcern(
+    w=int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN,
+    wtimeout=MONGO_WTIMEOUT_MS
+))
+
+# app.py's classification engine, imported by load_engine() in embedded mode
+engine = None
+
+def load_engine():
+    """Import the classification engine so batches are classified in this process"""
+    global engine
+    import app
+    engine = app
+
+def is_overload(status_code):
+    """Responses that mean the ML service is struggling, not that the job is bad"""
+    return status_code == 429 or status_code >= 500
+
+def is_retryable(status_code):
+    """Rejected before any work was done; the same job can simply be sent again"""
+    return status_code in (429, 503)
+
+async def pop_jobs(count):
+    """Block for one job, then take up to count - 1 more that are already queued"""
+    popped = await redis_client.blpop(QUEUE_NAME, timeout=WORKER_POLL_TIMEOUT_S)
+    if not popped:
+        return []
+    
+    raw_jobs = [popped[1]]
+    if count > 1:
+        try:
+            # LPOP with a count needs Redis 6.2+
+            raw_jobs.extend(await redis_client.lpop(QUEUE_NAME, count - 1) or [])
+        except aioredis.ResponseError:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for _ in range(count - 1):
+                    pipe.lpop(QUEUE_NAME)
+                raw_jobs.extend(raw for raw in await pipe.execute() if raw is not None)
+    
+    jobs = []
+    for raw in raw_jobs:
+        try:
+            jobs.append(json.loads(raw.decode('utf-8')))
+        except ValueError as e:
+            print(f"Dropping malformed job {raw!r}: {e}")
+    return jobs
+
+async def requeue_jobs(jobs):
+    """Put jobs the ML service was too busy for, or never answered, back at the far end of the queue"""
+    raw_jobs = []
+    for job_data in jobs:
+        requeues = job_data.get('requeues', 0)
+        if requeues >= WORKER_MAX_REQUEUES:
+            print(f"Giving up on report {job_data.get('reportId')} after {requeues} requeues")
+            continue
+        raw_jobs.append(json.dumps({**job_data, 'requeues': requeues + 1}))
+    if not raw_jobs:
+        return
+    try:
+        await redis_client.rpush(QUEUE_NAME, *raw_jobs)
+        print(f"Requeued {len(raw_jobs)} job(s)")
+    except Exception as e:
+        print(f"Failed to requeue {len(raw_jobs)} job(s): {e}")
+
+def parse_queued_at(job_data):
+    """When Node queued the job (its ISO `timestamp`), or None"""
+    try:
+        return datetime.fromisoformat(job_data['timestamp'].replace('Z', '+00:00'))
+    except (KeyError, AttributeError, ValueError):
+        return None
+
+async def sample_queue_depth():
+    """Keep the queue-depth gauge current while the worker runs"""
+    while True:
+        try:
+            QUEUE_DEPTH.set(await redis_client.llen(QUEUE_NAME))
+        except Exception as e:
+            print(f"Queue depth check failed: {e}")
+        await asyncio.sleep(WORKER_QUEUE_DEPTH_INTERVAL_S)
+
+def build_payload(job_data):
+    """ML service request for a job, or None if there is nothing to classify"""
+    report_id = job_data['reportId']
+    description = job_data.get('description', '')
+    image_url = job_data.get('imageUrl')
+    
+    print(f"Processing classification for report {report_id}")
+    
+    # Prepare text for classification (only use description, ignore temporary title)
+    text_input = description.strip() if description else ''
+    
+    payload = {}
+    if text_input:
+        payload['text'] = text_input
+    if image_url:
+        payload['image_url'] = image_url
+        
+    if not payload:
+        print(f"No text or image for report {report_id}")
+        return None
+        
+    # Lets the ML service match near-duplicates back to this report
+    payload['report_id'] = report_id
+    return payload
+
+async def classify_over_http(items, http):
+    """Result dicts from the ML service's /classify/batch, in the order they finish"""
+    async with http.stream('POST', f"{ML_SERVICE_URL}/classify/batch", json={'items': items}, timeout=ML_TIMEOUT_S) as response:
+        if response.status_code != 200:
+            await response.aread()
+            print(f"ML service error for batch of {len(items)}: {response.status_code}")
+            # Reported on every item, the same shape as a per-item failure
+            for item in items:
+                yield {'id': item['id'], 'error': response.text, 'status': response.status_code}
+            return
+        async for line in response.aiter_lines():
+            if line.strip():
+                yield json.loads(line)
+
+def classify_embedded(items):
+    """Result dicts from the in-process engine, in the order they finish"""
+    return engine.classify_batch_items([engine.BatchItem(**item) for item in items])
+
+async def process_job_batch(jobs, popped_at, http, limit, writer, webhooks):
+    """Classify jobs with one ML call, storing each result as it streams back"""
+    items = []
+    pending = {}
+    for index, job_data in enumerate(jobs):
+        try:
+            payload = build_payload(job_data)
+        except Exception as e:
+            print(f"Error processing classification job: {e}")
+            continue
+        if payload:
+            items.append({'id': str(index), **payload})
+            pending[str(index)] = job_data
+    if not items:
+        return
+    
+    print(f"Sending {len(items)} job(s) to ML service")
+    
+    stores = []
+    retry = []
+    ok = True
+    started = time.monotonic()
+    results = classify_over_http(items, http) if engine is None else classify_embedded(items)
+    try:
+        async for result in results:
+            job_data = pending.pop(result.pop('id'))
+            if 'error' in result:
+                status = result.get('status', 500)
+                print(f"ML service error for report {job_data['reportId']}: {status}")
+                print(f"Response: {result['error']}")
+                ok = ok and not is_overload(status)
+                if is_retryable(status):
+                    retry.append(job_data)
+                continue
+            queued_at = parse_queued_at(job_data)
+            timings = {
+                'queuedAt': queued_at,
+                'poppedAt': popped_at,
+                'queueWait': max(0.0, popped_at - queued_at.timestamp()) if queued_at else None,
+                'ml': time.monotonic() - started
+            }
+            stores.append(asyncio.create_task(store_classification(job_data, result, timings, writer, webhooks)))
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        ok = False
+        print(f"ML batch call failed: {e!r}")
+        # The call broke off mid-stream, so every job still pending goes back on the queue
+        print(f"Requeueing {len(pending)} job(s) left without a classification")
+        retry.extend(pending.values())
+        pending.clear()
+    finally:
+        await results.aclose()
+    # Per-job latency, so the baseline holds across batch sizes
+    limit.observe(started, (time.monotonic() - started) / len(items), ok=ok)
+    
+    for job_data in pending.values():
+        print(f"No classification returned for report {job_data['reportId']}")
+    if retry:
+        await requeue_jobs(retry)
+    if stores:
+        await asyncio.gather(*stores)
+
+async def store_classification(job_data, result, timings, writer, webhooks):
+    """Write one classification to its report and notify the Node.js server"""
     try:
         report_id = job_data['reportId']
         description = job_data.get('description', '')
-        image_url = job_data.get('imageUrl')
-        title = job_data.get('title', '')
         
-        print(f"Processing classification for report {report_id}")
+        # Update report in database
+        update_data = {
+            'mlClassified': True,
+            'mlSeverity': result['severity'],
+            'mlDepartment': result['department'],
+            'mlConfidence': result['confidence'],
+            'mlTitle': result.get('title', ''),
+            'mlConflicts': result.get('conflicts')
+        }
         
-        # Prepare text for classification (only use description, ignore temporary title)
-        text_input = description.strip() if description else ''
+        # Always update department and severity with ML predictions
+        update_data['department'] = result['department']
+        update_data['severity'] = result['severity']
         
-        # Call ML service
-        payload = {}
-        if text_input:
-            payload['text'] = text_input
-        if image_url:
-            payload['image_url'] = image_url
-            
-        if not payload:
-            print(f"No text or image for report {report_id}")
-            return
-            
-        print(f"Sending to ML service: {payload}")
-            
-        response = requests.post(f"{ML_SERVICE_URL}/classify", json=payload, timeout=30)
+        # Update title if ML generated one and original is empty/generic
+        ml_title = result.get('title', '')
+        current_title = job_data.get('title', '')
         
-        if response.status_code == 200:
-            result = response.json()
-            
-            # Update report in database
-            update_data = {
-                'mlClassified': True,
-                'mlSeverity': result['severity'],
-                'mlDepartment': result['department'],
-                'mlConfidence': result['confidence'],
-                'mlTitle': result.get('title', ''),
-                'mlConflicts': result.get('conflicts')
-            }
-            
-            # Always update department and severity with ML predictions
-            update_data['department'] = result['department']
-            update_data['severity'] = result['severity']
-            
-            # Update title if ML generated one and original is empty/generic
-            ml_title = result.get('title', '')
-            current_title = job_data.get('title', '')
-            
-            print(f"Title processing:")
-            print(f"  Current title: '{current_title}'")
-            print(f"  ML generated title: '{ml_title}'")
-            
-            # Always update title if ML generated a valid one
-            if ml_title and ml_title != 'No title' and not ml_title.startswith('Processing'):
-                update_data['title'] = ml_title
-                print(f"  ✅ Title updated to: '{ml_title}'")
-            else:
-                print(f"  ⏭️ Title not updated - ML title: '{ml_title}'")
-                # If ML didn't generate a good title, create a simple one from description
-                if description and (not current_title or current_title == 'Processing...'):
-                    simple_title = ' '.join(description.split()[:4]) + '...'
-                    update_data['title'] = simple_title
-                    print(f"  📝 Created simple title: '{simple_title}'")
-            
-            update_result = db.reports.update_one(
-                {'_id': ObjectId(report_id)},
-                {'$set': update_data}
-            )
-            
-            # Get the updated report to log
-            updated_report = db.reports.find_one({'_id': ObjectId(report_id)})
-            
-            print(f"Successfully classified report {report_id}:")
-            print(f"  Severity: {result['severity']}")
-            print(f"  Department: {result['department']}")
-            print(f"  Title: {result.get('title', 'No title')}")
-            print(f"  Conflicts: {result.get('conflicts', 'None')}")
-            print(f"Updated fields:")
-            for key, value in update_data.items():
-                print(f"  {key}: {value}")
-            print(f"Update result - matched: {update_result.matched_count}, modified: {update_result.modified_count}")
-            
-            if updated_report:
-                print(f"Final report state:")
-                print(f"  ID: {updated_report.get('_id')}")
-                print(f"  Title: {updated_report.get('title')}")
-                print(f"  Department: {updated_report.get('department')}")
-                print(f"  Severity: {updated_report.get('severity')}")
-                print(f"  ML Title: {updated_report.get('mlTitle')}")
-                print(f"  Original Description: {updated_report.get('description', '')[:50]}...")
-            else:
-                print("❌ No updated report returned from database")
-            
-            # Notify Node.js server about classification completion
-            try:
-                webhook_url = os.getenv('NODEJS_WEBHOOK_URL', 'http://localhost:3000/api/v1/reports/ml-webhook')
-                
-                # Convert MongoDB document to JSON serializable format
-                serializable_report = None
-                if updated_report:
-                    serializable_report = {
-                        '_id': str(updated_report['_id']),
-                        'title': updated_report.get('title'),
-                        'description': updated_report.get('description'),
-                        'department': updated_report.get('department'),
-                        'severity': updated_report.get('severity'),
-                        'mlClassified': updated_report.get('mlClassified'),
-                        'mlSeverity': updated_report.get('mlSeverity'),
-                        'mlDepartment': updated_report.get('mlDepartment'),
-                        'mlConfidence': updated_report.get('mlConfidence'),
-                        'mlTitle': updated_report.get('mlTitle'),
-                        'mlConflicts': updated_report.get('mlConflicts')
-                    }
-                
-                webhook_payload = {
-                    'reportId': report_id,
-                    'classification': result,
-                    'updatedReport': serializable_report
-                }
-                webhook_response = requests.post(webhook_url, json=webhook_payload, timeout=5)
-                print(f"Webhook sent to Node.js server: {webhook_response.status_code}")
-            except Exception as webhook_error:
-                print(f"Failed to send webhook: {webhook_error}")
-            
-            print("=" * 50)
+        print(f"Title processing:")
+        print(f"  Current title: '{current_title}'")
+        print(f"  ML generated title: '{ml_title}'")
+        
+        # Always update title if ML generated a valid one
+        if ml_title and ml_title != 'No title' and not ml_title.startswith('Processing'):
+            update_data['title'] = ml_title
+            print(f"  ✅ Title updated to: '{ml_title}'")
         else:
-            print(f"ML service error for report {report_id}: {response.status_code}")
-            print(f"Response: {response.text}")
-            
+            print(f"  ⏭️ Title not updated - ML title: '{ml_title}'")
+            # If ML didn't generate a good title, create a simple one from description
+            if description and (not current_title or current_title == 'Processing...'):
+                simple_title = ' '.join(description.split()[:4]) + '...'
+                update_data['title'] = simple_title
+                print(f"  📝 Created simple title: '{simple_title}'")
+        
+        # Stage breakdown known before the write, so slow reports can be traced
+        update_data['mlTimings'] = {
+            'queuedAt': timings['queuedAt'],
+            'dequeuedAt': datetime.fromtimestamp(timings['poppedAt'], timezone.utc),
+            'classifiedAt': datetime.now(timezone.utc),
+            'queueWaitMs': round(timings['queueWait'] * 1000) if timings['queueWait'] is not None else None,
+            'mlMs': round(timings['ml'] * 1000)
+        }
+        
+        # One round trip: returns the fields logged and forwarded below
+        write_started = time.monotonic()
+        updated_report = await writer.update(report_id, update_data)
+        
+        STAGE_SECONDS.labels('ml').observe(timings['ml'])
+        STAGE_SECONDS.labels('mongo').observe(time.monotonic() - write_started)
+        if timings['queueWait'] is not None:
+            STAGE_SECONDS.labels('queue_wait').observe(timings['queueWait'])
+            STAGE_SECONDS.labels('total').observe(timings['queueWait'] + time.time() - timings['poppedAt'])
+        
+        print(f"Successfully classified report {report_id}:")
+        print(f"  Severity: {result['severity']}")
+        print(f"  Department: {result['department']}")
+        print(f"  Title: {result.get('title', 'No title')}")
+        print(f"  Conflicts: {result.get('conflicts', 'None')}")
+        print(f"Updated fields:")
+        for key, value in update_data.items():
+            print(f"  {key}: {value}")
+        print(f"Update result - matched: {1 if updated_report else 0}")
+        
+        if updated_report:
+            print(f"Final report state:")
+            print(f"  ID: {updated_report.get('_id')}")
+            print(f"  Title: {updated_report.get('title')}")
+            print(f"  Department: {updated_report.get('department')}")
+            print(f"  Severity: {updated_report.get('severity')}")
+            print(f"  ML Title: {updated_report.get('mlTitle')}")
+            print(f"  Original Description: {updated_report.get('description', description)[:50]}...")
+        else:
+            print("❌ No updated report returned from database")
+        
+        # Notify Node.js server about classification completion
+        # Convert MongoDB document to JSON serializable format
+        serializable_report = None
+        if updated_report:
+            serializable_report = {
+                '_id': str(updated_report['_id']),
+                'title': updated_report.get('title'),
+                # Bulk-written updates only return the fields that were set
+                'description': updated_report.get('description', description),
+                'department': updated_report.get('department'),
+                'severity': updated_report.get('severity'),
+                'mlClassified': updated_report.get('mlClassified'),
+                'mlSeverity': updated_report.get('mlSeverity'),
+                'mlDepartment': updated_report.get('mlDepartment'),
+                'mlConfidence': updated_report.get('mlConfidence'),
+                'mlTitle': updated_report.get('mlTitle'),
+                'mlConflicts': updated_report.get('mlConflicts')
+            }
+        
+        # Delivered in the background; the job does not wait for the Node.js server
+        await webhooks.submit({
+            'reportId': report_id,
+            'classification': result,
+            'updatedReport': serializable_report
+        })
+        
+        print("=" * 50)
+        
     except Exception as e:
         print(f"Error processing classification job: {e}")
 
-def worker_loop():
-    """Main worker loop"""
+async def run_batch(jobs, popped_at, http, limit, writer, webhooks):
+    try:
+        await process_job_batch(jobs, popped_at, http, limit, writer, webhooks)
+    finally:
+        limit.release()
+
+async def worker_loop():
+    """Main worker loop: keep up to the adaptive limit of batched ML calls in flight"""
     print("Starting ML classification worker...")
     print(f"Redis URL: {REDIS_URL}")
     print(f"MongoDB URI: {MONGO_URI}")
-    print(f"ML Service URL: {ML_SERVICE_URL}")
+    print(f"Mode: {WORKER_MODE}")
+    if WORKER_MODE == 'embedded':
+        load_engine()
+        # Load the text model before taking jobs so the first batch is not held up
+        await asyncio.to_thread(engine.model_registry.get, 'bart_mnli')
+        print(f"Classifying in-process, models: {engine.model_registry.report()}")
+    else:
+        print(f"ML Service URL: {ML_SERVICE_URL}")
     
-    while True:
-        try:
-            # Check for jobs in Redis queue
-            job_data = redis_client.blpop('ml_classification_queue', timeout=5)
+    limit = AdaptiveLimit(
+        initial=WORKER_INITIAL_CONCURRENCY,
+        min_limit=WORKER_MIN_CONCURRENCY,
+        max_limit=WORKER_MAX_CONCURRENCY,
+        tolerance=WORKER_LATENCY_TOLERANCE
+    )
+    writer = ReportWriter(db.reports, max_ops=MONGO_BULK_MAX_OPS, max_delay_ms=MONGO_BULK_MAX_DELAY_MS)
+    in_flight = set()
+    
+    if WORKER_METRICS_PORT:
+        start_http_server(WORKER_METRICS_PORT)
+        print(f"Metrics on :{WORKER_METRICS_PORT}/metrics")
+    depth_sampler = asyncio.create_task(sample_queue_depth())
+    
+    # Ctrl+C / SIGTERM stop taking jobs; jobs already taken are finished
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    def request_stop(*_):
+        loop.call_soon_threadsafe(stopping.set)
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    
+    # One keep-alive pool for ML calls and webhooks, sized for the largest ML concurrency
+    pool = httpx.Limits(max_connections=2 * WORKER_MAX_CONCURRENCY, max_keepalive_connections=2 * WORKER_MAX_CONCURRENCY)
+    async with httpx.AsyncClient(limits=pool) as http:
+        webhooks = WebhookDispatcher(
+            http, WEBHOOK_URL,
+            batch_size=WEBHOOK_BATCH_SIZE,
+            max_buffer=WEBHOOK_BUFFER_SIZE,
+            senders=WEBHOOK_SENDERS,
+            max_retries=WEBHOOK_MAX_RETRIES,
+            backoff_s=WEBHOOK_BACKOFF_S,
+            timeout_s=WEBHOOK_TIMEOUT_S,
+            redis=redis_client,
+            spill_key=WEBHOOK_SPILL_QUEUE or None,
+            on_delivered=STAGE_SECONDS.labels('webhook').observe
+        )
+        while not stopping.is_set():
+            # Only take jobs off the queue once there is a slot for their ML call
+            await limit.acquire()
+            try:
+                jobs = await pop_jobs(WORKER_BATCH_SIZE)
+                popped_at = time.time()
+            except Exception as e:
+                limit.release()
+                print(f"Worker error: {e}")
+                await asyncio.sleep(5)  # Wait before retrying
+                continue
             
-            if job_data:
-                print(f"Received job: {job_data}")
-                job_json = job_data[1].decode('utf-8')
-                job = json.loads(job_json)
-                process_classification_job(job)
-            else:
-                # No jobs, sleep briefly
-                print("No jobs in queue, waiting...")
-                time.sleep(1)
-                
-        except KeyboardInterrupt:
-            print("Worker stopped by user")
-            break
-        except Exception as e:
-            print(f"Worker error: {e}")
-            time.sleep(5)  # Wait before retrying
+            if not jobs:
+                # BLPOP already waited (or every job was malformed); poll again straight away
+                limit.release()
+                continue
+            
+            for job in jobs:
+                print(f"Received job for report {job.get('reportId')}")
+            print(f"Batch of {len(jobs)} job(s) (ML calls in flight: {limit.in_flight}, limit: {int(limit.limit)})")
+            task = asyncio.create_task(run_batch(jobs, popped_at, http, limit, writer, webhooks))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        
+        if in_flight:
+            print(f"Worker stopping, waiting for {len(in_flight)} in-flight batch(es)...")
+            done, pending = await asyncio.wait(in_flight, timeout=WORKER_DRAIN_TIMEOUT_S)
+            for task in pending:
+                task.cancel()
+            if pending:
+                print(f"Abandoned {len(pending)} batch(es) after {WORKER_DRAIN_TIMEOUT_S}s")
+        
+        # Unsent webhooks are spilled to Redis and picked up by the next worker
+        await webhooks.close(WORKER_DRAIN_TIMEOUT_S)
+    
+    depth_sampler.cancel()
+    await redis_client.aclose()
+    if engine is not None:
+        await engine.media_fetcher.aclose()
+    print(f"Worker stopped by user. Stats: {limit.stats()}, writes: {writer.stats()}, webhooks: {webhooks.stats()}")
 
 if __name__ == "__main__":
-    worker_loop()
\ No newline at end of file
+    asyncio.run(worker_loop())